@@ -0,0 +1,57 @@
+"""
+性能测试公共夹具
+
+运行::
+
+    pip install -e .[dev]
+    pytest benchmarks/ --benchmark-only
+
+各测试会在 ``benchmark.extra_info['peak_memory_bytes']`` 中记录单次执行的内存峰值（tracemalloc）。
+"""
+
+import asyncio
+import tracemalloc
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from shopline_sdk.fixtures import FixtureFactory  # noqa: E402
+from shopline_sdk.mock_server import MockShoplineServer  # noqa: E402
+
+
+@pytest.fixture
+def peak_memory(benchmark):
+    """返回记录函数：单独执行一次 ``func`` 并将内存峰值写入 ``benchmark.extra_info``"""
+
+    def record(func, *args, **kwargs):
+        tracemalloc.start()
+        try:
+            func(*args, **kwargs)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        benchmark.extra_info['peak_memory_bytes'] = peak
+        return peak
+
+    return record
+
+
+@pytest.fixture(scope='session')
+def fixture_factory():
+    return FixtureFactory(seed=0)
+
+
+@pytest.fixture(scope='session')
+def event_loop_runner():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope='session')
+def mock_server(event_loop_runner):
+    server = MockShoplineServer(total_count=2000)
+    event_loop_runner.run_until_complete(server.start())
+    yield server
+    event_loop_runner.run_until_complete(server.close())
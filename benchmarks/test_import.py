@@ -0,0 +1,17 @@
+"""导入耗时"""
+
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+
+def _import_in_subprocess(module: str):
+    subprocess.run([sys.executable, '-c', f'import {module}'], check=True)
+
+
+@pytest.mark.parametrize('module', ['shopline_sdk', 'shopline_sdk.models'])
+def test_import_time(benchmark, module):
+    benchmark.pedantic(_import_in_subprocess, args=(module,), rounds=5, iterations=1)
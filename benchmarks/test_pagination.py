@@ -0,0 +1,32 @@
+"""通过本地模拟服务器的端到端分页吞吐"""
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from shopline_sdk.apis.orders import get_orders  # noqa: E402
+from shopline_sdk.client import ShoplineAPIClient  # noqa: E402
+from shopline_sdk.helper import iterate_pages  # noqa: E402
+
+
+@pytest.mark.parametrize('per_page', [24, 250])
+def test_get_orders_pages(benchmark, peak_memory, event_loop_runner, mock_server, per_page):
+    client = ShoplineAPIClient('benchmark', base_url=mock_server.base_url)
+
+    async def fetch_all():
+        pages = 0
+        async with client.new_session() as session:
+            async for _ in iterate_pages(get_orders.call, session, get_orders.Params(per_page=per_page)):
+                pages += 1
+        return pages
+
+    def run():
+        return event_loop_runner.run_until_complete(fetch_all())
+
+    peak_memory(run)
+    pages = benchmark.pedantic(run, rounds=3, iterations=1)
+    benchmark.extra_info['pages'] = pages
+    if benchmark.stats:
+        # --benchmark-disable / --benchmark-skip 时没有计时结果
+        benchmark.extra_info['pages_per_second'] = pages / benchmark.stats.stats.mean
+    assert pages == -(-mock_server.total_count // per_page)
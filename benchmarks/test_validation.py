@@ -0,0 +1,35 @@
+"""列表响应的模型校验吞吐"""
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from shopline_sdk.apis.orders import get_orders  # noqa: E402
+from shopline_sdk.apis.products import get_products  # noqa: E402
+from shopline_sdk.models.order import Order  # noqa: E402
+from shopline_sdk.models.product import Product  # noqa: E402
+
+PER_PAGE = [24, 250, 999]
+
+
+def _page(fixture_factory, model, per_page):
+    return {
+        'items': fixture_factory.build_many(model, 0, per_page),
+        'pagination': {'current_page': 1, 'per_page': per_page, 'total_count': per_page, 'total_pages': 1},
+    }
+
+
+@pytest.mark.parametrize('per_page', PER_PAGE)
+def test_get_orders_response(benchmark, peak_memory, fixture_factory, per_page):
+    data = _page(fixture_factory, Order, per_page)
+    peak_memory(get_orders.Response, **data)
+    result = benchmark(lambda: get_orders.Response(**data))
+    assert len(result.items) == per_page
+
+
+@pytest.mark.parametrize('per_page', PER_PAGE)
+def test_get_products_response(benchmark, peak_memory, fixture_factory, per_page):
+    data = _page(fixture_factory, Product, per_page)
+    peak_memory(get_products.Response, **data)
+    result = benchmark(lambda: get_products.Response(**data))
+    assert len(result.items) == per_page
@@ -0,0 +1,32 @@
+"""Webhook 验签吞吐"""
+
+import hashlib
+import hmac
+
+import pytest
+
+pytest.importorskip('pytest_benchmark')
+
+from shopline_sdk.helper import _serialize_payload, verify_webhook_request  # noqa: E402
+from shopline_sdk.models.order import Order  # noqa: E402
+
+SECRET = 'benchmark-secret'
+TIMESTAMP = '1700000000'
+
+
+def _sign(payload):
+    message = f'{TIMESTAMP}:{_serialize_payload(payload)}'
+    return hmac.new(SECRET.encode('utf-8'), message.encode('utf-8'), hashlib.sha256).hexdigest()
+
+
+@pytest.fixture(params=['small', 'large'])
+def payload(request, fixture_factory):
+    if request.param == 'small':
+        return {'topic': 'order/create', 'resource': {'id': '5a55b3c973746f507e120000'}}
+    return {'topic': 'order/create', 'resource': fixture_factory.build(Order)}
+
+
+def test_verify_webhook_request(benchmark, peak_memory, payload):
+    signature = _sign(payload)
+    peak_memory(verify_webhook_request, payload, signature, SECRET, TIMESTAMP)
+    assert benchmark(verify_webhook_request, payload, signature, SECRET, TIMESTAMP)
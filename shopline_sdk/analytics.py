@@ -0,0 +1,485 @@
+"""
+本地增量统计
+
+``AnalyticsEngine`` 从同步下来的订单（原始 JSON 或 ``Order`` 模型）与 Webhook 增量维护按 UTC 小时分桶的聚合，
+查询时按时区偏移把小时桶合并为本地日期，直接返回 ``GrossAmountAnalytics``、``NetAmountAnalytics``、
+``GrossOrdersAnalytics``、``NetOrdersAnalytics``、``TopProductsAnalytics`` 与 ``TotalSessionsAnalytics``。
+查询耗时只与天数（与当期售出商品数）有关，不需要重新扫描订单。
+
+统计口径：
+
+- 订单按 ``created_at`` 归入日期
+- 成交（gross）：除 ``temp`` / ``removed`` 外的全部订单
+- 净额（net）：成交订单中再排除 ``cancelled``
+- 金额只统计 ``currency`` 币种的订单，按分精确累加
+- 热销商品按净额订单的 ``subtotal_items`` 统计
+- 时区偏移以整小时计，与 ``TopProductsAnalytics.timezone`` 一致
+
+用法::
+
+    engine = AnalyticsEngine(currency='TWD')
+    async for page in iterate_raw_pages(session, get_orders, get_orders.Params(per_page=100)):
+        engine.add_orders(page['items'])
+    engine.apply_webhook('order/update', payload)
+    report = engine.gross_amount('2024-01-01', '2024-01-31', timezone=8)
+"""
+
+import datetime
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from pydantic import BaseModel
+from typing_extensions import Literal
+
+from shopline_sdk.helper import parse_datetime
+from shopline_sdk.models.gross_amount_analytics import GrossAmountAnalytics
+from shopline_sdk.models.gross_orders_analytics import GrossOrdersAnalytics
+from shopline_sdk.models.money import Money
+from shopline_sdk.models.net_amount_analytics import NetAmountAnalytics
+from shopline_sdk.models.net_orders_analytics import NetOrdersAnalytics
+from shopline_sdk.models.paginatable import Paginatable
+from shopline_sdk.models.top_products_analytics import TopProductsAnalytics
+from shopline_sdk.models.top_products_analytics_record import TopProductsAnalyticsRecord
+from shopline_sdk.models.top_products_analytics_record_variation import TopProductsAnalyticsRecordVariation
+from shopline_sdk.models.total_sessions_analytics import TotalSessionsAnalytics
+from shopline_sdk.models.translatable import Translatable
+
+GROSS_EXCLUDED_STATUSES = ('temp', 'removed')
+NET_EXCLUDED_STATUSES = GROSS_EXCLUDED_STATUSES + ('cancelled',)
+OFFLINE_SOURCES = ('offline_store', 'offline_store_other')
+
+# 删除订单的 Webhook 主题
+_REMOVE_TOPICS = ('order/remove', 'order/delete', 'order/removed', 'order/deleted')
+
+DateLike = Union[str, datetime.date]
+Device = Literal['desktop', 'mobile']
+TopProductsSort = Literal['amount_sold', 'quantity_sold']
+
+_EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def _get(obj: Any, key: str) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(key)
+    return getattr(obj, key, None)
+
+
+def _cents(money: Any) -> Optional[int]:
+    cents = _get(money, 'cents')
+    return int(cents) if cents is not None else None
+
+
+def _hour(moment: datetime.datetime) -> int:
+    return int((moment - _EPOCH).total_seconds() // 3600)
+
+
+def _to_date(value: DateLike) -> datetime.date:
+    return value if isinstance(value, datetime.date) else datetime.date.fromisoformat(value)
+
+
+@dataclass(frozen=True)
+class _ItemContribution:
+    product_id: str
+    variation_id: Optional[str]
+    quantity: int
+    amount_cents: int
+    cost_cents: int
+    discount_cents: int
+
+
+@dataclass(frozen=True)
+class _OrderContribution:
+    hour: int
+    gross: bool
+    net: bool
+    amount_cents: Optional[int]
+    """``currency`` 币种的订单金额，其他币种为 None"""
+    offline: bool
+    items: Tuple[_ItemContribution, ...]
+
+
+@dataclass
+class _ProductStats:
+    quantity: int = 0
+    amount_cents: int = 0
+    cost_cents: int = 0
+    discount_cents: int = 0
+    online_quantity: int = 0
+    offline_quantity: int = 0
+
+    def add(self, item: _ItemContribution, offline: bool, sign: int):
+        self.quantity += sign * item.quantity
+        self.amount_cents += sign * item.amount_cents
+        self.cost_cents += sign * item.cost_cents
+        self.discount_cents += sign * item.discount_cents
+        if offline:
+            self.offline_quantity += sign * item.quantity
+        else:
+            self.online_quantity += sign * item.quantity
+
+    def merge(self, other: '_ProductStats'):
+        self.quantity += other.quantity
+        self.amount_cents += other.amount_cents
+        self.cost_cents += other.cost_cents
+        self.discount_cents += other.discount_cents
+        self.online_quantity += other.online_quantity
+        self.offline_quantity += other.offline_quantity
+
+
+@dataclass
+class _ProductInfo:
+    """商品最近一次出现在订单中的信息"""
+    sku: Optional[str] = None
+    gtin: Optional[str] = None
+    image_url: Optional[str] = None
+    price_cents: Optional[int] = None
+    title_translations: Optional[Dict[str, Any]] = None
+    variations: Dict[str, '_ProductInfo'] = field(default_factory=dict)
+
+
+class AnalyticsEngine:
+    """按订单与 Webhook 增量维护的本地统计"""
+
+    def __init__(self, currency: Optional[str] = None):
+        """
+        Args:
+            currency: 金额统计的币种，None 时使用第一笔带金额订单的币种
+        """
+        self.currency = currency
+        self._orders: Dict[str, _OrderContribution] = {}
+        # 小时桶 -> [成交订单数, 净额订单数, 成交金额, 净额金额]
+        self._hours: Dict[int, List[int]] = defaultdict(lambda: [0, 0, 0, 0])
+        # 小时桶 -> 商品 ID -> 变体 ID（商品本身为 None）-> 统计
+        self._products: Dict[int, Dict[str, Dict[Optional[str], _ProductStats]]] = {}
+        self._product_info: Dict[str, _ProductInfo] = {}
+        # 小时桶 -> [desktop, mobile]
+        self._sessions: Dict[int, List[int]] = defaultdict(lambda: [0, 0])
+        self.sessions_updated_at: Optional[datetime.datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    # 写入
+
+    def add_orders(self, orders: Iterable[Any]):
+        """批量写入订单，见 ``add_order``"""
+        for order in orders:
+            self.add_order(order)
+
+    def add_order(self, order: Any):
+        """
+        写入或更新一笔订单，重复写入同一订单会先撤销旧的统计
+
+        缺少 ``created_at`` 的不完整订单（例如只含变更字段的 ``order/update`` Webhook）无法计入统计：
+        已写入的订单保留原有统计，未写入的订单被忽略。
+
+        Args:
+            order: 订单原始 JSON 或 ``Order`` 模型实例
+        """
+        order_id = _get(order, 'id')
+        if order_id is None:
+            raise ValueError('order id is required')
+        contribution = self._contribution(order)
+        if contribution is None:
+            return
+        self.remove_order(order_id)
+        self._apply(contribution, 1)
+        self._orders[order_id] = contribution
+
+    def remove_order(self, order_id: str) -> bool:
+        """撤销一笔订单的统计，订单不存在时返回 False"""
+        contribution = self._orders.pop(order_id, None)
+        if contribution is None:
+            return False
+        self._apply(contribution, -1)
+        return True
+
+    def apply_webhook(self, topic: str, payload: Dict[str, Any]):
+        """
+        应用订单 Webhook 增量
+
+        Args:
+            topic: Webhook 主题，例如 ``order/create``、``order/update``、``order/remove``
+            payload: Webhook 请求体，订单位于 ``resource`` 字段或请求体本身
+        """
+        order = payload.get('resource', payload) if isinstance(payload, dict) else payload
+        if topic in _REMOVE_TOPICS:
+            self.remove_order(_get(order, 'id'))
+        elif topic.startswith('order/'):
+            self.add_order(order)
+
+    def record_sessions(self, at: Union[str, datetime.datetime], count: int = 1, device: Device = 'desktop'):
+        """
+        记录网店访问量（订单数据中没有访问量，需要由前台埋点等来源写入）
+
+        Args:
+            at: 访问时间
+            count: 访问次数
+            device: ``desktop`` 或 ``mobile``
+        """
+        moment = parse_datetime(at) if isinstance(at, str) else at
+        if moment is None:
+            raise ValueError(f'Invalid time: {at!r}')
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=datetime.timezone.utc)
+        self._sessions[_hour(moment)][0 if device == 'desktop' else 1] += count
+        if self.sessions_updated_at is None or moment > self.sessions_updated_at:
+            self.sessions_updated_at = moment
+
+    def _contribution(self, order: Any) -> Optional[_OrderContribution]:
+        created_at = parse_datetime(_get(order, 'created_at'))
+        if created_at is None:
+            return None
+        status = _get(order, 'status')
+        gross = status not in GROSS_EXCLUDED_STATUSES
+        net = status not in NET_EXCLUDED_STATUSES
+
+        total = _get(order, 'total')
+        currency = _get(total, 'currency_iso') or _get(order, 'currency_iso')
+        if self.currency is None and currency and _cents(total) is not None:
+            self.currency = currency
+        amount = _cents(total) if currency == self.currency else None
+
+        source_type = _get(_get(order, 'order_source'), 'type')
+        offline = source_type in OFFLINE_SOURCES or _get(order, 'created_by') == 'pos'
+
+        items = []
+        for item in _get(order, 'subtotal_items') or ():
+            product_id = _get(item, 'item_id')
+            if not product_id:
+                continue
+            quantity = int(_get(item, 'quantity') or 0)
+            item_currency = next((
+                _get(_get(item, name), 'currency_iso') for name in ('total', 'price', 'discounted_price', 'cost')
+                if _get(_get(item, name), 'currency_iso')
+            ), currency)
+            if self.currency is None and item_currency:
+                self.currency = item_currency
+            if item_currency == self.currency:
+                price = _cents(_get(item, 'price'))
+                amount_cents = _cents(_get(item, 'total'))
+                discounted = _cents(_get(item, 'discounted_price'))
+                cost = _cents(_get(item, 'cost'))
+            else:
+                # 与订单金额相同：其他币种的金额不计入，只统计销量
+                price = amount_cents = discounted = cost = None
+            if amount_cents is None:
+                amount_cents = (price or 0) * quantity
+            variation_id = _get(item, 'item_variation_id')
+            items.append(_ItemContribution(
+                product_id=product_id,
+                variation_id=variation_id,
+                quantity=quantity,
+                amount_cents=amount_cents,
+                cost_cents=(cost or 0) * quantity,
+                discount_cents=max(0, amount_cents - discounted * quantity) if discounted is not None else 0,
+            ))
+            self._remember(item, product_id, variation_id, price)
+        return _OrderContribution(_hour(created_at), gross, net, amount, offline, tuple(items))
+
+    def _remember(self, item: Any, product_id: str, variation_id: Optional[str], price: Optional[int]):
+        info = self._product_info.setdefault(product_id, _ProductInfo())
+        title = _get(item, 'title_translations')
+        if isinstance(title, BaseModel):
+            title = title.model_dump(exclude_none=True)
+        object_data = _get(item, 'object_data')
+        media = _get(item, 'media')
+        targets = [info]
+        if variation_id:
+            targets.append(info.variations.setdefault(variation_id, _ProductInfo()))
+        for target in targets:
+            target.sku = _get(item, 'sku') or target.sku
+            target.gtin = _get(object_data, 'gtin') or target.gtin
+            target.price_cents = price if price is not None else target.price_cents
+            target.title_translations = title or target.title_translations
+        info.image_url = _get(media, 'url') or info.image_url
+
+    def _apply(self, contribution: _OrderContribution, sign: int):
+        bucket = self._hours[contribution.hour]
+        if contribution.gross:
+            bucket[0] += sign
+            if contribution.amount_cents is not None:
+                bucket[2] += sign * contribution.amount_cents
+        if contribution.net:
+            bucket[1] += sign
+            if contribution.amount_cents is not None:
+                bucket[3] += sign * contribution.amount_cents
+            if contribution.items:
+                products = self._products.setdefault(contribution.hour, {})
+                for item in contribution.items:
+                    variations = products.setdefault(item.product_id, {})
+                    variations.setdefault(None, _ProductStats()).add(item, contribution.offline, sign)
+                    if item.variation_id:
+                        variations.setdefault(item.variation_id, _ProductStats()).add(
+                            item, contribution.offline, sign)
+
+    # 查询
+
+    @staticmethod
+    def _days(start_date: DateLike, end_date: DateLike, timezone: int) -> List[Tuple[datetime.date, range]]:
+        """本地日期 -> 对应的 UTC 小时桶范围"""
+        start, end = _to_date(start_date), _to_date(end_date)
+        if end < start:
+            raise ValueError('end_date must not be earlier than start_date')
+        days = []
+        day = start
+        while day <= end:
+            first = (day - _EPOCH.date()).days * 24 - timezone
+            days.append((day, range(first, first + 24)))
+            day += datetime.timedelta(days=1)
+        return days
+
+    def _money(self, cents: int) -> Money:
+        return Money(cents=cents, currency_iso=self.currency, dollars=cents / 100)
+
+    def _series(self, start_date: DateLike, end_date: DateLike, timezone: int, index: int) -> List[Tuple[str, int]]:
+        series = []
+        for day, hours in self._days(start_date, end_date, timezone):
+            total = 0
+            for hour in hours:
+                bucket = self._hours.get(hour)
+                if bucket is not None:
+                    total += bucket[index]
+            series.append((day.isoformat(), total))
+        return series
+
+    def _report(self, model: Any, start_date: DateLike, end_date: DateLike, timezone: int, index: int,
+                money: bool) -> Any:
+        series = self._series(start_date, end_date, timezone, index)
+        total = sum(value for _, value in series)
+        module = sys.modules[model.__module__]
+        return model(
+            start_date=_to_date(start_date).isoformat(),
+            end_date=_to_date(end_date).isoformat(),
+            metadata=module.MetadataConfig(total=self._money(total) if money else float(total)),
+            records=[module.RecordsItem(label=label, value=self._money(value) if money else value)
+                     for label, value in series],
+        )
+
+    def gross_amount(self, start_date: DateLike, end_date: DateLike, timezone: int = 0) -> GrossAmountAnalytics:
+        """成交金额，按本地日期"""
+        return self._report(GrossAmountAnalytics, start_date, end_date, timezone, 2, money=True)
+
+    def net_amount(self, start_date: DateLike, end_date: DateLike, timezone: int = 0) -> NetAmountAnalytics:
+        """净额，按本地日期"""
+        return self._report(NetAmountAnalytics, start_date, end_date, timezone, 3, money=True)
+
+    def gross_orders(self, start_date: DateLike, end_date: DateLike, timezone: int = 0) -> GrossOrdersAnalytics:
+        """成交订单数，按本地日期"""
+        return self._report(GrossOrdersAnalytics, start_date, end_date, timezone, 0, money=False)
+
+    def net_orders(self, start_date: DateLike, end_date: DateLike, timezone: int = 0) -> NetOrdersAnalytics:
+        """净额订单数，按本地日期"""
+        return self._report(NetOrdersAnalytics, start_date, end_date, timezone, 1, money=False)
+
+    def total_sessions(self, start_date: DateLike, end_date: DateLike, timezone: int = 0) -> TotalSessionsAnalytics:
+        """网店访问量，按本地日期"""
+        records, desktop, mobile = [], 0, 0
+        for day, hours in self._days(start_date, end_date, timezone):
+            day_total = 0
+            for hour in hours:
+                bucket = self._sessions.get(hour)
+                if bucket is not None:
+                    desktop += bucket[0]
+                    mobile += bucket[1]
+                    day_total += bucket[0] + bucket[1]
+            records.append({'label': day.isoformat(), 'value': day_total})
+        return TotalSessionsAnalytics(
+            start_date=_to_date(start_date).isoformat(),
+            end_date=_to_date(end_date).isoformat(),
+            metadata={'all': float(desktop + mobile), 'desktop': float(desktop), 'mobile': float(mobile)},
+            last_updated_at=self.sessions_updated_at.isoformat() if self.sessions_updated_at else None,
+            records=records,
+        )
+
+    def top_products(
+            self,
+            start_date: DateLike,
+            end_date: DateLike,
+            timezone: int = 0,
+            page: int = 1,
+            per_page: int = 24,
+            sort_by: TopProductsSort = 'amount_sold'
+    ) -> TopProductsAnalytics:
+        """
+        热销商品
+
+        Args:
+            start_date: 开始日期（含）
+            end_date: 结束日期（含）
+            timezone: 时区偏移（小时）
+            page: 页码
+            per_page: 每页数量
+            sort_by: 按销售额 ``amount_sold`` 或销量 ``quantity_sold`` 降序
+
+        Returns:
+            TopProductsAnalytics: ``variations`` 为该商品销量最高的规格
+        """
+        totals: Dict[str, Dict[Optional[str], _ProductStats]] = {}
+        for _, hours in self._days(start_date, end_date, timezone):
+            for hour in hours:
+                for product_id, variations in self._products.get(hour, {}).items():
+                    merged = totals.setdefault(product_id, {})
+                    for variation_id, stats in variations.items():
+                        merged.setdefault(variation_id, _ProductStats()).merge(stats)
+
+        key = (lambda item: item[1][None].amount_cents) if sort_by == 'amount_sold' else (
+            lambda item: item[1][None].quantity)
+        ranked = sorted(((pid, v) for pid, v in totals.items() if v[None].quantity), key=key, reverse=True)
+        start = (page - 1) * per_page
+        return TopProductsAnalytics(
+            start_date=_to_date(start_date).isoformat(),
+            end_date=_to_date(end_date).isoformat(),
+            timezone=timezone,
+            pagination=Paginatable(current_page=page, per_page=per_page, total_count=len(ranked),
+                                   total_pages=(len(ranked) + per_page - 1) // per_page),
+            records=[self._product_record(product_id, variations)
+                     for product_id, variations in ranked[start:start + per_page]],
+        )
+
+    def _product_record(self, product_id: str, variations: Dict[Optional[str], _ProductStats]
+                        ) -> TopProductsAnalyticsRecord:
+        info = self._product_info.get(product_id, _ProductInfo())
+        stats = variations[None]
+        best = max((item for item in variations.items() if item[0] is not None),
+                   key=lambda item: item[1].quantity, default=None)
+        variation = None
+        if best is not None:
+            variation_id, variation_stats = best
+            variation_info = info.variations.get(variation_id, _ProductInfo())
+            net_cents = variation_stats.amount_cents - variation_stats.discount_cents
+            profit_cents = net_cents - variation_stats.cost_cents
+            variation = TopProductsAnalyticsRecordVariation(
+                id=variation_id,
+                product_id=product_id,
+                amount_sold=self._money(variation_stats.amount_cents),
+                cost=self._money(variation_stats.cost_cents),
+                discount=self._money(variation_stats.discount_cents),
+                gross_profit=self._money(profit_cents),
+                gross_profit_margin=profit_cents / net_cents if net_cents else None,
+                net_sold=net_cents / 100,
+                quantity_sold=variation_stats.quantity,
+                online_quantity=variation_stats.online_quantity,
+                offline_quantity=variation_stats.offline_quantity,
+                price=self._money(variation_info.price_cents) if variation_info.price_cents is not None else None,
+                sku=variation_info.sku,
+                gtin=variation_info.gtin,
+                title_translations=Translatable(**variation_info.title_translations)
+                if variation_info.title_translations else None,
+            )
+        return TopProductsAnalyticsRecord(
+            id=product_id,
+            image_url=info.image_url,
+            quantity_sold=float(stats.quantity),
+            amount_sold=self._money(stats.amount_cents),
+            cost=self._money(stats.cost_cents),
+            price=self._money(info.price_cents) if info.price_cents is not None else None,
+            sku=info.sku,
+            gtin=info.gtin,
+            title_translations=Translatable(**info.title_translations) if info.title_translations else None,
+            variations=variation,
+        )
@@ -0,0 +1,44 @@
+import aiohttp
+
+# 导入异常类
+from shopline_sdk.exceptions import ShoplineAPIError
+# 导入需要的模型
+from shopline_sdk.models.create_bulk_operation_body import CreateBulkOperationBody as Body
+from shopline_sdk.models.job import Job
+
+
+async def call(
+        session: aiohttp.ClientSession, body: Body
+) -> Job:
+    """
+    Create Bulk Operation
+    
+    To create products in bulk with a bulk operation
+    創建新商品批量操作
+    
+    Path: POST /bulk_operations
+    """
+    # 构建请求 URL
+    url = "bulk_operations"
+
+    # 构建请求头
+    headers = {"Content-Type": "application/json"}
+
+    # 构建请求体
+    json_data = body.model_dump(exclude_none=True) if body else None
+
+    # 发起 HTTP 请求
+    async with session.post(
+            url, json=json_data, headers=headers
+    ) as response:
+        if response.status >= 400:
+            error_data = await response.json()
+            # 默认错误处理
+            raise ShoplineAPIError(
+                status_code=response.status,
+                error=error_data
+            )
+        response_data = await response.json()
+
+        # 验证并返回响应数据
+        return Job(**response_data)
@@ -0,0 +1,391 @@
+"""
+冷区订单报表
+
+``orders.create_archived_orders_report`` 只接受日期范围与 ``callback_url``，报表生成后由 SHOPLINE
+回调通知。``ArchivedOrdersReport`` 管理整个流程：
+
+1. 将长日期范围拆分为多个区间（``split_date_range``），并发提交报表请求
+2. 每个请求使用带唯一令牌的回调地址，由本地 ``CallbackReceiver`` 接收完成通知；
+   无法接收回调时可提供 ``poller`` 轮询报表地址
+3. 流式下载各区间的报表文件，按日期顺序合并为一个输出文件（CSV 只保留第一个表头）
+
+``CallbackReceiver`` 监听本机端口，需要通过反向代理或隧道暴露为 SHOPLINE 可访问的 ``public_url``。
+
+用法::
+
+    async with CallbackReceiver(public_url='https://hooks.example.com') as receiver:
+        report = ArchivedOrdersReport(session, receiver=receiver, chunk_days=31)
+        result = await report.run(date(2019, 1, 1), date(2023, 12, 31), 'archived_orders.csv')
+"""
+
+import asyncio
+import datetime
+import os
+import secrets
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+import aiohttp
+from aiohttp import web
+
+from shopline_sdk.apis.orders import create_archived_orders_report
+from shopline_sdk.timestamps import format_datetime
+
+DateLike = Union[str, datetime.date, datetime.datetime]
+
+Poller = Callable[['ReportRange'], Awaitable[Optional[str]]]
+"""轮询函数：返回报表文件地址，尚未完成时返回 None"""
+
+_URL_KEYS = ('url', 'file_url', 'download_url', 'result_file', 'report_url', 'file')
+
+
+def _to_date(value: DateLike) -> datetime.date:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(value[:10])
+
+
+def split_date_range(start: DateLike, end: DateLike, days: int = 31) -> List[Tuple[datetime.date, datetime.date]]:
+    """
+    将日期范围拆分为不超过 ``days`` 天的连续区间（首尾日期均包含）
+
+    Args:
+        start: 开始日期
+        end: 结束日期
+        days: 每个区间的最大天数
+
+    Returns:
+        按时间顺序排列的 (开始日期, 结束日期)
+    """
+    start, end = _to_date(start), _to_date(end)
+    if end < start:
+        raise ValueError('end must not be earlier than start')
+    if days < 1:
+        raise ValueError('days must be positive')
+    ranges = []
+    while start <= end:
+        range_end = min(start + datetime.timedelta(days=days - 1), end)
+        ranges.append((start, range_end))
+        start = range_end + datetime.timedelta(days=1)
+    return ranges
+
+
+def extract_report_url(payload: Any) -> Optional[str]:
+    """
+    从回调内容中取出报表文件地址：优先常见字段名，其次任意 http(s) 地址
+
+    Args:
+        payload: 回调请求的 JSON 或表单数据
+    """
+    if isinstance(payload, str):
+        return payload if payload.startswith(('http://', 'https://')) else None
+    if isinstance(payload, dict):
+        for key in _URL_KEYS:
+            value = payload.get(key)
+            if isinstance(value, str) and value.startswith(('http://', 'https://')):
+                return value
+        values = list(payload.values())
+    elif isinstance(payload, list):
+        values = payload
+    else:
+        return None
+    for value in values:
+        url = extract_report_url(value)
+        if url:
+            return url
+    return None
+
+
+class CallbackReceiver:
+    """接收报表完成回调的本地 HTTP 服务"""
+
+    def __init__(self, public_url: Optional[str] = None, path: str = '/shopline/callbacks'):
+        """
+        Args:
+            public_url: SHOPLINE 访问本服务使用的地址（如反向代理地址），默认为本地监听地址
+            path: 回调路径前缀
+        """
+        self.public_url = public_url.rstrip('/') if public_url else None
+        self.path = '/' + path.strip('/')
+        self.app = web.Application()
+        self.app.router.add_route('*', self.path + '/{token}', self._handle)
+        self._futures: Dict[str, asyncio.Future] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self.local_url: Optional[str] = None
+
+    async def __aenter__(self) -> 'CallbackReceiver':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """
+        开始监听
+
+        Returns:
+            str: 本地监听地址
+        """
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        self.local_url = f'http://{bound_host}:{bound_port}'
+        return self.local_url
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        for future in self._futures.values():
+            if not future.done():
+                future.cancel()
+        self._futures.clear()
+
+    def register(self) -> Tuple[str, str]:
+        """
+        生成一次性的回调地址
+
+        Returns:
+            (令牌, 回调地址)
+        """
+        if self.local_url is None and self.public_url is None:
+            raise RuntimeError('CallbackReceiver is not started')
+        token = secrets.token_urlsafe(16)
+        self._futures[token] = asyncio.get_running_loop().create_future()
+        return token, f'{self.public_url or self.local_url}{self.path}/{token}'
+
+    async def wait(self, token: str) -> Any:
+        """等待令牌对应的回调，返回回调内容"""
+        try:
+            return await self._futures[token]
+        finally:
+            self._futures.pop(token, None)
+
+    def discard(self, token: str):
+        """丢弃令牌，之后到达的回调返回 404"""
+        future = self._futures.pop(token, None)
+        if future is not None and not future.done():
+            future.cancel()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        future = self._futures.get(request.match_info['token'])
+        if future is None:
+            return web.json_response({'error': 'unknown callback'}, status=404)
+        if request.content_type == 'application/json':
+            try:
+                payload = await request.json()
+            except ValueError:
+                # 声明为 JSON 但内容无法解析时按文本交给调用方，避免回调返回 500 而等待方一直等不到结果
+                payload = await request.text()
+        elif request.can_read_body:
+            payload = dict(await request.post()) or await request.text()
+        else:
+            payload = dict(request.query)
+        if not future.done():
+            future.set_result(payload)
+        return web.json_response({'ok': True})
+
+
+@dataclass
+class ReportRange:
+    """一个日期区间的报表"""
+    index: int
+    start: datetime.date
+    end: datetime.date
+    callback_url: Optional[str] = None
+    payload: Any = None
+    """回调内容"""
+    url: Optional[str] = None
+    """报表文件地址"""
+    path: Optional[str] = None
+    """下载后的临时文件"""
+    size: int = 0
+
+
+@dataclass
+class ReportResult:
+    """报表流程的结果"""
+    path: str
+    ranges: List[ReportRange] = field(default_factory=list)
+    size: int = 0
+    """合并后的文件字节数"""
+
+
+class ArchivedOrdersReport:
+    """冷区订单报表流程"""
+
+    def __init__(
+            self,
+            session: aiohttp.ClientSession,
+            receiver: Optional[CallbackReceiver] = None,
+            poller: Optional[Poller] = None,
+            chunk_days: int = 31,
+            concurrency: int = 4,
+            timeout: Optional[float] = 3600,
+            poll_interval: float = 30,
+            download_session: Optional[aiohttp.ClientSession] = None,
+            chunk_size: int = 64 * 1024
+    ):
+        """
+        Args:
+            session: 客户端会话
+            receiver: 回调接收服务，与 ``poller`` 至少提供一个
+            poller: 轮询函数，回调未到达时每隔 ``poll_interval`` 秒调用一次
+            chunk_days: 每个报表请求覆盖的天数
+            concurrency: 同时进行的报表请求数
+            timeout: 单个区间等待完成的最长时间（秒）
+            poll_interval: 轮询间隔（秒）
+            download_session: 下载报表文件使用的会话，默认使用不带授权头的新会话
+            chunk_size: 下载时每次读取的字节数
+        """
+        if receiver is None and poller is None:
+            raise ValueError('receiver or poller is required')
+        self.session = session
+        self.receiver = receiver
+        self.poller = poller
+        self.chunk_days = chunk_days
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.download_session = download_session
+        self.chunk_size = chunk_size
+
+    async def _request(self, report: ReportRange):
+        body = create_archived_orders_report.Body(
+            filters=create_archived_orders_report.FiltersSchema(
+                start_date=format_datetime(report.start),
+                end_date=format_datetime(datetime.datetime.combine(report.end, datetime.time.max)),
+            ),
+            callback_url=report.callback_url
+        )
+        await create_archived_orders_report.call(self.session, body=body)
+
+    async def _poll(self, report: ReportRange) -> str:
+        while True:
+            url = await self.poller(report)
+            if url:
+                return url
+            await asyncio.sleep(self.poll_interval)
+
+    async def _wait(self, report: ReportRange, token: Optional[str]) -> str:
+        waiters = []
+        if token is not None:
+            waiters.append(asyncio.ensure_future(self.receiver.wait(token)))
+        if self.poller is not None:
+            waiters.append(asyncio.ensure_future(self._poll(report)))
+        try:
+            done, _ = await asyncio.wait(waiters, timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise asyncio.TimeoutError(f'Archived orders report {report.start} ~ {report.end} timed out')
+            result = done.pop().result()
+        finally:
+            for waiter in waiters:
+                waiter.cancel()
+        if isinstance(result, str) and result.startswith(('http://', 'https://')):
+            return result
+        report.payload = result
+        url = extract_report_url(result)
+        if not url:
+            raise ValueError(f'No report URL in callback: {result!r}')
+        return url
+
+    async def _download(self, session: aiohttp.ClientSession, report: ReportRange, path: str):
+        report.path = f'{path}.part{report.index}'
+        async with session.get(report.url) as response:
+            response.raise_for_status()
+            with open(report.path, 'wb') as f:
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    f.write(chunk)
+                    report.size += len(chunk)
+
+    async def _run_range(self, session: aiohttp.ClientSession, report: ReportRange, path: str,
+                         semaphore: asyncio.Semaphore):
+        token = None
+        if self.receiver is not None:
+            token, report.callback_url = self.receiver.register()
+        try:
+            async with semaphore:
+                await self._request(report)
+            report.url = await self._wait(report, token)
+        finally:
+            if token is not None:
+                self.receiver.discard(token)
+        await self._download(session, report, path)
+
+    async def run(self, start: DateLike, end: DateLike, path: str) -> ReportResult:
+        """
+        生成并下载日期范围内的冷区订单报表
+
+        Args:
+            start: 开始日期
+            end: 结束日期（包含）
+            path: 合并后的输出文件
+
+        Returns:
+            ReportResult: 各区间的回调与文件信息
+        """
+        ranges = [ReportRange(i, range_start, range_end)
+                  for i, (range_start, range_end) in enumerate(split_date_range(start, end, self.chunk_days))]
+        owns_session = self.download_session is None
+        download_session = aiohttp.ClientSession() if owns_session else self.download_session
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+        # 信号量只限制同时提交的报表请求，等待回调与下载不占用名额
+        tasks = [asyncio.ensure_future(self._run_range(download_session, report, path, semaphore))
+                 for report in ranges]
+        try:
+            await asyncio.gather(*tasks)
+            size = merge_report_files([report.path for report in ranges], path)
+        except BaseException:
+            # 任一区间失败时先取消并等待其余区间结束，再关闭会话、删除临时文件
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+        finally:
+            if owns_session:
+                await download_session.close()
+            for report in ranges:
+                if report.path and os.path.exists(report.path):
+                    os.remove(report.path)
+        return ReportResult(path, ranges, size)
+
+
+def merge_report_files(paths: List[str], output: str, chunk_size: int = 1024 * 1024) -> int:
+    """
+    按顺序合并报表文件；CSV 文件只保留第一个文件的表头
+
+    Args:
+        paths: 按时间顺序排列的报表文件
+        output: 输出文件
+        chunk_size: 复制时每次读取的字节数
+
+    Returns:
+        输出文件的字节数
+    """
+    csv_output = output.lower().endswith('.csv')
+    size = 0
+    last = b'\n'
+    with open(output, 'wb') as out:
+        for i, path in enumerate(paths):
+            with open(path, 'rb') as f:
+                if csv_output and i > 0:
+                    f.readline()
+                # 上一个文件没有以换行结尾时补一个，避免两个文件的记录粘在同一行
+                first = True
+                while True:
+                    chunk = f.read(chunk_size)
+                    if not chunk:
+                        break
+                    if first and last != b'\n':
+                        out.write(b'\n')
+                        size += 1
+                    first = False
+                    out.write(chunk)
+                    size += len(chunk)
+                    last = chunk[-1:]
+    return size
@@ -0,0 +1,233 @@
+"""
+批量创建商品
+
+``BulkProductCreator`` 将商品流打包为若干批量操作（``CreateBulkOperationBody``），
+并发提交并通过 ``JobWatcher`` 跟踪任务，任务结束后按 ``operation_ref_id`` 将结果对应回每个商品。
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+
+import aiohttp
+
+from shopline_sdk.apis.bulk_operations import create_bulk_operation
+from shopline_sdk.exceptions import ShoplineAPIError
+from shopline_sdk.helper import async_iterate
+from shopline_sdk.jobs import JobWatcher
+from shopline_sdk.models.create_bulk_operation_body import CreateBulkOperationBody, DataItem
+from shopline_sdk.models.create_product_body import CreateProductBody
+
+ProductInput = Union[CreateProductBody, Dict[str, Any], Tuple[str, Union[CreateProductBody, Dict[str, Any]]]]
+
+
+@dataclass
+class BulkProductResult:
+    """单个商品的批量创建结果"""
+    operation_ref_id: str
+    success: bool
+    job_id: Optional[str] = None
+    product_id: Optional[str] = None
+    error: Optional[str] = None
+    record: Optional[Dict[str, Any]] = None
+    """结果文件中的原始记录"""
+    uncertain: bool = False
+    """结果未知：请求或任务跟踪中断、结果文件中缺少该商品，商品可能已经创建，需要核对后再重试"""
+
+
+def _describe_error(error: BaseException) -> str:
+    return str(error) or type(error).__name__
+
+
+def _record_result(operation_ref_id: str, job_id: Optional[str], record: Dict[str, Any]) -> BulkProductResult:
+    error = record.get('error') or record.get('errors') or record.get('message')
+    status = str(record.get('status') or '').lower()
+    success = not record.get('error') and not record.get('errors') and status not in ('failed', 'fail', 'error')
+    product = record.get('product') if isinstance(record.get('product'), dict) else {}
+    return BulkProductResult(
+        operation_ref_id=operation_ref_id,
+        success=success,
+        job_id=job_id,
+        product_id=record.get('product_id') or product.get('id') or (record.get('id') if success else None),
+        error=None if success else (error if isinstance(error, str) else json.dumps(error, ensure_ascii=False)),
+        record=record,
+    )
+
+
+class BulkProductCreator:
+    """
+    批量商品创建管道
+
+    用法::
+
+        creator = BulkProductCreator(session)
+        async for result in creator.run(products):
+            if not result.success:
+                print(result.operation_ref_id, result.error)
+    """
+
+    def __init__(
+            self,
+            session: aiohttp.ClientSession,
+            batch_size: int = 500,
+            max_batch_bytes: int = 4 * 1024 * 1024,
+            concurrency: int = 4,
+            **watcher_options
+    ):
+        """
+        Args:
+            session: 客户端会话
+            batch_size: 单个批量操作的最大商品数
+            max_batch_bytes: 单个批量操作请求体的最大字节数
+            concurrency: 同时执行的批量操作数
+            **watcher_options: 传给 ``JobWatcher`` 的参数
+        """
+        self.session = session
+        self.batch_size = batch_size
+        self.max_batch_bytes = max_batch_bytes
+        self.concurrency = concurrency
+        self.watcher_options = watcher_options
+
+    @staticmethod
+    def _normalize(index: int, item: ProductInput) -> DataItem:
+        if isinstance(item, tuple):
+            operation_ref_id, product = item
+        else:
+            operation_ref_id, product = str(index), item
+        if isinstance(product, CreateProductBody):
+            product = product.model_dump(exclude_none=True)
+        return DataItem(operation_ref_id=operation_ref_id, product=product)
+
+    async def _batches(
+            self,
+            products: Union[Iterable[ProductInput], AsyncIterable[ProductInput]]
+    ) -> AsyncIterator[List[DataItem]]:
+        """按数量与请求体大小打包，单批不超过 ``batch_size`` 与 ``max_batch_bytes``"""
+        batch: List[DataItem] = []
+        batch_bytes = 0
+        refs = set()
+
+        index = 0
+        async for product in async_iterate(products):
+            item = self._normalize(index, product)
+            index += 1
+            if item.operation_ref_id in refs:
+                # 结果按 operation_ref_id 对应回商品，重复的标识会使结果无法区分
+                raise ValueError(f'Duplicate operation_ref_id: {item.operation_ref_id}')
+            refs.add(item.operation_ref_id)
+            item_bytes = len(json.dumps(item.model_dump(), ensure_ascii=False).encode('utf-8')) + 1
+            if batch and (len(batch) >= self.batch_size or batch_bytes + item_bytes > self.max_batch_bytes):
+                yield batch
+                batch, batch_bytes = [], 0
+            batch.append(item)
+            batch_bytes += item_bytes
+        if batch:
+            yield batch
+
+    async def _process(self, watcher: JobWatcher, batch: List[DataItem]) -> List[BulkProductResult]:
+        refs = [item.operation_ref_id for item in batch]
+        try:
+            job = await create_bulk_operation.call(self.session, body=CreateBulkOperationBody(data=batch))
+        except (ShoplineAPIError, aiohttp.ClientConnectorError) as e:
+            return [BulkProductResult(ref, False, error=_describe_error(e)) for ref in refs]
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # 请求可能已送达服务端，无法确认批量操作是否已创建
+            return [BulkProductResult(ref, False, error=_describe_error(e), uncertain=True) for ref in refs]
+
+        try:
+            handle = watcher.watch(job)
+        except ValueError as e:
+            # 响应中没有任务 ID，无法跟踪批量操作是否已执行
+            return [BulkProductResult(ref, False, error=_describe_error(e), uncertain=True) for ref in refs]
+        pending = dict.fromkeys(refs)
+        results: List[BulkProductResult] = []
+        try:
+            await handle.wait(raise_on_failure=False)
+            if handle.result_file:
+                async for record in handle.iter_result_records():
+                    ref = str(record.get('operation_ref_id', ''))
+                    if ref in pending:
+                        del pending[ref]
+                        results.append(_record_result(ref, handle.job_id, record))
+        except (ShoplineAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # 任务已提交，跟踪或下载结果失败时剩余商品的结果未知
+            results.extend(
+                BulkProductResult(ref, False, job_id=handle.job_id, error=_describe_error(e), uncertain=True)
+                for ref in pending
+            )
+            return results
+
+        # 结果文件中缺失的商品：任务失败时视为失败，否则结果未知
+        job_failed = handle.status == 'failed'
+        for ref in pending:
+            if job_failed:
+                results.append(BulkProductResult(ref, False, job_id=handle.job_id, error=f'Job {handle.job_id} failed'))
+            else:
+                results.append(BulkProductResult(
+                    ref, False, job_id=handle.job_id, uncertain=True,
+                    error=f'Missing from the result file of job {handle.job_id}'
+                ))
+        return results
+
+    async def run(
+            self,
+            products: Union[Iterable[ProductInput], AsyncIterable[ProductInput]]
+    ) -> AsyncIterator[BulkProductResult]:
+        """
+        流式创建商品，按批量操作完成的顺序产出每个商品的结果
+
+        Args:
+            products: 商品流，元素可以是 ``CreateProductBody``、dict，
+                或 ``(operation_ref_id, 商品)`` 元组；未指定时以序号作为 ``operation_ref_id``，
+                ``operation_ref_id`` 重复时抛出 ``ValueError``
+
+        Returns:
+            产出 ``BulkProductResult`` 的异步迭代器
+        """
+        # 有界队列：消费端较慢时已完成的批次占用并发名额，不再提交新的批次
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+        slots = asyncio.Semaphore(self.concurrency)
+        done = object()
+
+        async with JobWatcher(self.session, **self.watcher_options) as watcher:
+            async def _run_batch(batch: List[DataItem]):
+                try:
+                    await results.put(await self._process(watcher, batch))
+                except Exception as e:
+                    await results.put(e)
+                finally:
+                    slots.release()
+
+            async def _produce():
+                tasks = []
+                try:
+                    async for batch in self._batches(products):
+                        await slots.acquire()
+                        tasks.append(asyncio.create_task(_run_batch(batch)))
+                    await asyncio.gather(*tasks)
+                except asyncio.CancelledError:
+                    # 消费端已退出，不再写入队列
+                    for task in tasks:
+                        task.cancel()
+                    raise
+                except Exception as e:
+                    for task in tasks:
+                        task.cancel()
+                    await results.put(e)
+                else:
+                    await results.put(done)
+
+            producer = asyncio.create_task(_produce())
+            try:
+                while True:
+                    item = await results.get()
+                    if item is done:
+                        break
+                    if isinstance(item, BaseException):
+                        raise item
+                    for result in item:
+                        yield result
+            finally:
+                if not producer.done():
+                    producer.cancel()
@@ -0,0 +1,255 @@
+"""
+购物车会话
+
+购物车商品的新增、修改、删除与购物车商品 metafield / app_metafield 各自是独立的批量接口。
+``CartSession`` 在本地缓冲一次用户操作内的全部变更，合并冗余操作后以最少的批量请求提交：
+
+- 尚未提交的新增商品被删除时两者一并丢弃，被修改时直接改写新增内容
+- 同一商品的多次修改合并为一次，商品被删除时丢弃其修改与 metafield 变更
+- 同一 metafield 先创建后删除时两者一并丢弃，先删除后创建合并为一次更新，多次写入只保留最后一次
+- 提交时新增、修改、删除与 metafield 请求全部并发执行，通常只需一轮往返
+
+用法::
+
+    async with CartSession(session, cart_id) as cart:
+        item = cart.add_item(product_id, quantity=1, variation_id=variation_id)
+        cart.patch_item(item, quantity=2)
+        cart.delete_item(old_item_id)
+        cart.set_metafield(existing_item_id, 'storefront', 'gift_wrap', True)
+    print(cart.last_result.request_count)
+
+退出 ``async with`` 时自动提交，有请求失败时抛出 ``CartFlushError``，``error.result`` 中包含失败的操作。
+"""
+
+import asyncio
+import itertools
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Union
+
+import aiohttp
+from typing_extensions import Literal
+
+from shopline_sdk.apis.carts import bulk_add_items_to_cart, bulk_delete_cart_items, bulk_patch_cart_items
+from shopline_sdk.exceptions import ShoplineAPIError
+from shopline_sdk.metafields import MetafieldMutation, MetafieldWriteResult, MetafieldWriter
+
+CartOperation = Literal['add', 'patch', 'delete']
+
+_BULK_APIS = {
+    'add': bulk_add_items_to_cart,
+    'patch': bulk_patch_cart_items,
+    'delete': bulk_delete_cart_items,
+}
+
+_counter = itertools.count()
+
+
+class CartFlushError(Exception):
+    """退出 ``CartSession`` 时的自动提交有请求失败"""
+
+    def __init__(self, result: 'CartFlushResult'):
+        self.result = result
+        failed = [*result.errors, *(['metafield'] if result.metafields.failed else [])]
+        super().__init__(f"Cart flush failed: {', '.join(failed)}")
+
+
+@dataclass(frozen=True)
+class PendingCartItem:
+    """尚未提交的新增商品，可传给 ``patch_item`` / ``delete_item``"""
+    key: int
+    product_id: str
+
+
+CartItemRef = Union[str, PendingCartItem]
+"""已有购物车商品 ID 或尚未提交的新增商品"""
+
+
+@dataclass
+class CartFlushResult:
+    """一次提交的结果"""
+    responses: Dict[CartOperation, Any] = field(default_factory=dict)
+    """各商品操作的响应"""
+    errors: Dict[CartOperation, Exception] = field(default_factory=dict)
+    """请求失败的商品操作及对应异常（API 错误或连接错误）"""
+    failed: Dict[CartOperation, Any] = field(default_factory=dict)
+    """请求失败的商品操作及其请求体，可直接传给对应的批量接口重试"""
+    metafields: MetafieldWriteResult = field(default_factory=MetafieldWriteResult)
+    request_count: int = 0
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and not self.metafields.failed
+
+
+class CartSession:
+    """购物车变更缓冲区"""
+
+    def __init__(self, session: aiohttp.ClientSession, cart_id: str, metafield_chunk_size: int = 50,
+                 metafield_concurrency: int = 6):
+        """
+        Args:
+            session: 客户端会话
+            cart_id: 购物车 ID
+            metafield_chunk_size: 单次 metafield 批量请求的最大条目数
+            metafield_concurrency: metafield 批量请求的最大并发数
+        """
+        self.session = session
+        self.cart_id = cart_id
+        self.metafield_chunk_size = metafield_chunk_size
+        self.metafield_concurrency = metafield_concurrency
+        self.last_result: Optional[CartFlushResult] = None
+        """最近一次 ``flush`` 的结果"""
+        self._adds: Dict[int, Dict[str, Any]] = {}
+        self._patches: Dict[str, Dict[str, Any]] = {}
+        self._deletes: Dict[str, None] = {}
+        self._metafields = self._new_writer()
+
+    def _new_writer(self) -> MetafieldWriter:
+        # 同一 metafield 的多次写入由 MetafieldWriter 按调用顺序合并
+        return MetafieldWriter(chunk_size=self.metafield_chunk_size, concurrency=self.metafield_concurrency)
+
+    async def __aenter__(self) -> 'CartSession':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            result = await self.flush()
+            if not result.ok:
+                raise CartFlushError(result)
+
+    def __len__(self) -> int:
+        return len(self._adds) + len(self._patches) + len(self._deletes) + len(self._metafields)
+
+    def add_item(self, product_id: str, quantity: float = 1, variation_id: Optional[str] = None,
+                 **kwargs) -> PendingCartItem:
+        """
+        新增商品
+
+        Args:
+            product_id: 商品 ID
+            quantity: 数量
+            variation_id: 商品规格 ID
+            kwargs: ``bulk_add_items_to_cart.ItemsItemSchema`` 的其他字段，例如 ``type``、``item_price``
+
+        Returns:
+            PendingCartItem: 新增商品的句柄，提交前可用于修改或撤销
+        """
+        item = PendingCartItem(next(_counter), product_id)
+        self._adds[item.key] = {'product_id': product_id, 'quantity': quantity, 'variation_id': variation_id,
+                                **kwargs}
+        return item
+
+    def patch_item(self, item: CartItemRef, quantity: Optional[float] = None, variation_id: Optional[str] = None):
+        """
+        修改商品数量或规格，未提交的新增商品直接改写新增内容
+
+        Args:
+            item: 购物车商品 ID 或 ``add_item`` 返回的句柄
+            quantity: 新数量
+            variation_id: 新规格 ID
+        """
+        changes = {k: v for k, v in (('quantity', quantity), ('variation_id', variation_id)) if v is not None}
+        if isinstance(item, PendingCartItem):
+            if item.key not in self._adds:
+                raise KeyError(f'Pending cart item {item.key} was already deleted or flushed')
+            self._adds[item.key].update(changes)
+            return
+        if item in self._deletes:
+            raise KeyError(f'Cart item {item} is pending deletion')
+        self._patches.setdefault(item, {}).update(changes)
+
+    def delete_item(self, item: CartItemRef):
+        """
+        删除商品；未提交的新增商品直接撤销，已有商品的修改与 metafield 变更一并丢弃
+
+        Args:
+            item: 购物车商品 ID 或 ``add_item`` 返回的句柄
+        """
+        if isinstance(item, PendingCartItem):
+            self._adds.pop(item.key, None)
+            return
+        self._patches.pop(item, None)
+        self._deletes[item] = None
+        self._metafields.discard('cart_item', self.cart_id, item)
+
+    def _write_metafield(self, mutation: MetafieldMutation):
+        if mutation.resource_id in self._deletes:
+            raise KeyError(f'Cart item {mutation.resource_id} is pending deletion')
+        self._metafields.add(mutation)
+
+    def create_metafield(self, item_id: str, namespace: Optional[str], key: str, value: Any,
+                         field_type: Optional[str] = None, app: bool = False):
+        """为已有购物车商品创建 metafield，``app`` 为 True 时写入 app_metafield"""
+        self._write_metafield(MetafieldMutation(
+            'cart_item', self.cart_id, 'create', key, namespace, value, field_type, resource_id=item_id, app=app
+        ))
+
+    def set_metafield(self, item_id: str, namespace: Optional[str], key: str, value: Any,
+                      field_type: Optional[str] = None, id: Optional[str] = None, app: bool = False):
+        """更新已有购物车商品的 metafield，``id`` 为 Metafield Value ID"""
+        self._write_metafield(MetafieldMutation(
+            'cart_item', self.cart_id, 'update', key, namespace, value, field_type, id, item_id, app
+        ))
+
+    def delete_metafield(self, item_id: str, namespace: Optional[str], key: str, id: Optional[str] = None,
+                         app: bool = False):
+        """删除已有购物车商品的 metafield"""
+        self._write_metafield(MetafieldMutation(
+            'cart_item', self.cart_id, 'delete', key, namespace, id=id, resource_id=item_id, app=app
+        ))
+
+    def discard(self):
+        """丢弃全部未提交的变更"""
+        self._adds.clear()
+        self._patches.clear()
+        self._deletes.clear()
+        self._metafields = self._new_writer()
+
+    async def flush(self) -> CartFlushResult:
+        """
+        提交缓冲的变更，每类商品操作一个请求，metafield 按操作与 app 分组，全部并发执行
+
+        请求失败不会抛出异常：失败的商品操作记录在 ``errors`` 与 ``failed``，失败的 metafield 写入记录在
+        ``metafields.failed``。
+
+        Returns:
+            CartFlushResult: 提交结果
+        """
+        adds, patches, deletes, metafields = self._adds, self._patches, self._deletes, self._metafields
+        self._adds, self._patches, self._deletes, self._metafields = {}, {}, {}, self._new_writer()
+        result = CartFlushResult()
+        bodies: Dict[CartOperation, Any] = {}
+        if adds:
+            bodies['add'] = bulk_add_items_to_cart.Body(items=[
+                bulk_add_items_to_cart.ItemsItemSchema(**{k: v for k, v in item.items() if v is not None})
+                for item in adds.values()
+            ])
+        patch_items = [
+            bulk_patch_cart_items.ItemsItemSchema(id=item_id, **changes)
+            for item_id, changes in patches.items() if changes
+        ]
+        if patch_items:
+            bodies['patch'] = bulk_patch_cart_items.Body(items=patch_items)
+        if deletes:
+            bodies['delete'] = bulk_delete_cart_items.Body(items=[
+                bulk_delete_cart_items.ItemsItemSchema(id=item_id) for item_id in deletes
+            ])
+
+        async def _request(operation: CartOperation, body: Any):
+            result.request_count += 1
+            try:
+                result.responses[operation] = await _BULK_APIS[operation].call(self.session, self.cart_id, body)
+            except (ShoplineAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                result.errors[operation] = e
+                result.failed[operation] = body
+
+        async def _metafields():
+            result.metafields = await metafields.flush(self.session)
+            result.request_count += result.metafields.request_count
+
+        tasks = [_request(operation, body) for operation, body in bodies.items()]
+        if len(metafields):
+            tasks.append(_metafields())
+        await asyncio.gather(*tasks)
+        self.last_result = result
+        return result
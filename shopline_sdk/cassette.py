@@ -0,0 +1,310 @@
+"""
+HTTP 录制与回放
+
+``Cassette`` 在传输层录制真实的请求与响应，保存为 gzip 压缩的 JSON Lines 文件：录制通过请求追踪钩子
+读取每个响应，回放通过 ``CassetteConnector`` 将录制的响应作为 HTTP 报文交给 aiohttp 解析，不访问网络。
+两种模式下会话都是普通的 ``aiohttp.ClientSession``，返回的都是真实的 ``ClientResponse``。
+回放按请求的方法、路径、查询参数与请求体依次返回录制的响应，可全速回放或按录制时的耗时回放。
+录制时不保存任何请求头，并将访问令牌等敏感值替换为 ``<REDACTED>``。
+
+用法::
+
+    client = ShoplineAPIClient(token)
+    with Cassette('orders.cassette.gz', mode='auto') as cassette:
+        async with cassette.new_session(client) as session:
+            await get_orders.call(session)
+"""
+
+import asyncio
+import base64
+import gzip
+import json
+import os
+import time
+from http import HTTPStatus
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+import aiohttp
+from aiohttp.base_protocol import BaseProtocol
+from aiohttp.client_proto import ResponseHandler
+from typing_extensions import Literal
+from yarl import URL
+
+CASSETTE_VERSION = 2
+REDACTED = '<REDACTED>'
+
+# 录制的响应头，响应体保存的是解压后的内容，因此不记录 Content-Encoding
+_RECORDED_HEADERS = ('Content-Type', 'Retry-After', 'Link')
+# 默认脱敏的查询参数与请求体字段
+DEFAULT_REDACT_KEYS = ('access_token', 'token', 'secret', 'client_secret', 'password')
+
+CassetteMode = Literal['record', 'replay', 'auto']
+
+
+class CassetteError(Exception):
+    """回放时找不到匹配的录制"""
+
+
+def _canonical(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+def _request_body(body: Any) -> bytes:
+    """``ClientRequest.body`` 的字节内容，生成的接口模块只发送 JSON / 字节请求体"""
+    if isinstance(body, (bytes, bytearray)):
+        return bytes(body)
+    value = getattr(body, '_value', None)
+    return bytes(value) if isinstance(value, (bytes, bytearray)) else b''
+
+
+def _decode_body(body: bytes) -> Any:
+    if not body:
+        return None
+    text = body.decode('utf-8', 'replace')
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def _http_response(status: int, headers: Dict[str, str], body: bytes) -> bytes:
+    """将录制的响应还原为 HTTP/1.1 报文"""
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ''
+    lines = [f'HTTP/1.1 {status} {reason}', *(f'{name}: {value}' for name, value in headers.items()),
+             f'Content-Length: {len(body)}', 'Connection: close']
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8') + body
+
+
+def _rewind(response: aiohttp.ClientResponse, body: bytes):
+    """录制时已读完响应体，为 ``content`` 换上内容相同的新流，调用方仍可流式读取"""
+    loop = asyncio.get_running_loop()
+    content = aiohttp.StreamReader(BaseProtocol(loop), max(len(body), 2 ** 16), loop=loop)
+    content.feed_data(body)
+    content.feed_eof()
+    response.content = content
+
+
+class Cassette:
+    """录制与回放的交互记录"""
+
+    def __init__(
+            self,
+            path: str,
+            mode: CassetteMode = 'auto',
+            realtime: bool = False,
+            redact_values: Iterable[str] = (),
+            redact_keys: Iterable[str] = DEFAULT_REDACT_KEYS
+    ):
+        """
+        Args:
+            path: 录制文件路径（gzip 压缩的 JSON Lines）
+            mode: ``record`` 录制，``replay`` 回放，``auto`` 文件存在时回放否则录制
+            realtime: 回放时是否按录制的耗时等待
+            redact_values: 需要在录制内容中替换的敏感字符串，``new_session`` 会自动加入访问令牌
+            redact_keys: 需要脱敏的查询参数与请求体字段名
+        """
+        if mode == 'auto':
+            mode = 'replay' if os.path.exists(path) else 'record'
+        self.path = path
+        self.mode = mode
+        self.realtime = realtime
+        self.redact_values = {value for value in redact_values if value}
+        self.redact_keys = set(redact_keys)
+        self.interactions: List[dict] = []
+        self._cursors: Dict[str, int] = {}
+        self._index: Dict[str, List[dict]] = {}
+        self._base_path = ''
+        self._dirty = False
+        if mode == 'replay':
+            self.load()
+
+    def __enter__(self) -> 'Cassette':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.mode == 'record' and self._dirty:
+            self.save()
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == 'record'
+
+    def load(self):
+        """读取录制文件"""
+        self.interactions = []
+        with gzip.open(self.path, 'rt', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            if header.get('version') != CASSETTE_VERSION:
+                raise CassetteError(f"Unsupported cassette version: {header.get('version')}")
+            for line in f:
+                if line.strip():
+                    self.interactions.append(json.loads(line))
+        self._index = {}
+        for interaction in self.interactions:
+            self._index.setdefault(interaction['key'], []).append(interaction)
+        self._cursors = {}
+
+    def save(self):
+        """写入录制文件"""
+        with gzip.open(self.path, 'wt', encoding='utf-8') as f:
+            f.write(_canonical({'version': CASSETTE_VERSION}) + '\n')
+            for interaction in self.interactions:
+                f.write(_canonical(interaction) + '\n')
+        self._dirty = False
+
+    def new_session(self, client, headers: Optional[dict] = None, **kwargs) -> aiohttp.ClientSession:
+        """
+        为客户端创建录制 / 回放会话
+
+        录制时加入 ``trace_config``，回放时使用 ``CassetteConnector``，会话本身仍由 ``client.new_session`` 创建。
+
+        Args:
+            client: ``ShoplineAPIClient``
+            headers: 额外的请求头
+            **kwargs: 其他 ``aiohttp.ClientSession`` 参数
+        """
+        self.redact_values.add(client.access_token)
+        self._base_path = URL(client.base_url).path.rstrip('/')
+        if self.recording:
+            kwargs['trace_configs'] = [*kwargs.get('trace_configs', ()), self.trace_config()]
+        else:
+            kwargs['connector'] = CassetteConnector(self)
+        return client.new_session(headers=headers, **kwargs)
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """录制用的请求追踪配置：收集请求体，收到响应后读取完整响应体并写入录制"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            ctx.started = time.perf_counter()
+            ctx.chunks = []
+
+        async def on_request_chunk_sent(session, ctx, params):
+            ctx.chunks.append(params.chunk)
+
+        async def on_request_end(session, ctx, params):
+            response = params.response
+            body = await response.read()
+            key = self.request_key(params.method, params.url, b''.join(ctx.chunks))
+            self.record(key, response.status, response.headers, body, time.perf_counter() - ctx.started)
+            _rewind(response, body)
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_chunk_sent.append(on_request_chunk_sent)
+        trace_config.on_request_end.append(on_request_end)
+        return trace_config
+
+    def _redact(self, value: Any) -> Any:
+        if isinstance(value, dict):
+            return {
+                key: REDACTED if key in self.redact_keys else self._redact(item)
+                for key, item in value.items()
+            }
+        if isinstance(value, list):
+            return [self._redact(item) for item in value]
+        if isinstance(value, str):
+            for secret in self.redact_values:
+                value = value.replace(secret, REDACTED)
+        return value
+
+    def _redact_bytes(self, body: bytes) -> bytes:
+        for secret in self.redact_values:
+            body = body.replace(secret.encode('utf-8'), REDACTED.encode('utf-8'))
+        return body
+
+    def request_key(self, method: str, url: Any, body: bytes = b'') -> str:
+        """请求的匹配键，由方法、相对 ``base_url`` 的路径、查询参数与请求体组成（均已脱敏）"""
+        url = URL(str(url))
+        path = url.path
+        if self._base_path and path.startswith(self._base_path):
+            path = path[len(self._base_path):]
+        query = sorted([key, REDACTED if key in self.redact_keys else value] for key, value in url.query.items())
+        return _canonical(self._redact([method.upper(), '/' + path.strip('/'), query, _decode_body(body)]))
+
+    def record(self, key: str, status: int, headers: Mapping[str, str], body: bytes, duration: float):
+        body = self._redact_bytes(body)
+        try:
+            encoded = {'body': body.decode('utf-8')}
+        except UnicodeDecodeError:
+            encoded = {'body_base64': base64.b64encode(body).decode('ascii')}
+        self.interactions.append({
+            'key': key,
+            'status': status,
+            'headers': {name: headers[name] for name in _RECORDED_HEADERS if name in headers},
+            'duration': round(duration, 6),
+            **encoded,
+        })
+        self._dirty = True
+
+    def play(self, key: str) -> Tuple[dict, bytes]:
+        """按录制顺序返回匹配的交互，重复请求超出录制次数时返回最后一次"""
+        recorded = self._index.get(key)
+        if not recorded:
+            raise CassetteError(f'No recorded interaction for {key}')
+        cursor = self._cursors.get(key, 0)
+        self._cursors[key] = cursor + 1
+        interaction = recorded[min(cursor, len(recorded) - 1)]
+        if 'body_base64' in interaction:
+            body = base64.b64decode(interaction['body_base64'])
+        else:
+            body = interaction.get('body', '').encode('utf-8')
+        return interaction, body
+
+
+class _ReplayTransport(asyncio.Transport):
+    """回放连接的传输层，丢弃写入的请求"""
+
+    def __init__(self):
+        super().__init__()
+        self._closing = False
+
+    def write(self, data):
+        pass
+
+    def writelines(self, list_of_data):
+        pass
+
+    def can_write_eof(self) -> bool:
+        return False
+
+    def get_write_buffer_size(self) -> int:
+        return 0
+
+    def is_closing(self) -> bool:
+        return self._closing
+
+    def close(self):
+        self._closing = True
+
+    def abort(self):
+        self._closing = True
+
+
+class CassetteConnector(aiohttp.BaseConnector):
+    """回放录制响应的连接器，每个请求使用一个不访问网络的连接"""
+
+    def __init__(self, cassette: Cassette, **kwargs):
+        """
+        Args:
+            cassette: 回放的录制
+            **kwargs: 其他 ``aiohttp.BaseConnector`` 参数
+        """
+        # 每个连接只承载一个录制的响应，不能复用
+        kwargs['force_close'] = True
+        super().__init__(**kwargs)
+        self.cassette = cassette
+
+    async def _create_connection(self, req: aiohttp.ClientRequest, traces: list,
+                                 timeout: aiohttp.ClientTimeout) -> ResponseHandler:
+        key = self.cassette.request_key(req.method, req.url, _request_body(req.body))
+        interaction, body = self.cassette.play(key)
+        if self.cassette.realtime and interaction.get('duration'):
+            await asyncio.sleep(interaction['duration'])
+        protocol = ResponseHandler(self._loop)
+        protocol.connection_made(_ReplayTransport())
+        # 发送请求前收到的数据会先缓存，设置响应解析器后再解析
+        protocol.data_received(_http_response(interaction['status'], interaction['headers'], body))
+        return protocol
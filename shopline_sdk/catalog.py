@@ -0,0 +1,461 @@
+"""
+商品目录快照
+
+``Catalog`` 在内存中保存商品，并维护商品 ID、规格 ID、SKU、条码的哈希索引与分类成员集合，
+可由商品列表流式拉取建立，并通过 ``product/*`` Webhook 增量更新。
+
+``Catalog.save`` 将目录写入快照文件，``CatalogSnapshot.open`` 以 mmap 方式打开，索引为文件中的
+开放寻址哈希表，打开时不需要解析整个文件，查询只读取命中的记录。POS、订单导入等进程启动时可以
+直接打开快照查询，需要增量更新时再 ``to_catalog``。
+
+用法::
+
+    catalog = Catalog()
+    async with client.new_session() as session:
+        await catalog.load(session)
+    catalog.save('catalog.snapshot')
+
+    with CatalogSnapshot.open('catalog.snapshot') as snapshot:
+        item = snapshot.find_sku('SKU-001')
+        product = snapshot.get_product(item.product_id)
+"""
+
+import abc
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
+
+from typing_extensions import Literal
+
+from shopline_sdk.apis.products import get_products
+from shopline_sdk.models.product import Product
+from shopline_sdk.streaming import stream_items
+
+IndexName = Literal['variation', 'sku', 'barcode']
+
+INDEX_NAMES: Tuple[IndexName, ...] = ('variation', 'sku', 'barcode')
+
+_REMOVE_TOPICS = ('product/remove', 'product/delete', 'product/removed', 'product/deleted')
+
+SNAPSHOT_MAGIC = b'SLCATLG2'
+
+_SECTIONS = ('product_offsets', 'products', 'product_id_offsets', 'product_ids', 'item_offsets', 'items',
+             'category_offsets', 'category_names', 'category_member_offsets', 'category_members',
+             *(f'{name}_{part}' for name in ('product', 'category', *INDEX_NAMES) for part in ('index', 'postings')))
+# 文件头：魔数、商品数、索引项数，以及各区段的 (偏移, 长度)；整数均为小端序
+_HEADER = struct.Struct('<8sQQ' + 'QQ' * len(_SECTIONS))
+_PAIR = struct.Struct('<QQ')
+_UINT64 = struct.Struct('<Q')
+
+
+@dataclass(frozen=True)
+class CatalogItem:
+    """可售单位：商品本身或其一个规格"""
+    product_id: str
+    variation_id: Optional[str] = None
+    sku: Optional[str] = None
+    barcode: Optional[str] = None
+
+    def key(self, index: IndexName) -> Optional[str]:
+        return self.variation_id if index == 'variation' else getattr(self, index)
+
+
+def _items(product: Product) -> List[CatalogItem]:
+    items = [CatalogItem(product.id, None, product.sku or None, product.barcode or None)]
+    for variation in product.variations or ():
+        if variation.id:
+            items.append(CatalogItem(product.id, variation.id, variation.sku or None, variation.barcode or None))
+    return items
+
+
+def _hash(key: str) -> int:
+    # 需要跨进程稳定，不能使用内置 hash；最低位置 1 保证非 0（0 表示空槽位）
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), 'little') | 1
+
+
+class _CatalogLookups(abc.ABC):
+    @abc.abstractmethod
+    def find_all(self, index: IndexName, key: str) -> List[CatalogItem]:
+        """按索引查询全部匹配的索引项"""
+
+    def find_variation(self, variation_id: str) -> Optional[CatalogItem]:
+        entries = self.find_all('variation', variation_id)
+        return entries[0] if entries else None
+
+    def find_sku(self, sku: str) -> Optional[CatalogItem]:
+        """按 SKU 查询，多个商品共用 SKU 时返回第一个，全部匹配见 ``find_all``"""
+        entries = self.find_all('sku', sku)
+        return entries[0] if entries else None
+
+    def find_barcode(self, barcode: str) -> Optional[CatalogItem]:
+        entries = self.find_all('barcode', barcode)
+        return entries[0] if entries else None
+
+
+class Catalog(_CatalogLookups):
+    """可增量更新的商品目录"""
+
+    def __init__(self, per_page: int = 50):
+        """
+        Args:
+            per_page: 拉取商品时的每页数量
+        """
+        self.per_page = per_page
+        self._products: Dict[str, Product] = {}
+        self._items: Dict[str, List[CatalogItem]] = {}
+        self._indexes: Dict[IndexName, Dict[str, List[CatalogItem]]] = {name: {} for name in INDEX_NAMES}
+        self._categories: Dict[str, Set[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def __contains__(self, product_id: str) -> bool:
+        return product_id in self._products
+
+    def __iter__(self) -> Iterator[Product]:
+        return iter(self._products.values())
+
+    def add_product(self, product: Any):
+        """
+        加入或替换商品，并更新全部索引
+
+        Args:
+            product: ``Product`` 模型或其原始 JSON
+        """
+        if not isinstance(product, Product):
+            product = Product.model_validate(product)
+        if not product.id:
+            return
+        if product.id in self._products:
+            self.remove_product(product.id)
+        items = _items(product)
+        self._products[product.id] = product
+        self._items[product.id] = items
+        for item in items:
+            for name in INDEX_NAMES:
+                key = item.key(name)
+                if key:
+                    self._indexes[name].setdefault(key, []).append(item)
+        for category_id in product.category_ids or ():
+            self._categories.setdefault(category_id, set()).add(product.id)
+
+    def remove_product(self, product_id: Optional[str]):
+        """移除商品及其全部索引项，商品不存在时忽略"""
+        product = self._products.pop(product_id, None)
+        if product is None:
+            return
+        for item in self._items.pop(product_id):
+            for name in INDEX_NAMES:
+                key = item.key(name)
+                if not key:
+                    continue
+                entries = [entry for entry in self._indexes[name].get(key, ()) if entry.product_id != product_id]
+                if entries:
+                    self._indexes[name][key] = entries
+                else:
+                    self._indexes[name].pop(key, None)
+        for category_id in product.category_ids or ():
+            members = self._categories.get(category_id)
+            if members is not None:
+                members.discard(product_id)
+                if not members:
+                    del self._categories[category_id]
+
+    def apply_webhook(self, topic: str, payload: Dict[str, Any]):
+        """
+        应用商品 Webhook 增量
+
+        Args:
+            topic: Webhook 主题，例如 ``product/create``、``product/update``、``product/delete``
+            payload: Webhook 请求体，商品位于 ``resource`` 字段或请求体本身；
+                只包含部分字段时合并到已有商品，未提供的字段保持不变
+        """
+        product = payload.get('resource', payload) if isinstance(payload, dict) else payload
+        if not topic.startswith('product/'):
+            return
+        if isinstance(product, Product):
+            product = product.model_dump(by_alias=True, exclude_unset=True)
+        if topic in _REMOVE_TOPICS or product.get('status') == 'removed':
+            self.remove_product(product.get('id'))
+            return
+        existing = self._products.get(product.get('id'))
+        if existing is not None:
+            product = {**existing.model_dump(by_alias=True, exclude_unset=True), **product}
+        self.add_product(product)
+
+    async def load(self, session: Any, params: Optional[get_products.Params] = None) -> int:
+        """
+        流式拉取全部商品并建立索引，每页边接收边解析
+
+        Args:
+            session: 客户端会话
+            params: 查询参数，默认 ``get_products.Params(per_page=per_page)``
+
+        Returns:
+            拉取的商品数
+        """
+        params = params or get_products.Params(per_page=self.per_page)
+        page, count = params.page or 1, 0
+        while True:
+            stream = stream_items(session, get_products, params.model_copy(update={'page': page}), model=Product)
+            received = 0
+            async for product in stream:
+                self.add_product(product)
+                received += 1
+            count += received
+            total_pages = (stream.pagination or {}).get('total_pages')
+            if not received or total_pages is None or page >= total_pages:
+                return count
+            page += 1
+
+    def get_product(self, product_id: str) -> Optional[Product]:
+        return self._products.get(product_id)
+
+    def find_all(self, index: IndexName, key: str) -> List[CatalogItem]:
+        """
+        按索引查询全部匹配项
+
+        Args:
+            index: ``variation``、``sku`` 或 ``barcode``
+            key: 规格 ID、SKU 或条码
+        """
+        return list(self._indexes[index].get(key, ()))
+
+    def products_in_category(self, category_id: str) -> FrozenSet[str]:
+        """返回分类下的商品 ID"""
+        return frozenset(self._categories.get(category_id, ()))
+
+    def save(self, path: str):
+        """
+        写入快照文件，先写临时文件再原子替换
+
+        Args:
+            path: 快照文件路径
+        """
+        product_ids = list(self._products)
+        positions = {product_id: i for i, product_id in enumerate(product_ids)}
+        products = [self._products[product_id].model_dump_json(exclude_none=True, by_alias=True).encode()
+                    for product_id in product_ids]
+        items = [item for product_id in product_ids for item in self._items[product_id]]
+        item_blobs = [json.dumps([item.product_id, item.variation_id, item.sku, item.barcode],
+                                 separators=(',', ':'), ensure_ascii=False).encode() for item in items]
+
+        product_id_blobs = [product_id.encode() for product_id in product_ids]
+        category_ids = list(self._categories)
+        category_blobs = [category_id.encode() for category_id in category_ids]
+        # 分类成员保存为商品序号，查询时只读取商品 ID，无需解析商品
+        member_blobs = [_pack(sorted(positions[product_id] for product_id in self._categories[category_id]))
+                        for category_id in category_ids]
+
+        sections = {
+            'product_offsets': _offsets(products),
+            'products': b''.join(products),
+            'product_id_offsets': _offsets(product_id_blobs),
+            'product_ids': b''.join(product_id_blobs),
+            'item_offsets': _offsets(item_blobs),
+            'items': b''.join(item_blobs),
+            'category_offsets': _offsets(category_blobs),
+            'category_names': b''.join(category_blobs),
+            'category_member_offsets': _offsets(member_blobs),
+            'category_members': b''.join(member_blobs),
+        }
+        sections['product_index'], sections['product_postings'] = _hash_table(
+            (product_id, i) for i, product_id in enumerate(product_ids)
+        )
+        sections['category_index'], sections['category_postings'] = _hash_table(
+            (category_id, i) for i, category_id in enumerate(category_ids)
+        )
+        for name in INDEX_NAMES:
+            sections[f'{name}_index'], sections[f'{name}_postings'] = _hash_table(
+                (item.key(name), i) for i, item in enumerate(items) if item.key(name)
+            )
+
+        layout: List[int] = []
+        offset = _HEADER.size
+        for name in _SECTIONS:
+            layout += [offset, len(sections[name])]
+            offset += len(sections[name])
+
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(_HEADER.pack(SNAPSHOT_MAGIC, len(product_ids), len(items), *layout))
+            for name in _SECTIONS:
+                f.write(sections[name])
+        os.replace(temp_path, path)
+
+
+def _pack(values: List[int]) -> bytes:
+    packed = array('Q', values)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _offsets(blobs: List[bytes]) -> bytes:
+    offsets, position = [0], 0
+    for blob in blobs:
+        position += len(blob)
+        offsets.append(position)
+    return _pack(offsets)
+
+
+def _hash_table(entries: Iterator[Tuple[str, int]]) -> Tuple[bytes, bytes]:
+    """
+    开放寻址（线性探测）哈希表
+
+    每个不同的键占一个槽位 (键哈希, 倒排表偏移 + 1)，倒排表中依次为记录数与记录序号，
+    共用 SKU、条码的记录不会拉长探测链。
+    """
+    groups: Dict[str, List[int]] = {}
+    for key, position in entries:
+        groups.setdefault(key, []).append(position)
+    capacity = 8
+    while capacity < len(groups) * 2:
+        capacity *= 2
+    slots = [0] * (capacity * 2)
+    postings: List[int] = []
+    mask = capacity - 1
+    for key, positions in groups.items():
+        key_hash = _hash(key)
+        slot = key_hash & mask
+        while slots[slot * 2]:
+            slot = (slot + 1) & mask
+        slots[slot * 2] = key_hash
+        slots[slot * 2 + 1] = len(postings) + 1
+        postings.append(len(positions))
+        postings.extend(positions)
+    return _pack(slots), _pack(postings)
+
+
+class CatalogSnapshot(_CatalogLookups):
+    """以 mmap 打开的只读目录快照，查询接口与 ``Catalog`` 相同"""
+
+    def __init__(self, buffer: Any, file: Any = None):
+        """
+        Args:
+            buffer: 快照内容（``mmap`` 或 ``bytes``）
+            file: 需要随快照关闭的文件对象
+        """
+        magic, self.product_count, self.item_count, *layout = _HEADER.unpack_from(buffer, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError('Not a catalog snapshot')
+        self._buffer = buffer
+        self._file = file
+        self._sections = {name: (layout[i * 2], layout[i * 2 + 1]) for i, name in enumerate(_SECTIONS)}
+        self._products: Dict[int, Product] = {}
+        self._categories: Dict[str, FrozenSet[str]] = {}
+
+    @classmethod
+    def open(cls, path: str) -> 'CatalogSnapshot':
+        """
+        以 mmap 方式打开快照文件，多个进程打开同一文件时共享操作系统页缓存
+
+        Args:
+            path: ``Catalog.save`` 写入的快照文件
+        """
+        file = open(path, 'rb')
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            file.close()
+            raise
+        return cls(buffer, file)
+
+    def close(self):
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        if self._file is not None:
+            self._file.close()
+
+    def __enter__(self) -> 'CatalogSnapshot':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.product_count
+
+    def __contains__(self, product_id: str) -> bool:
+        return self.get_product(product_id) is not None
+
+    def __iter__(self) -> Iterator[Product]:
+        for position in range(self.product_count):
+            yield self._product(position)
+
+    def _blob(self, section: str, offsets: str, position: int) -> bytes:
+        offsets_start, _ = self._sections[offsets]
+        start, end = _PAIR.unpack_from(self._buffer, offsets_start + position * _UINT64.size)
+        data_start, _ = self._sections[section]
+        return self._buffer[data_start + start:data_start + end]
+
+    def _product(self, position: int) -> Product:
+        # 商品按需解析并缓存，未访问的商品不占用 Python 对象内存
+        product = self._products.get(position)
+        if product is None:
+            product = self._products[position] = Product.model_validate_json(
+                self._blob('products', 'product_offsets', position)
+            )
+        return product
+
+    def _product_id(self, position: int) -> str:
+        return self._blob('product_ids', 'product_id_offsets', position).decode()
+
+    def _item(self, position: int) -> CatalogItem:
+        return CatalogItem(*json.loads(self._blob('items', 'item_offsets', position)))
+
+    def _probe(self, index: str, key: str) -> Iterator[int]:
+        # 线性探测，哈希相同的槽位还需由调用方比对实际键值以排除冲突
+        start, length = self._sections[f'{index}_index']
+        postings, _ = self._sections[f'{index}_postings']
+        mask = length // _PAIR.size - 1
+        key_hash = _hash(key)
+        slot = key_hash & mask
+        while True:
+            slot_hash, posting = _PAIR.unpack_from(self._buffer, start + slot * _PAIR.size)
+            if not slot_hash:
+                return
+            if slot_hash == key_hash:
+                offset = postings + (posting - 1) * _UINT64.size
+                count, = _UINT64.unpack_from(self._buffer, offset)
+                yield from struct.unpack_from(f'<{count}Q', self._buffer, offset + _UINT64.size)
+            slot = (slot + 1) & mask
+
+    def get_product(self, product_id: str) -> Optional[Product]:
+        for position in self._probe('product', product_id):
+            if self._product_id(position) == product_id:
+                return self._product(position)
+        return None
+
+    def find_all(self, index: IndexName, key: str) -> List[CatalogItem]:
+        items = (self._item(position) for position in self._probe(index, key))
+        return [item for item in items if item.key(index) == key]
+
+    def products_in_category(self, category_id: str) -> FrozenSet[str]:
+        # 只读取所查询分类的成员，结果按分类缓存
+        members = self._categories.get(category_id)
+        if members is not None:
+            return members
+        members = frozenset()
+        for position in self._probe('category', category_id):
+            if self._blob('category_names', 'category_offsets', position).decode() == category_id:
+                positions = array('Q', self._blob('category_members', 'category_member_offsets', position))
+                if sys.byteorder == 'big':
+                    positions.byteswap()
+                members = frozenset(self._product_id(product) for product in positions)
+                break
+        self._categories[category_id] = members
+        return members
+
+    def to_catalog(self, per_page: int = 50) -> Catalog:
+        """读取全部商品，转换为可增量更新的 ``Catalog``"""
+        catalog = Catalog(per_page)
+        for product in self:
+            catalog.add_product(product)
+        return catalog
@@ -1,15 +1,28 @@
-from typing import Optional
+from typing import List, Optional, Type
 
 import aiohttp
 
+from .instrumentation import InstrumentedResponse, RequestHook, create_trace_config
+
 
 class ShoplineAPIClient:
-    def __init__(self, access_token, base_url='https://open.shopline.io/v1'):
+    def __init__(self, access_token, base_url='https://open.shopline.io/v1', hooks: Optional[List[RequestHook]] = None):
         self.base_url = base_url.rstrip('/') + '/'
         self.access_token = access_token
+        self.hooks: List[RequestHook] = list(hooks or [])
+
+    def add_hook(self, hook: RequestHook):
+        """注册请求钩子（指标、链路追踪等），对之后创建的会话生效"""
+        self.hooks.append(hook)
 
-    def new_session(self, headers: Optional[dict] = None, **kwargs):
+    def new_session(self, headers: Optional[dict] = None, session_class: Type[aiohttp.ClientSession] = aiohttp.ClientSession,
+                    **kwargs):
         authed_headers = {'Authorization': f'Bearer {self.access_token}'}
         if headers:
             authed_headers.update(headers)
-        return aiohttp.ClientSession(base_url=self.base_url, headers=authed_headers, **kwargs)
+        if self.hooks:
+            kwargs['trace_configs'] = [
+                *kwargs.get('trace_configs', ()), create_trace_config(self.hooks, self.base_url)
+            ]
+            kwargs.setdefault('response_class', InstrumentedResponse)
+        return session_class(base_url=self.base_url, headers=authed_headers, **kwargs)
@@ -0,0 +1,228 @@
+"""
+列表响应的列式转换
+
+直接从分页接口的原始 JSON（``fetch_json`` / ``iterate_raw_pages`` 的结果）按列构建 Arrow 表，
+不实例化 pydantic 模型。列与类型来自模型字段定义（见 ``shopline_sdk.export.RecordFlattener``）：
+
+- ``Money`` 展开为 ``<字段>.cents``（int64）与 ``<字段>.currency_iso``（字典编码字符串）
+- 以 ``_at`` 结尾的时间字符串转换为 UTC 时间戳列
+- 其他标量按模型类型转换，嵌套结构序列化为 JSON 字符串
+
+需要安装 ``pyarrow``::
+
+    pip install shopline-sdk-python[arrow]
+
+用法::
+
+    converter = ColumnarConverter(Order, ORDER_RULES, columns=['id', 'created_at', 'total.cents',
+                                                               'total.currency_iso'])
+    async for page in iterate_raw_pages(session, search_orders, search_orders.Params(per_page=50)):
+        tables.append(converter.to_arrow(page['items']))
+        items.append(converter.explode(page['items'], 'subtotal_items'))
+    revenue = money_sum(pa.concat_tables(items), 'price', multiply_by='quantity')
+"""
+
+import json
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+
+from shopline_sdk.export import Column, FlattenRule, RecordFlattener
+from shopline_sdk.helper import parse_datetime
+
+
+def _require_arrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            'Columnar conversion requires pyarrow, install it with: pip install shopline-sdk-python[arrow]'
+        ) from e
+    return pyarrow
+
+
+def _is_timestamp(column: Column) -> bool:
+    return column.type == 'string' and not column.encode_json and column.path[-1].endswith('_at')
+
+
+def _is_currency(column: Column) -> bool:
+    return column.type == 'string' and column.path[-1] in ('currency_iso', 'currency')
+
+
+class ColumnarConverter:
+    """将同一模型的原始 JSON 记录列表转换为 Arrow 表"""
+
+    def __init__(
+            self,
+            model: Type[BaseModel],
+            rules: Optional[Dict[str, FlattenRule]] = None,
+            columns: Optional[Sequence[str]] = None,
+            max_depth: int = 2,
+            _flattener: Optional[RecordFlattener] = None
+    ):
+        """
+        Args:
+            model: 记录对应的 pydantic 模型，例如 ``Order``、``OrderItem``
+            rules: 展平规则，与 ``RecordFlattener`` 相同；``explode`` 的字段可通过 ``explode`` 转换
+            columns: 只转换这些列（展平后的列名，如 ``total.cents``），None 表示全部
+            max_depth: 未配置规则的嵌套模型展开的最大深度
+        """
+        self.pa = _require_arrow()
+        self.flattener = _flattener or RecordFlattener(model, rules, max_depth=max_depth)
+        available = {column.name: column for column in self.flattener.columns if column.path}
+        if columns is None:
+            self.columns = list(available.values())
+        else:
+            missing = [name for name in columns if name not in available]
+            if missing:
+                raise KeyError(f'Unknown columns for {model.__name__}: {missing}')
+            self.columns = [available[name] for name in columns]
+        self.schema = self.pa.schema([(column.name, self._type(column)) for column in self.columns])
+        self._children: Dict[str, ColumnarConverter] = {}
+
+    def _type(self, column: Column) -> Any:
+        pa = self.pa
+        if _is_timestamp(column):
+            return pa.timestamp('ms', tz='UTC')
+        if _is_currency(column):
+            return pa.dictionary(pa.int32(), pa.string())
+        return {'string': pa.string(), 'int64': pa.int64(), 'float64': pa.float64(), 'bool': pa.bool_()}[column.type]
+
+    def _values(self, items: List[Dict[str, Any]], path: Tuple[str, ...],
+                cache: Dict[Tuple[str, ...], List[Any]]) -> List[Any]:
+        # 逐层取值并缓存公共前缀，``total.cents`` 与 ``total.currency_iso`` 只遍历一次 ``total``
+        if path in cache:
+            return cache[path]
+        if len(path) == 1:
+            key = path[0]
+            values = [item.get(key) if item.__class__ is dict else None for item in items]
+        else:
+            key = path[-1]
+            values = [
+                value.get(key) if value.__class__ is dict else None
+                for value in self._values(items, path[:-1], cache)
+            ]
+        cache[path] = values
+        return values
+
+    def _array(self, column: Column, values: List[Any], type_: Any) -> Any:
+        pa = self.pa
+        if column.encode_json:
+            values = [json.dumps(value, ensure_ascii=False, separators=(',', ':')) if value is not None else None
+                      for value in values]
+            return pa.array(values, type=pa.string())
+        if _is_timestamp(column):
+            strings = pa.array(values, type=pa.string())
+            try:
+                return strings.cast(type_)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                return pa.array([parse_datetime(value) for value in values], type=type_)
+        if _is_currency(column):
+            return pa.array(values, type=pa.string()).dictionary_encode()
+        try:
+            return pa.array(values, type=type_)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # 原始 JSON 与模型类型不一致时（如数字以字符串返回），先按字符串转换再强制转换类型
+            return pa.array([None if value is None else str(value) for value in values],
+                            type=pa.string()).cast(type_, safe=False)
+
+    def to_arrow(self, items: Iterable[Dict[str, Any]]) -> Any:
+        """
+        转换为 ``pyarrow.Table``
+
+        Args:
+            items: 原始 JSON 记录，例如一页响应的 ``items``
+        """
+        items = items if isinstance(items, list) else list(items)
+        cache: Dict[Tuple[str, ...], List[Any]] = {}
+        arrays = [
+            self._array(column, self._values(items, column.path, cache), field.type)
+            for column, field in zip(self.columns, self.schema)
+        ]
+        return self.pa.Table.from_arrays(arrays, schema=self.schema)
+
+    def to_numpy(self, items: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        转换为 NumPy 数组字典；含空值的整数列会转换为 float64（空值为 NaN），字典编码列转换为字符串对象数组
+        """
+        table = self.to_arrow(items)
+        arrays = {}
+        for name, column in zip(table.column_names, table.columns):
+            if self.pa.types.is_dictionary(column.type):
+                column = column.cast(self.pa.string())
+            arrays[name] = column.to_numpy(zero_copy_only=False)
+        return arrays
+
+    def child(self, name: str, columns: Optional[Sequence[str]] = None) -> 'ColumnarConverter':
+        """返回 ``explode`` 规则字段（如 ``subtotal_items``）的子表转换器"""
+        key = name if columns is None else f'{name}:{",".join(columns)}'
+        if key not in self._children:
+            if name not in self.flattener.children:
+                raise KeyError(f"{name} is not an exploded field, add rules={{'{name}': 'explode'}}")
+            _, flattener = self.flattener.children[name]
+            self._children[key] = ColumnarConverter(flattener.model, columns=columns, _flattener=flattener)
+        return self._children[key]
+
+    def explode(self, items: Iterable[Dict[str, Any]], name: str, columns: Optional[Sequence[str]] = None) -> Any:
+        """
+        将记录中的列表字段拆分为子表，例如订单的 ``subtotal_items``
+
+        子表首两列为父记录 ID（``<父模型>_id``）与在列表中的位置 ``position``。
+
+        Args:
+            items: 原始 JSON 记录
+            name: 子表字段名
+            columns: 子表只转换这些列
+
+        Returns:
+            子表 ``pyarrow.Table``
+        """
+        pa = self.pa
+        import numpy as np
+
+        child = self.child(name, columns)
+        path, _ = self.flattener.children[name]
+        items = items if isinstance(items, list) else list(items)
+        lists = self._values(items, path, {})
+        lengths = np.fromiter((len(value) if value.__class__ is list else 0 for value in lists),
+                              dtype=np.int64, count=len(lists))
+        parents = np.repeat(np.arange(len(items)), lengths)
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1])) if len(lengths) else lengths
+        positions = np.arange(int(lengths.sum())) - np.repeat(offsets, lengths)
+
+        table = child.to_arrow(list(chain.from_iterable(value for value in lists if value.__class__ is list)))
+        parent_ids = pa.array([item.get('id') for item in items], type=pa.string()).take(pa.array(parents))
+        table = table.add_column(0, 'position', pa.array(positions, type=pa.int64()))
+        return table.add_column(0, child.flattener.parent_key, parent_ids)
+
+
+def money_sum(table: Any, money: str, by: Sequence[str] = (), multiply_by: Optional[str] = None) -> Dict[Tuple, int]:
+    """
+    按币种（与其他分组列）汇总金额，金额以分为单位精确累加
+
+    Args:
+        table: ``ColumnarConverter`` 生成的表
+        money: 金额字段名，例如 ``total``，对应 ``total.cents`` 与 ``total.currency_iso`` 两列
+        by: 额外的分组列
+        multiply_by: 累加前与金额相乘的列，例如订单项的 ``quantity``
+
+    Returns:
+        (分组值..., 币种) -> 金额（分）
+    """
+    pa = _require_arrow()
+    import pyarrow.compute as pc
+
+    cents = table.column(f'{money}.cents')
+    if multiply_by is not None:
+        cents = pc.multiply(cents, pc.cast(table.column(multiply_by), pa.int64()))
+    currency = table.column(f'{money}.currency_iso')
+    if pa.types.is_dictionary(currency.type):
+        currency = currency.cast(pa.string())
+    keys = [*by, '__currency']
+    grouped = pa.table({
+        **{name: table.column(name) for name in by}, '__currency': currency, '__cents': cents
+    }).group_by(keys).aggregate([('__cents', 'sum')])
+    columns = [grouped.column(name).to_pylist() for name in keys]
+    totals = grouped.column('__cents_sum').to_pylist()
+    return {tuple(values): total for *values, total in zip(*columns, totals)}
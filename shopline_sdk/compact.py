@@ -0,0 +1,202 @@
+"""
+紧凑只读记录
+
+生成的 pydantic 模型为每个实例保留 ``__dict__``、字段设置记录以及全部可选字段的嵌套模型，
+在内存中保存上百万条 ``Customer`` / ``OrderItem`` 时开销很大。``compact_model`` 按同一模型生成
+只包含所需字段的 ``__slots__`` 类，实例不可修改，可与完整模型互相转换。
+
+- 字段可以是嵌套路径，例如 ``total.cents``，属性名为 ``total_cents``
+- 嵌套模型字段保存为原始 JSON（字典 / 列表），转换回完整模型时再校验
+- 取值为枚举（``Literal``）的字符串字段会被 ``sys.intern``，相同取值共享同一对象
+
+用法::
+
+    CompactCustomer = compact_model(Customer, ['id', 'email', 'mobile_phone', 'membership_tier.id'])
+    customers = [CompactCustomer.from_dict(item) for item in page['items']]
+    customer = customers[0].to_model()
+"""
+
+import sys
+import typing
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Sequence, Tuple, Type
+
+from pydantic import BaseModel
+from typing_extensions import Literal
+
+
+class CompactRecord:
+    """``compact_model`` 生成的紧凑记录基类"""
+
+    __slots__ = ()
+
+    model: typing.ClassVar[Type[BaseModel]]
+    """对应的完整模型"""
+    fields: typing.ClassVar[Tuple[str, ...]]
+    """字段路径，例如 ``('id', 'total.cents')``"""
+    _attrs: typing.ClassVar[Tuple[str, ...]]
+    _paths: typing.ClassVar[Tuple[Tuple[str, ...], ...]]
+    _attr_paths: typing.ClassVar[Tuple[Tuple[str, ...], ...]]
+    _interned: typing.ClassVar[Tuple[bool, ...]]
+
+    def __init__(self, *values: Any):
+        if len(values) != len(self._attrs):
+            raise TypeError(f'{type(self).__name__} takes {len(self._attrs)} values, got {len(values)}')
+        for attr, value, interned in zip(self._attrs, values, self._interned):
+            if interned and value.__class__ is str:
+                value = sys.intern(value)
+            object.__setattr__(self, attr, value)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f'{type(self).__name__} is read-only')
+
+    def _values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, attr) for attr in self._attrs)
+
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._values() == other._values()
+
+    def __hash__(self) -> int:
+        return hash(tuple(
+            value if value is None or isinstance(value, (str, int, float, bool)) else repr(value)
+            for value in self._values()
+        ))
+
+    def __repr__(self) -> str:
+        values = ', '.join(f'{attr}={getattr(self, attr)!r}' for attr in self._attrs)
+        return f'{type(self).__name__}({values})'
+
+    def __reduce__(self):
+        # 动态生成的类无法按名称导入，按 (模型, 字段) 重新生成
+        return _restore, (self.model, self.fields, self._values())
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'CompactRecord':
+        """从原始 JSON 创建，不经过模型校验"""
+        values = []
+        for path in cls._paths:
+            value: Any = data
+            for key in path:
+                value = value.get(key) if value.__class__ is dict else None
+            values.append(value)
+        return cls(*values)
+
+    @classmethod
+    def from_model(cls, instance: BaseModel) -> 'CompactRecord':
+        """从完整模型实例创建，嵌套模型字段转换为字典"""
+        values = []
+        for path in cls._attr_paths:
+            value: Any = instance
+            for name in path:
+                value = getattr(value, name, None) if value is not None else None
+            if isinstance(value, BaseModel):
+                value = value.model_dump(by_alias=True, exclude_none=True)
+            elif isinstance(value, list):
+                value = [item.model_dump(by_alias=True, exclude_none=True) if isinstance(item, BaseModel) else item
+                         for item in value]
+            values.append(value)
+        return cls(*values)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为按字段别名嵌套的字典，值为 None 的字段不输出"""
+        data: Dict[str, Any] = {}
+        for path, attr in zip(self._paths, self._attrs):
+            value = getattr(self, attr)
+            if value is None:
+                continue
+            target = data
+            for key in path[:-1]:
+                target = target.setdefault(key, {})
+            target[path[-1]] = value
+        return data
+
+    def to_model(self) -> BaseModel:
+        """转换为完整模型实例"""
+        return self.model.model_validate(self.to_dict())
+
+
+def _resolve(annotation: Any) -> Any:
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        return args[0] if len(args) == 1 else typing.Union[tuple(args)]
+    return annotation
+
+
+def _is_enum_like(annotation: Any) -> bool:
+    if typing.get_origin(annotation) is Literal:
+        return True
+    if typing.get_origin(annotation) is typing.Union:
+        return any(typing.get_origin(arg) is Literal for arg in typing.get_args(annotation))
+    return False
+
+
+def _lookup(model: Type[BaseModel], path: str) -> Tuple[Tuple[str, ...], Tuple[str, ...], Any]:
+    """将字段路径解析为 (别名路径, 属性路径, 注解)，字段名与别名均可使用"""
+    aliases, names = [], []
+    annotation: Any = model
+    for part in path.split('.'):
+        if not (isinstance(annotation, type) and issubclass(annotation, BaseModel)):
+            raise KeyError(f'{path}: {".".join(names)} is not a model field')
+        for name, field_info in annotation.model_fields.items():
+            if part in (name, field_info.alias):
+                aliases.append(field_info.alias or name)
+                names.append(name)
+                annotation = _resolve(field_info.annotation)
+                break
+        else:
+            raise KeyError(f'{annotation.__name__} has no field {part}')
+    return tuple(aliases), tuple(names), annotation
+
+
+@lru_cache(maxsize=None)
+def _compact_model(model: Type[BaseModel], fields: Tuple[str, ...]) -> Type[CompactRecord]:
+    paths, attr_paths, attrs, interned = [], [], [], []
+    for field in fields:
+        alias_path, name_path, annotation = _lookup(model, field)
+        attr = '_'.join(name_path)
+        if attr in attrs:
+            raise ValueError(f'Duplicate field {field}')
+        paths.append(alias_path)
+        attr_paths.append(name_path)
+        attrs.append(attr)
+        interned.append(_is_enum_like(annotation))
+
+    return type(f'Compact{model.__name__}', (CompactRecord,), {
+        '__slots__': tuple(attrs),
+        '__module__': __name__,
+        'model': model,
+        'fields': fields,
+        '_attrs': tuple(attrs),
+        '_paths': tuple(paths),
+        '_attr_paths': tuple(attr_paths),
+        '_interned': tuple(interned),
+    })
+
+
+def compact_model(model: Type[BaseModel], fields: Sequence[str]) -> Type[CompactRecord]:
+    """
+    生成只包含指定字段的紧凑只读记录类，相同参数返回同一个类
+
+    Args:
+        model: 完整模型，例如 ``Customer``
+        fields: 字段路径，例如 ``['id', 'email', 'total.cents']``
+
+    Returns:
+        ``CompactRecord`` 子类
+    """
+    return _compact_model(model, tuple(fields))
+
+
+def _restore(model: Type[BaseModel], fields: Tuple[str, ...], values: Tuple[Any, ...]) -> CompactRecord:
+    return compact_model(model, fields)(*values)
+
+
+def compact_all(record_class: Type[CompactRecord], items: Sequence[Dict[str, Any]]) -> List[CompactRecord]:
+    """将一页原始 JSON 记录批量转换为紧凑记录"""
+    from_dict: Callable[[Dict[str, Any]], CompactRecord] = record_class.from_dict
+    return [from_dict(item) for item in items]
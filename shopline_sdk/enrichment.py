@@ -0,0 +1,228 @@
+"""
+订单信息补全
+
+完整的订单记录需要依次调用 ``get_order``、``get_order_transaction_by_order_ids``、
+``order_deliveries.get_order_delivery``、``order_metafields``、``order_app_metafields`` 与
+``get_order_action_logs``。``OrderEnricher`` 将相互独立的请求并发执行：
+
+- 交易记录按批次以 ``orderIds[]`` 一次查询，再按订单号关联到各订单
+- 每个订单的 metafield、app_metafield、操作记录与订单本身同时请求，配送单在取得订单后立即请求
+- 全部请求共享一个并发上限；上一批订单尚未完成时下一批已经开始
+
+单个订单的补全耗时约为各请求中最慢的一条链（订单 + 配送单），而不是全部请求之和。
+
+用法::
+
+    enricher = OrderEnricher(parts=('delivery', 'metafields', 'transactions'))
+    async with client.new_session() as session:
+        async for record in enricher.stream(session, order_ids):
+            print(record.order.order_number, record.delivery.status, record.errors)
+"""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Dict, Iterable, List, Optional, Sequence, Tuple, \
+    TypeVar, Union
+
+import aiohttp
+from typing_extensions import Literal
+
+from shopline_sdk.apis.order_app_metafields import get_app_metafields_attached_to_specific_order
+from shopline_sdk.apis.order_deliveries import get_order_delivery
+from shopline_sdk.apis.order_metafields import get_metafields_attached_to_specific_order
+from shopline_sdk.apis.orders import get_order, get_order_action_logs, get_order_transaction_by_order_ids
+from shopline_sdk.exceptions import ShoplineAPIError
+from shopline_sdk.helper import async_iterate
+from shopline_sdk.models.app_metafield_value import AppMetafieldValue
+from shopline_sdk.models.metafield_value import MetafieldValue
+from shopline_sdk.models.order import Order
+from shopline_sdk.models.order_action_log import OrderActionLog
+from shopline_sdk.models.order_delivery import OrderDelivery
+from shopline_sdk.models.order_transaction import OrderTransaction
+
+T = TypeVar('T')
+
+Part = Literal['transactions', 'delivery', 'metafields', 'app_metafields', 'action_logs']
+
+PARTS: Tuple[Part, ...] = ('transactions', 'delivery', 'metafields', 'app_metafields', 'action_logs')
+
+OrderInput = Union[str, Order, Dict[str, Any]]
+"""订单 ID、``Order`` 模型或订单原始 JSON"""
+
+
+@dataclass
+class EnrichedOrder:
+    """补全后的订单"""
+    order_id: str
+    order: Optional[Order] = None
+    transactions: Optional[List[OrderTransaction]] = None
+    delivery: Optional[OrderDelivery] = None
+    metafields: Optional[List[MetafieldValue]] = None
+    app_metafields: Optional[List[AppMetafieldValue]] = None
+    action_logs: Optional[List[OrderActionLog]] = None
+    errors: Dict[str, Exception] = field(default_factory=dict)
+    """请求失败的部分（``order`` 或 ``Part``）及对应异常（API 错误、连接错误或超时）"""
+
+    @property
+    def complete(self) -> bool:
+        return not self.errors
+
+
+class OrderEnricher:
+    """订单补全流水线"""
+
+    def __init__(
+            self,
+            parts: Sequence[Part] = PARTS,
+            concurrency: int = 16,
+            batch_size: int = 50,
+            refresh: bool = False,
+            order_params: Optional[get_order.Params] = None
+    ):
+        """
+        Args:
+            parts: 需要补全的部分
+            concurrency: 同时进行的请求数上限，同一实例的多个 ``stream`` 共享
+            batch_size: 每次 ``orderIds[]`` 查询交易记录的订单数
+            refresh: 输入为订单模型或 JSON 时是否仍重新请求 ``get_order``
+            order_params: ``get_order`` 的查询参数，例如 ``include_fields``
+        """
+        unknown = set(parts) - set(PARTS)
+        if unknown:
+            raise ValueError(f'Unknown parts: {sorted(unknown)}')
+        self.parts = tuple(parts)
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.refresh = refresh
+        self.order_params = order_params
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def _call(self, aw: Awaitable[T]) -> T:
+        async with self._semaphore:
+            return await aw
+
+    async def _transactions(self, session: aiohttp.ClientSession, order_ids: List[str]) -> List[OrderTransaction]:
+        params = get_order_transaction_by_order_ids.Params(**{'orderIds[]': order_ids})
+        response = await self._call(get_order_transaction_by_order_ids.call(session, params=params))
+        return response.items or []
+
+    async def _part(self, record: EnrichedOrder, part: str, aw: Awaitable[T]) -> Optional[T]:
+        try:
+            return await aw
+        except (ShoplineAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            record.errors[part] = e
+            return None
+
+    async def _order_and_delivery(self, session: aiohttp.ClientSession, record: EnrichedOrder, fetch: bool):
+        if fetch:
+            record.order = await self._part(
+                record, 'order', self._call(get_order.call(session, record.order_id, params=self.order_params))
+            )
+        if 'delivery' in self.parts and record.order is not None:
+            delivery_id = record.order.order_delivery.id if record.order.order_delivery else None
+            if delivery_id:
+                record.delivery = await self._part(
+                    record, 'delivery', self._call(get_order_delivery.call(session, delivery_id))
+                )
+
+    async def _enrich(self, session: aiohttp.ClientSession, item: Union[str, Order],
+                      transactions: Optional['asyncio.Task[List[OrderTransaction]]']) -> EnrichedOrder:
+        if isinstance(item, str):
+            record, fetch = EnrichedOrder(item), True
+        else:
+            record, fetch = EnrichedOrder(item.id, item), self.refresh
+        order_id = record.order_id
+
+        async def _metafields():
+            response = await self._call(get_metafields_attached_to_specific_order.call(session, order_id))
+            record.metafields = response.items or []
+
+        async def _app_metafields():
+            response = await self._call(get_app_metafields_attached_to_specific_order.call(session, order_id))
+            record.app_metafields = response.items or []
+
+        async def _action_logs():
+            response = await self._call(get_order_action_logs.call(session, order_id))
+            record.action_logs = response.items or []
+
+        tasks = [self._order_and_delivery(session, record, fetch)]
+        for part, fetch_part in (('metafields', _metafields), ('app_metafields', _app_metafields),
+                                 ('action_logs', _action_logs)):
+            if part in self.parts:
+                tasks.append(self._part(record, part, fetch_part()))
+        await asyncio.gather(*tasks)
+
+        if transactions is not None and record.order is not None:
+            # 交易记录按订单号关联
+            items = await self._part(record, 'transactions', asyncio.shield(transactions))
+            if items is not None:
+                number = record.order.order_number
+                record.transactions = [item for item in items if number in (item.order_number or ())]
+        return record
+
+    def _start_batch(self, session: aiohttp.ClientSession,
+                     batch: List[Union[str, Order]]) -> List['asyncio.Task[EnrichedOrder]']:
+        transactions = None
+        if 'transactions' in self.parts:
+            order_ids = [item if isinstance(item, str) else item.id for item in batch]
+            transactions = asyncio.ensure_future(self._transactions(session, order_ids))
+            # 批次内订单全部失败时没有人等待该任务，取出异常避免未处理警告
+            transactions.add_done_callback(lambda task: task.cancelled() or task.exception())
+        return [asyncio.ensure_future(self._enrich(session, item, transactions)) for item in batch]
+
+    async def stream(
+            self,
+            session: aiohttp.ClientSession,
+            orders: Union[Iterable[OrderInput], AsyncIterable[OrderInput]]
+    ) -> AsyncIterator[EnrichedOrder]:
+        """
+        按输入顺序逐条产出补全后的订单，缺少订单 ID 的输入在发出请求前抛出 ``ValueError``
+
+        Args:
+            session: 客户端会话
+            orders: 订单 ID、``Order`` 模型或订单 JSON，可以是异步迭代器（如 ``QueryPlan.execute``）
+        """
+        pending: deque = deque()
+        batch: List[Union[str, Order]] = []
+        try:
+            async for item in async_iterate(orders):
+                # 在加入批次前校验，避免无效输入在批量查询交易记录时才失败
+                batch.append(_normalize(item))
+                if len(batch) >= self.batch_size:
+                    pending.extend(self._start_batch(session, batch))
+                    batch = []
+                # 最多保留两批在途，先完成的前一批依次产出
+                while len(pending) > self.batch_size * 2 or (pending and pending[0].done()):
+                    yield await pending.popleft()
+            if batch:
+                pending.extend(self._start_batch(session, batch))
+            while pending:
+                yield await pending.popleft()
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def enrich(self, session: aiohttp.ClientSession, order: OrderInput) -> EnrichedOrder:
+        """补全单个订单"""
+        async for record in self.stream(session, [order]):
+            return record
+
+    async def enrich_many(self, session: aiohttp.ClientSession,
+                          orders: Iterable[OrderInput]) -> List[EnrichedOrder]:
+        """补全多个订单，按输入顺序返回"""
+        return [record async for record in self.stream(session, orders)]
+
+
+def _normalize(item: OrderInput) -> Union[str, Order]:
+    """将输入转换为订单 ID 或 ``Order`` 模型，缺少订单 ID 时抛出 ``ValueError``"""
+    if isinstance(item, str):
+        order_id = item
+    else:
+        if not isinstance(item, Order):
+            item = Order.model_validate(item)
+        order_id = item.id
+    if not order_id or not isinstance(order_id, str):
+        raise ValueError(f'Order input without an id: {item!r}')
+    return item
+
@@ -44,3 +44,22 @@ class ShoplineAPIError(Exception):
             f"ShoplineAPIError(code='{self.code}', message='{self.message}', "
             f"status_code={self.status_code}, extra={self.extra})"
         )
+
+
+class ShoplineJobError(ShoplineAPIError):
+    """Shopline 批量操作任务失败异常"""
+
+    def __init__(self, job: BaseModel, message: str = None):
+        """
+        初始化批量操作任务失败异常
+
+        Args:
+            job: 失败的任务模型实例
+            message: 错误消息
+        """
+        self.job = job
+        super().__init__(
+            code='job_failed',
+            message=message or f"Job {getattr(job, 'id', None)} {getattr(job, 'status', None)}",
+            status_code=200,
+        )
@@ -0,0 +1,411 @@
+"""
+分页资源流式导出
+
+逐页拉取原始 JSON（不实例化 pydantic 模型），按模型字段定义展平后立即写入 NDJSON 或 Parquet，
+下一页的请求与当前页的写入并行，内存中最多保留两页数据，与店铺数据量无关。
+
+展平规则（按字段路径配置，如 ``order_delivery``、``subtotal_items``）：
+
+- ``flatten``: 嵌套模型展开为 ``父字段.子字段`` 列
+- ``money``: ``Money`` 展开为 ``父字段.cents`` 与 ``父字段.currency_iso`` 两列
+- ``json``: 序列化为 JSON 字符串列
+- ``explode``: 模型列表拆分为子表，每行带有 ``<父表>_id`` 与 ``position`` 列
+- ``drop``: 不导出
+
+未配置的字段按类型处理：``Money`` 为 ``money``，其他嵌套模型在 ``max_depth`` 内为 ``flatten``，
+列表与字典为 ``json``。
+
+用法::
+
+    async with client.new_session() as session:
+        exporter = ResourceExporter(session, search_orders, search_orders.Params(per_page=50),
+                                    RecordFlattener(Order, ORDER_RULES))
+        result = await exporter.run('orders.ndjson.gz', format='ndjson')
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import typing
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, IO, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+from typing_extensions import Literal
+
+from shopline_sdk.helper import iterate_raw_pages
+
+FlattenRule = Literal['flatten', 'money', 'json', 'explode', 'drop']
+ExportFormat = Literal['ndjson', 'parquet']
+
+ORDER_RULES: Dict[str, FlattenRule] = {
+    'subtotal_items': 'explode',
+    'order_delivery': 'flatten',
+    'order_payment': 'flatten',
+    'custom_discount_items': 'json',
+    'promotion_items': 'json',
+}
+"""``Order`` 的默认展平规则"""
+
+CUSTOMER_RULES: Dict[str, FlattenRule] = {
+    'metafields': 'json',
+    'custom_data': 'json',
+}
+"""``Customer`` 的默认展平规则"""
+
+
+def _resolve_annotation(annotation: Any) -> Any:
+    """去掉 Optional 包装，``Union[Literal[...], str]`` 视为 ``str``"""
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        non_literals = [arg for arg in args if typing.get_origin(arg) is not Literal]
+        if len(non_literals) == 1:
+            return _resolve_annotation(non_literals[0])
+        if not non_literals:
+            return str
+        return Any
+    if typing.get_origin(annotation) is Literal:
+        return str
+    return annotation
+
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _list_item(annotation: Any) -> Any:
+    if typing.get_origin(annotation) in (list, typing.List):
+        args = typing.get_args(annotation)
+        return _resolve_annotation(args[0]) if args else Any
+    return None
+
+
+@dataclass(frozen=True)
+class Column:
+    """导出的一列"""
+    name: str
+    path: Tuple[str, ...]
+    """在原始 JSON 中的键路径"""
+    type: str
+    """``string`` / ``int64`` / ``float64`` / ``bool``"""
+    encode_json: bool = False
+
+
+_SCALAR_TYPES = {str: 'string', int: 'int64', float: 'float64', bool: 'bool'}
+
+
+class RecordFlattener:
+    """按模型字段定义把原始 JSON 记录展平为单层字典"""
+
+    def __init__(
+            self,
+            model: Type[BaseModel],
+            rules: Optional[Dict[str, FlattenRule]] = None,
+            sep: str = '.',
+            max_depth: int = 2,
+            parent_key: Optional[str] = None
+    ):
+        """
+        Args:
+            model: 记录对应的 pydantic 模型，例如 ``Order``
+            rules: 字段路径（以 ``.`` 连接）到展平规则的映射
+            sep: 展平后列名的分隔符
+            max_depth: 未配置规则的嵌套模型展开的最大深度，超出后序列化为 JSON
+            parent_key: 作为子表时，指向父记录 ID 的列名
+        """
+        self.model = model
+        self.rules = dict(rules or {})
+        self.sep = sep
+        self.max_depth = max_depth
+        self.parent_key = parent_key
+        self.columns: List[Column] = []
+        self.children: Dict[str, Tuple[Tuple[str, ...], RecordFlattener]] = {}
+        """子表名 -> (键路径, 子表展平器)"""
+        if parent_key:
+            self.columns += [Column(parent_key, (), 'string'), Column('position', (), 'int64')]
+        self._add_model(model, (), 0)
+        self._getters = [(column.name, self._getter(column)) for column in self.columns if column.path]
+
+    def _rule(self, path: Tuple[str, ...], annotation: Any) -> FlattenRule:
+        rule = self.rules.get('.'.join(path))
+        if rule is not None:
+            return rule
+        if _is_model(annotation):
+            if annotation.__name__ == 'Money':
+                return 'money'
+            return 'flatten' if len(path) <= self.max_depth else 'json'
+        return 'json'
+
+    def _add_model(self, model: Type[BaseModel], prefix: Tuple[str, ...], depth: int):
+        for name, field_info in model.model_fields.items():
+            path = prefix + (field_info.alias or name,)
+            annotation = _resolve_annotation(field_info.annotation)
+            column_name = self.sep.join(path)
+            if annotation in _SCALAR_TYPES:
+                if self.rules.get('.'.join(path)) != 'drop':
+                    self.columns.append(Column(column_name, path, _SCALAR_TYPES[annotation]))
+                continue
+
+            rule = self._rule(path, annotation)
+            if rule == 'drop':
+                continue
+            if rule == 'money':
+                self.columns.append(Column(column_name + self.sep + 'cents', path + ('cents',), 'int64'))
+                self.columns.append(Column(column_name + self.sep + 'currency_iso', path + ('currency_iso',),
+                                           'string'))
+            elif rule == 'flatten' and _is_model(annotation):
+                self._add_model(annotation, path, depth + 1)
+            elif rule == 'explode' and _is_model(_list_item(annotation)):
+                child_rules = {
+                    key[len(column_name) + 1:]: value
+                    for key, value in self.rules.items() if key.startswith(column_name + '.')
+                }
+                parent_key = f'{self.model.__name__.lower()}_id'
+                self.children[column_name] = (path, RecordFlattener(
+                    _list_item(annotation), child_rules, self.sep, self.max_depth, parent_key
+                ))
+            else:
+                self.columns.append(Column(column_name, path, 'string', encode_json=True))
+
+    @staticmethod
+    def _getter(column: Column) -> Callable[[Dict[str, Any]], Any]:
+        path = column.path
+
+        def get(record: Dict[str, Any]) -> Any:
+            value: Any = record
+            for key in path:
+                if not isinstance(value, dict):
+                    return None
+                value = value.get(key)
+            if column.encode_json and value is not None:
+                return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+            return value
+
+        return get
+
+    def flatten(self, record: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, List[Dict[str, Any]]]]:
+        """
+        展平一条记录
+
+        Returns:
+            (展平后的行, 子表名 -> 子表行列表)
+        """
+        row = {name: get(record) for name, get in self._getters}
+        children: Dict[str, List[Dict[str, Any]]] = {}
+        for child_name, (path, child) in self.children.items():
+            items: Any = record
+            for key in path:
+                items = items.get(key) if isinstance(items, dict) else None
+            rows = []
+            for position, item in enumerate(items or ()):
+                child_row, _ = child.flatten(item)
+                child_row[child.parent_key] = record.get('id')
+                child_row['position'] = position
+                rows.append(child_row)
+            children[child_name] = rows
+        return row, children
+
+
+class NdjsonWriter:
+    """逐行写入 NDJSON，路径以 ``.gz`` 结尾时使用 gzip 压缩，值为 None 的列不写出"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file: IO[str] = gzip.open(path, 'wt', encoding='utf-8') if path.endswith('.gz') else open(
+            path, 'w', encoding='utf-8')
+
+    def write_rows(self, rows: List[Dict[str, Any]]):
+        self._file.writelines(
+            json.dumps({k: v for k, v in row.items() if v is not None}, ensure_ascii=False,
+                       separators=(',', ':')) + '\n'
+            for row in rows
+        )
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """按行组写入 Parquet，列与类型来自 ``RecordFlattener.columns``，需要安装 ``pyarrow``"""
+
+    def __init__(self, path: str, columns: List[Column], row_group_size: int = 10000):
+        """
+        Args:
+            path: 输出路径
+            columns: 导出的列
+            row_group_size: 每个行组的行数，即写入前缓冲的最大行数
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError(
+                'ParquetWriter requires pyarrow, install it with: pip install shopline-sdk-python[arrow]'
+            ) from e
+        self._pa = pa
+        self.path = path
+        self.columns = columns
+        self.row_group_size = row_group_size
+        types = {'string': pa.string(), 'int64': pa.int64(), 'float64': pa.float64(), 'bool': pa.bool_()}
+        self.schema = pa.schema([(column.name, types[column.type]) for column in columns])
+        self._writer = pq.ParquetWriter(path, self.schema)
+        self._buffer: List[Dict[str, Any]] = []
+
+    def write_rows(self, rows: List[Dict[str, Any]]):
+        self._buffer.extend(rows)
+        while len(self._buffer) >= self.row_group_size:
+            self._flush(self._buffer[:self.row_group_size])
+            del self._buffer[:self.row_group_size]
+
+    def _array(self, name: str, type_: Any, rows: List[Dict[str, Any]]):
+        pa = self._pa
+        values = [row.get(name) for row in rows]
+        try:
+            return pa.array(values, type=type_)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # 原始 JSON 与模型类型不一致时（如数字以字符串返回），无法转换的值写为 null
+            return pa.array([_coerce(value, type_, pa) for value in values], type=type_)
+
+    def _flush(self, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        arrays = [self._array(item.name, item.type, rows) for item in self.schema]
+        self._writer.write_table(self._pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self):
+        self._flush(self._buffer)
+        self._buffer = []
+        self._writer.close()
+
+
+def _coerce(value: Any, type_: Any, pa: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        if pa.types.is_string(type_):
+            return value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+        if pa.types.is_integer(type_):
+            return int(value)
+        if pa.types.is_floating(type_):
+            return float(value)
+        if pa.types.is_boolean(type_):
+            return value if isinstance(value, bool) else str(value).lower() in ('1', 'true')
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+@dataclass
+class ExportResult:
+    """导出结果"""
+    pages: int = 0
+    records: int = 0
+    child_records: Dict[str, int] = field(default_factory=dict)
+    """子表名 -> 行数"""
+    paths: Dict[str, str] = field(default_factory=dict)
+    """表名 -> 输出路径，主表名为 ``''``"""
+
+
+class ResourceExporter:
+    """逐页拉取分页接口并流式写入文件"""
+
+    def __init__(
+            self,
+            session: Any,
+            api: Any,
+            params: BaseModel,
+            flattener: RecordFlattener,
+            cursor: bool = False,
+            **path_params
+    ):
+        """
+        Args:
+            session: 客户端会话
+            api: 分页接口模块，例如 ``search_orders``、``get_customers``
+            params: 查询参数模型实例，建议设置较大的 ``per_page``
+            flattener: 记录展平器
+            cursor: 是否使用 ``previous_id`` 游标翻页
+            **path_params: 路径参数
+        """
+        self.session = session
+        self.api = api
+        self.params = params
+        self.flattener = flattener
+        self.cursor = cursor
+        self.path_params = path_params
+
+    @staticmethod
+    def child_path(path: str, child_name: str) -> str:
+        """子表输出路径，例如 ``orders.ndjson.gz`` -> ``orders.subtotal_items.ndjson.gz``"""
+        directory, filename = os.path.split(path)
+        stem, dot, rest = filename.partition('.')
+        return os.path.join(directory, f'{stem}.{child_name}{dot}{rest}')
+
+    def _open(self, path: str, columns: List[Column], format: ExportFormat, row_group_size: int):
+        if format == 'parquet':
+            return ParquetWriter(path, columns, row_group_size)
+        return NdjsonWriter(path)
+
+    async def run(self, path: str, format: ExportFormat = 'ndjson', row_group_size: int = 10000) -> ExportResult:
+        """
+        执行导出
+
+        Args:
+            path: 主表输出路径，子表写入 ``child_path(path, 子表名)``
+            format: ``ndjson`` 或 ``parquet``
+            row_group_size: Parquet 行组大小
+
+        Returns:
+            ExportResult: 导出统计
+        """
+        result = ExportResult(paths={'': path})
+        writers = {'': self._open(path, self.flattener.columns, format, row_group_size)}
+        for child_name, (_, child) in self.flattener.children.items():
+            result.paths[child_name] = self.child_path(path, child_name)
+            result.child_records[child_name] = 0
+            writers[child_name] = self._open(result.paths[child_name], child.columns, format, row_group_size)
+
+        # 容量为 1 的队列：写入当前页时只预取下一页
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+        async def produce():
+            cancelled = False
+            try:
+                async for page in iterate_raw_pages(self.session, self.api, self.params, self.cursor,
+                                                    **self.path_params):
+                    await queue.put(page)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            finally:
+                # 被取消时消费端已经退出，队列满时等待写入结束标记会永远阻塞
+                if not cancelled:
+                    await queue.put(None)
+
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                page = await queue.get()
+                if page is None:
+                    break
+                rows = []
+                child_rows: Dict[str, List[Dict[str, Any]]] = {name: [] for name in self.flattener.children}
+                for item in page.get('items') or ():
+                    row, children = self.flattener.flatten(item)
+                    rows.append(row)
+                    for child_name, items in children.items():
+                        child_rows[child_name].extend(items)
+                writers[''].write_rows(rows)
+                for child_name, items in child_rows.items():
+                    writers[child_name].write_rows(items)
+                    result.child_records[child_name] += len(items)
+                result.pages += 1
+                result.records += len(rows)
+            await producer
+        finally:
+            if not producer.done():
+                producer.cancel()
+            for writer in writers.values():
+                writer.close()
+        return result
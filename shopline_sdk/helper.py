@@ -1,7 +1,15 @@
+import asyncio
+import datetime
 import hashlib
 import hmac
 import json
-from typing import Any, Dict
+from itertools import islice
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, \
+    TypeVar, Union
+
+from pydantic import BaseModel
+
+T = TypeVar('T')
 
 
 def _sort_dict_by_keys(obj: Any) -> Any:
@@ -82,3 +90,199 @@ def verify_webhook_request(payload: Dict[str, Any], signature: str, secret: str,
 
     # 比较签名（不区分大小写）
     return expected_signature.lower() == signature.lower()
+
+
+def parse_datetime(value: Any) -> Optional[datetime.datetime]:
+    """
+    解析接口返回的时间字符串（如 ``2024-01-01T00:00:00.000Z``、``2024-01-01T08:00:00+08:00``）
+
+    Args:
+        value: 时间字符串，没有时区的按 UTC 处理
+
+    Returns:
+        带时区的 datetime，无法解析时返回 None
+    """
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        moment = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return moment if moment.tzinfo else moment.replace(tzinfo=datetime.timezone.utc)
+
+
+def chunked(iterable: Iterable[T], size: int) -> Iterator[List[T]]:
+    """
+    将可迭代对象按固定大小切分
+
+    Args:
+        iterable: 需要切分的可迭代对象
+        size: 每块的最大长度
+
+    Returns:
+        依次产出每一块的迭代器
+    """
+    if size <= 0:
+        raise ValueError('size must be positive')
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def gather_with_concurrency(limit: int, *aws: Awaitable[T], return_exceptions: bool = False) -> List[T]:
+    """
+    限制并发数量地执行多个协程，结果顺序与输入一致
+
+    Args:
+        limit: 最大并发数
+        *aws: 需要执行的协程
+        return_exceptions: 是否将异常作为结果返回，而不是直接抛出
+
+    Returns:
+        各协程的结果列表
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def _run(aw: Awaitable[T]) -> T:
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(_run(aw) for aw in aws), return_exceptions=return_exceptions)
+
+
+async def async_iterate(items: Union[Iterable[T], AsyncIterable[T]]) -> AsyncIterator[T]:
+    """
+    将同步或异步可迭代对象统一为异步迭代器
+
+    Args:
+        items: 列表、生成器或异步迭代器
+    """
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+async def iterate_pages(
+        call: Callable[..., Awaitable[Any]],
+        session: Any,
+        params: BaseModel,
+        start_page: int = 1,
+        **kwargs
+) -> AsyncIterator[Any]:
+    """
+    按页码遍历分页接口，依次产出每一页的响应
+
+    适用于响应中带有 ``items`` 与 ``pagination`` 的接口，例如 ``get_products``、``search_orders``。
+
+    Args:
+        call: 接口模块的 ``call`` 函数
+        session: 客户端会话
+        params: 查询参数模型实例（如 ``get_products.Params()``），页码会在副本上覆盖
+        start_page: 起始页码
+        **kwargs: 透传给 ``call`` 的其他参数
+
+    Returns:
+        产出每一页响应的异步迭代器
+    """
+    page = start_page
+    while True:
+        response = await call(session, params=params.model_copy(update={'page': page}), **kwargs)
+        yield response
+
+        if not response.items:
+            return
+        pagination = response.pagination
+        if pagination is None or pagination.total_pages is None or page >= pagination.total_pages:
+            return
+        page += 1
+
+
+def _get_api_operation(api: Any):
+    from shopline_sdk.operations import get_operation
+
+    name = api.__name__[len('shopline_sdk.apis.'):]
+    operation = get_operation(name)
+    if operation is None:
+        raise ValueError(f'{api.__name__} is not an API module')
+    return operation
+
+
+async def fetch_json(
+        session: Any,
+        api: Any,
+        params: Optional[BaseModel] = None,
+        body: Optional[BaseModel] = None,
+        **path_params
+) -> Any:
+    """
+    调用接口并返回未经模型校验的原始 JSON，用于导出、列式转换等不需要 pydantic 实例的场景
+
+    Args:
+        session: 客户端会话
+        api: 接口模块，例如 ``shopline_sdk.apis.orders.search_orders``
+        params: 查询参数模型实例
+        body: 请求体模型实例
+        **path_params: 路径参数，例如 ``id``
+
+    Returns:
+        响应的 JSON 数据
+    """
+    from shopline_sdk.exceptions import ShoplineAPIError
+
+    operation = _get_api_operation(api)
+    url = operation.path.format(**path_params).lstrip('/')
+    query_params = params.model_dump(exclude_none=True, by_alias=True) if params else {}
+    json_data = body.model_dump(exclude_none=True, by_alias=True) if body else None
+
+    async with session.request(
+            operation.method, url, params=query_params, json=json_data,
+            headers={"Content-Type": "application/json"}
+    ) as response:
+        if response.status >= 400:
+            raise ShoplineAPIError(status_code=response.status, error=await response.json())
+        return await response.json()
+
+
+async def iterate_raw_pages(
+        session: Any,
+        api: Any,
+        params: BaseModel,
+        cursor: bool = False,
+        **path_params
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    遍历分页接口，依次产出每一页的原始 JSON（``{'items': [...], 'pagination': {...}}``）
+
+    Args:
+        session: 客户端会话
+        api: 接口模块，例如 ``shopline_sdk.apis.orders.search_orders``
+        params: 查询参数模型实例，页码 / 游标会在副本上覆盖
+        cursor: 是否使用 ``previous_id`` 游标翻页（深分页时比页码更快），要求参数支持 ``previous_id``
+        **path_params: 路径参数
+
+    Returns:
+        产出每一页 JSON 的异步迭代器
+    """
+    if cursor and 'previous_id' not in type(params).model_fields:
+        raise ValueError(f'{type(params).__qualname__} does not support previous_id')
+
+    page = params.page or 1
+    update: Dict[str, Any] = {'page': page}
+    while True:
+        data = await fetch_json(session, api, params=params.model_copy(update=update), **path_params)
+        yield data
+
+        items = data.get('items') or []
+        if not items:
+            return
+        total_pages = (data.get('pagination') or {}).get('total_pages')
+        if total_pages is None or page >= total_pages:
+            return
+        page += 1
+        update = {'previous_id': items[-1].get('id'), 'page': None} if cursor else {'page': page}
@@ -0,0 +1,209 @@
+"""
+请求插桩
+
+生成的接口模块只是 ``await session.<method>(...)``，因此插桩放在会话层：
+``aiohttp.TraceConfig`` 记录排队、建连与首字节时间，``InstrumentedResponse`` 记录读取响应体、
+JSON 解码以及从解码完成到响应释放之间的模型校验时间。每个请求对应一个 ``RequestRecord``，
+开始与结束时依次通知注册的 ``RequestHook``。
+"""
+
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from yarl import URL
+
+from shopline_sdk.operations import Operation, resolve
+
+# 请求各阶段名称
+PHASES = ('queue', 'connect', 'ttfb', 'read', 'decode', 'validate')
+
+
+class RequestRecord:
+    """单个请求的插桩记录"""
+
+    def __init__(self, method: str, url: URL, path: str, hooks: List['RequestHook']):
+        self.method = method
+        self.url = url
+        self.path = path
+        """相对于 API 基础路径的请求路径"""
+        self.operation: Optional[Operation] = resolve(method, path)
+        self.status: Optional[int] = None
+        self.error: Optional[BaseException] = None
+        self.response_bytes = 0
+        self.phases: Dict[str, float] = {}
+        """各阶段耗时（秒），见 ``PHASES``"""
+        self.attributes: Dict[str, Any] = {}
+        """供钩子之间传递数据的附加属性"""
+        self.started_at = time.perf_counter()
+        self.started_at_ns = time.time_ns()
+        """开始时间（Unix 纳秒），用于将 ``perf_counter`` 时间换算为绝对时间"""
+        self.ended_at: Optional[float] = None
+        self.marks: Dict[str, float] = {}
+        """阶段边界的 ``perf_counter`` 时间，例如 ``decode_start``、``decode_end``"""
+        self._hooks = hooks
+
+    def __repr__(self) -> str:
+        return f"RequestRecord(name='{self.name}', status={self.status}, duration={self.duration})"
+
+    @property
+    def name(self) -> str:
+        """操作名，未注册的路径使用 ``METHOD /path``"""
+        return self.operation.name if self.operation else f'{self.method} {self.path}'
+
+    @property
+    def route(self) -> str:
+        """路由模板，例如 ``GET /orders/{id}``"""
+        return self.operation.route if self.operation else f'{self.method} {self.path}'
+
+    @property
+    def status_class(self) -> str:
+        """状态码分类，例如 ``2xx``；请求异常时为 ``error``"""
+        if self.status is None:
+            return 'error'
+        return f'{self.status // 100}xx'
+
+    @property
+    def duration(self) -> Optional[float]:
+        if self.ended_at is None:
+            return None
+        return self.ended_at - self.started_at
+
+    @property
+    def finished(self) -> bool:
+        return self.ended_at is not None
+
+    def add_phase(self, phase: str, seconds: float):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def to_ns(self, perf_time: float) -> int:
+        """将 ``perf_counter`` 时间换算为 Unix 纳秒"""
+        return self.started_at_ns + int((perf_time - self.started_at) * 1e9)
+
+    def start(self):
+        for hook in self._hooks:
+            hook.on_request_start(self)
+
+    def finish(self, error: Optional[BaseException] = None):
+        if self.finished:
+            return
+        now = time.perf_counter()
+        if 'decode_end' in self.marks:
+            self.marks['validate_start'] = self.marks['decode_end']
+            self.marks['validate_end'] = now
+            self.add_phase('validate', now - self.marks['decode_end'])
+        self.error = error
+        self.ended_at = now
+        for hook in self._hooks:
+            hook.on_request_end(self)
+
+
+class RequestHook:
+    """请求钩子接口，子类按需覆盖"""
+
+    def on_request_start(self, record: RequestRecord):
+        pass
+
+    def on_request_end(self, record: RequestRecord):
+        pass
+
+
+class InstrumentedResponse(aiohttp.ClientResponse):
+    """记录响应体读取、JSON 解码与模型校验耗时的响应类"""
+
+    _shopline_record: Optional[RequestRecord] = None
+
+    async def read(self) -> bytes:
+        record = self._shopline_record
+        if record is None or self._body is not None:
+            return await super().read()
+        started = time.perf_counter()
+        body = await super().read()
+        record.add_phase('read', time.perf_counter() - started)
+        record.response_bytes = len(body)
+        return body
+
+    async def json(self, *args, **kwargs) -> Any:
+        record = self._shopline_record
+        if record is None:
+            return await super().json(*args, **kwargs)
+        started = time.perf_counter()
+        read_before = record.phases.get('read', 0.0)
+        data = await super().json(*args, **kwargs)
+        ended = time.perf_counter()
+        read_time = record.phases.get('read', 0.0) - read_before
+        record.marks['decode_start'] = started + read_time
+        record.marks['decode_end'] = ended
+        record.add_phase('decode', ended - started - read_time)
+        if isinstance(data, dict) and isinstance(data.get('items'), list):
+            record.attributes['item_count'] = len(data['items'])
+        return data
+
+    def release(self) -> Any:
+        record = self._shopline_record
+        if record is not None:
+            record.finish()
+        return super().release()
+
+
+def create_trace_config(hooks: List[RequestHook], base_url: str) -> aiohttp.TraceConfig:
+    """
+    创建通知请求钩子的 ``TraceConfig``
+
+    Args:
+        hooks: 请求钩子列表（按引用保存，之后追加的钩子同样生效）
+        base_url: API 基础 URL，用于计算相对路径
+
+    Returns:
+        aiohttp.TraceConfig
+    """
+    base_path = URL(base_url).path.rstrip('/')
+    trace_config = aiohttp.TraceConfig(trace_config_ctx_factory=SimpleNamespace)
+
+    async def on_request_start(session, ctx, params):
+        path = params.url.path
+        if base_path and path.startswith(base_path):
+            path = path[len(base_path):]
+        ctx.record = RequestRecord(params.method, params.url, path, hooks)
+        ctx.headers_sent = None
+        if 'page' in params.url.query:
+            ctx.record.attributes['page'] = params.url.query['page']
+        ctx.record.start()
+
+    async def on_connection_queued_start(session, ctx, params):
+        ctx.queued_at = time.perf_counter()
+
+    async def on_connection_queued_end(session, ctx, params):
+        ctx.record.add_phase('queue', time.perf_counter() - ctx.queued_at)
+
+    async def on_connection_create_start(session, ctx, params):
+        ctx.connecting_at = time.perf_counter()
+
+    async def on_connection_create_end(session, ctx, params):
+        ctx.record.add_phase('connect', time.perf_counter() - ctx.connecting_at)
+
+    async def on_request_headers_sent(session, ctx, params):
+        ctx.headers_sent = time.perf_counter()
+
+    async def on_request_end(session, ctx, params):
+        record = ctx.record
+        record.add_phase('ttfb', time.perf_counter() - (ctx.headers_sent or record.started_at))
+        record.status = params.response.status
+        if isinstance(params.response, InstrumentedResponse):
+            params.response._shopline_record = record
+        else:
+            record.finish()
+
+    async def on_request_exception(session, ctx, params):
+        ctx.record.finish(params.exception)
+
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_connection_queued_start.append(on_connection_queued_start)
+    trace_config.on_connection_queued_end.append(on_connection_queued_end)
+    trace_config.on_connection_create_start.append(on_connection_create_start)
+    trace_config.on_connection_create_end.append(on_connection_create_end)
+    trace_config.on_request_headers_sent.append(on_request_headers_sent)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
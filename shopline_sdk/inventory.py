@@ -0,0 +1,241 @@
+"""
+按 SKU 同步库存
+
+商品（含规格）、赠品、加购品各自有按 SKU 更新库存的接口。``SkuInventorySync`` 从商品目录建立
+SKU 索引，将每个 SKU 的库存更新路由到对应的接口，并与上次已知的库存比对，只发送发生变化的 SKU。
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+import aiohttp
+from typing_extensions import Literal
+
+from shopline_sdk.apis.addon_products import bulk_update_addon_product_quantity_by_sku, get_addon_products
+from shopline_sdk.apis.gifts import bulk_update_quantity_by_sku, get_gifts
+from shopline_sdk.apis.products import get_products, update_quantity_by_sku
+from shopline_sdk.exceptions import ShoplineAPIError
+from shopline_sdk.helper import gather_with_concurrency, iterate_pages
+from shopline_sdk.models.addon_product import AddonProduct
+from shopline_sdk.models.gift import Gift
+from shopline_sdk.models.product import Product
+
+EntityType = Literal['product', 'gift', 'addon_product']
+
+ENTITY_TYPES: Tuple[EntityType, ...] = ('product', 'gift', 'addon_product')
+
+
+@dataclass(frozen=True)
+class SkuTarget:
+    """SKU 对应的库存实体"""
+    entity_type: EntityType
+    id: str
+    variation_id: Optional[str] = None
+
+
+@dataclass
+class SyncResult:
+    """一次库存同步的结果"""
+    updated: Dict[EntityType, List[str]] = field(default_factory=dict)
+    """各实体类型成功更新的 SKU"""
+    unchanged: List[str] = field(default_factory=list)
+    """库存与上次已知一致而跳过的 SKU"""
+    unknown: List[str] = field(default_factory=list)
+    """索引中不存在的 SKU"""
+    errors: Dict[Tuple[EntityType, str], Exception] = field(default_factory=dict)
+    """更新失败的 (实体类型, SKU) 及对应异常（API 错误、响应中的 ``errors``、连接错误或超时）"""
+
+    @property
+    def request_count(self) -> int:
+        return sum(len(skus) for skus in self.updated.values()) + len(self.errors)
+
+
+class SkuInventorySync:
+    """
+    SKU 库存同步器
+
+    用法::
+
+        sync = SkuInventorySync()
+        async with client.new_session() as session:
+            await sync.load(session)
+            result = await sync.sync(session, {'SKU-001': 10, 'SKU-002': 0})
+    """
+
+    def __init__(self, concurrency: int = 8, per_page: int = 50):
+        """
+        Args:
+            concurrency: 每个接口的最大并发请求数
+            per_page: 拉取商品目录时的每页数量
+        """
+        self.concurrency = concurrency
+        self.per_page = per_page
+        self._targets: Dict[str, List[SkuTarget]] = {}
+        self._quantities: Dict[Tuple[EntityType, str], Optional[float]] = {}
+
+    def __contains__(self, sku: str) -> bool:
+        return sku in self._targets
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+    def targets(self, sku: str) -> List[SkuTarget]:
+        """返回 SKU 对应的全部库存实体"""
+        return list(self._targets.get(sku, ()))
+
+    def entity_types(self, sku: str) -> List[EntityType]:
+        """返回 SKU 所属的实体类型（即需要调用的接口）"""
+        types = {target.entity_type for target in self._targets.get(sku, ())}
+        return [entity_type for entity_type in ENTITY_TYPES if entity_type in types]
+
+    def known_quantity(self, entity_type: EntityType, sku: str) -> Optional[float]:
+        """返回 SKU 在该实体类型下上次已知的库存"""
+        return self._quantities.get((entity_type, sku))
+
+    def clear(self):
+        """清空索引与已知库存"""
+        self._targets.clear()
+        self._quantities.clear()
+
+    def _index(self, sku: Optional[str], target: SkuTarget, quantity: Optional[float]):
+        if not sku:
+            return
+        targets = self._targets.setdefault(sku, [])
+        if target not in targets:
+            targets.append(target)
+        self._quantities[(target.entity_type, sku)] = quantity
+
+    def add_product(self, product: Product):
+        """将商品及其规格加入索引"""
+        if not product.id:
+            return
+        self._index(product.sku, SkuTarget('product', product.id), product.quantity)
+        for variation in product.variations or ():
+            self._index(variation.sku, SkuTarget('product', product.id, variation.id), variation.quantity)
+
+    def add_gift(self, gift: Gift):
+        """将赠品及其规格加入索引"""
+        if not gift.id:
+            return
+        self._index(gift.sku, SkuTarget('gift', gift.id), gift.quantity)
+        for variation in gift.variations or ():
+            self._index(variation.sku, SkuTarget('gift', gift.id, variation.id), variation.quantity)
+
+    def add_addon_product(self, addon_product: AddonProduct):
+        """将加购品加入索引"""
+        if not addon_product.id:
+            return
+        self._index(addon_product.sku, SkuTarget('addon_product', addon_product.id), addon_product.quantity)
+
+    async def load(
+            self,
+            session: aiohttp.ClientSession,
+            entity_types: Iterable[EntityType] = ENTITY_TYPES
+    ):
+        """
+        从商品目录拉取并建立 SKU 索引
+
+        Args:
+            session: 客户端会话
+            entity_types: 需要拉取的实体类型
+        """
+        entity_types = set(entity_types)
+        if 'product' in entity_types:
+            params = get_products.Params(per_page=self.per_page)
+            async for page in iterate_pages(get_products.call, session, params):
+                for product in page.items or ():
+                    self.add_product(product)
+        if 'gift' in entity_types:
+            params = get_gifts.Params(per_page=self.per_page)
+            async for page in iterate_pages(get_gifts.call, session, params):
+                for gift in page.items or ():
+                    self.add_gift(gift)
+        if 'addon_product' in entity_types:
+            params = get_addon_products.Params(per_page=self.per_page)
+            async for page in iterate_pages(get_addon_products.call, session, params):
+                for addon_product in page.items or ():
+                    self.add_addon_product(addon_product)
+
+    def diff(self, quantities: Mapping[str, int]) -> Tuple[Dict[EntityType, Dict[str, int]], List[str], List[str]]:
+        """
+        计算需要更新的 SKU
+
+        Args:
+            quantities: SKU 到目标库存的映射
+
+        Returns:
+            (按实体类型分组的待更新 SKU 与库存, 无变化的 SKU, 未知的 SKU)
+        """
+        changes: Dict[EntityType, Dict[str, int]] = {}
+        unchanged: List[str] = []
+        unknown: List[str] = []
+        for sku, quantity in quantities.items():
+            entity_types = self.entity_types(sku)
+            if not entity_types:
+                unknown.append(sku)
+                continue
+            changed = False
+            for entity_type in entity_types:
+                if self._quantities.get((entity_type, sku)) != quantity:
+                    changes.setdefault(entity_type, {})[sku] = quantity
+                    changed = True
+            if not changed:
+                unchanged.append(sku)
+        return changes, unchanged, unknown
+
+    async def _update(self, session: aiohttp.ClientSession, entity_type: EntityType, sku: str, quantity: int):
+        if entity_type == 'product':
+            response = await update_quantity_by_sku.call(
+                session, body=update_quantity_by_sku.Body(sku=sku, quantity=quantity, replace=True)
+            )
+        elif entity_type == 'gift':
+            response = await bulk_update_quantity_by_sku.call(
+                session, body=bulk_update_quantity_by_sku.Body(sku=sku, quantity=quantity, replace=True)
+            )
+        else:
+            response = await bulk_update_addon_product_quantity_by_sku.call(
+                session, body=bulk_update_addon_product_quantity_by_sku.Body(sku=sku, quantity=quantity, replace=True)
+            )
+        errors = [error for error in getattr(response, 'errors', None) or () if error]
+        if errors:
+            # 请求成功但部分记录更新失败
+            raise ShoplineAPIError(code='update_failed', message=str(errors), status_code=200, errors=errors)
+
+    async def sync(self, session: aiohttp.ClientSession, quantities: Mapping[str, int]) -> SyncResult:
+        """
+        将目标库存同步到 Shopline，只发送与上次已知库存不同的 SKU
+
+        各实体类型的更新并行执行，每个接口的并发数受 ``concurrency`` 限制。
+        更新成功后会刷新已知库存。
+
+        Args:
+            session: 客户端会话
+            quantities: SKU 到目标库存的映射
+
+        Returns:
+            SyncResult: 同步结果
+        """
+        changes, unchanged, unknown = self.diff(quantities)
+        result = SyncResult(unchanged=unchanged, unknown=unknown)
+
+        async def _update_all(entity_type: EntityType, items: Dict[str, int]):
+            outcomes = await gather_with_concurrency(
+                self.concurrency,
+                *(self._update(session, entity_type, sku, quantity) for sku, quantity in items.items()),
+                return_exceptions=True
+            )
+            for (sku, quantity), outcome in zip(items.items(), outcomes):
+                if isinstance(outcome, (ShoplineAPIError, aiohttp.ClientError, asyncio.TimeoutError)):
+                    result.errors[(entity_type, sku)] = outcome
+                elif isinstance(outcome, BaseException):
+                    raise outcome
+                else:
+                    self._quantities[(entity_type, sku)] = quantity
+                    result.updated.setdefault(entity_type, []).append(sku)
+
+        await gather_with_concurrency(
+            len(ENTITY_TYPES),
+            *(_update_all(entity_type, items) for entity_type, items in changes.items())
+        )
+        return result
@@ -0,0 +1,386 @@
+"""
+批量操作任务轮询
+
+``bulk_operations``、``store_credits.bulk_update_store_credits`` 等批量接口只返回任务 ID，
+任务在后台执行。``JobHandle`` 将任务包装为可 await 的对象，按处理进度自适应调整轮询间隔；
+``JobWatcher`` 通过一个轮询循环同时跟踪多个任务。任务完成后可流式下载并逐条解析结果文件。
+"""
+
+import asyncio
+import csv
+import json
+import math
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+from shopline_sdk.apis.bulk_operations import get_a_bulk_operation
+from shopline_sdk.exceptions import ShoplineJobError
+from shopline_sdk.models.job import Job
+
+TERMINAL_STATUSES = ('done', 'failed')
+
+
+class _LineFeed:
+    """可持续追加的行迭代器，取空时停止，追加后可继续读取，使单个 ``csv.reader`` 跨下载块解析"""
+
+    def __init__(self):
+        self._lines = deque()
+
+    def append(self, line: str):
+        self._lines.append(line)
+
+    def __iter__(self) -> '_LineFeed':
+        return self
+
+    def __next__(self) -> str:
+        if not self._lines:
+            raise StopIteration
+        return self._lines.popleft()
+
+
+class JobHandle:
+    """
+    批量操作任务句柄
+
+    用法::
+
+        response = await bulk_update_store_credits.call(session, body=body)
+        handle = JobHandle.from_response(session, response)
+        job = await handle  # 等待任务结束，返回 Job
+        async for record in handle.iter_result_records():
+            ...
+    """
+
+    def __init__(
+            self,
+            session: aiohttp.ClientSession,
+            job_id: str,
+            min_interval: float = 1.0,
+            max_interval: float = 30.0,
+            backoff: float = 1.5
+    ):
+        """
+        Args:
+            session: 客户端会话
+            job_id: 任务 ID
+            min_interval: 最短轮询间隔（秒）
+            max_interval: 最长轮询间隔（秒）
+            backoff: 无进度信息时轮询间隔的增长倍数
+        """
+        if not job_id:
+            raise ValueError('job_id is required')
+        self.session = session
+        self.job_id = job_id
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.job: Optional[Job] = None
+        self._delay = min_interval
+        self._first_progress: Optional[Tuple[float, int]] = None
+        self._future: Optional[asyncio.Future] = None
+
+    @classmethod
+    def from_response(cls, session: aiohttp.ClientSession, response: Any, **kwargs) -> 'JobHandle':
+        """
+        从批量接口的响应创建任务句柄
+
+        支持带 ``job_id`` 的响应（如 ``bulk_update_store_credits.Response``）与 ``Job`` 模型。
+        """
+        job_id = getattr(response, 'job_id', None) or getattr(response, 'id', None)
+        handle = cls(session, job_id, **kwargs)
+        if isinstance(response, Job):
+            handle.job = response
+        return handle
+
+    def __repr__(self) -> str:
+        return f"JobHandle(job_id='{self.job_id}', status='{self.status}')"
+
+    @property
+    def status(self) -> Optional[str]:
+        return self.job.status if self.job else None
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    @property
+    def processed_count(self) -> int:
+        if not self.job:
+            return 0
+        return (self.job.successful_count or 0) + (self.job.failed_count or 0)
+
+    @property
+    def result_file(self) -> Optional[str]:
+        if self.job and self.job.ref_data:
+            return self.job.ref_data.result_file
+        return None
+
+    async def refresh(self) -> Job:
+        """重新获取任务状态"""
+        self.job = await get_a_bulk_operation.call(self.session, self.job_id)
+        return self.job
+
+    def next_delay(self) -> float:
+        """
+        根据任务规模与处理速度计算下一次轮询的间隔
+
+        已观察到处理进度时，按剩余数量 / 处理速度估算剩余时间并取其一半；
+        只知道总数时按总数的数量级放大最短间隔；否则按 ``backoff`` 指数退避。
+        """
+        job = self.job
+        total = job.total_count if job else None
+        processed = self.processed_count
+        now = time.monotonic()
+
+        if processed and self._first_progress is None:
+            self._first_progress = (now, processed)
+
+        delay = None
+        if total and self._first_progress is not None:
+            started_at, started_count = self._first_progress
+            elapsed = now - started_at
+            if elapsed > 0 and processed > started_count:
+                rate = (processed - started_count) / elapsed
+                delay = max(total - processed, 0) / rate / 2
+        if delay is None and total:
+            delay = self.min_interval * (1 + math.log10(total))
+        if delay is None:
+            delay = self._delay * self.backoff
+
+        self._delay = min(max(delay, self.min_interval), self.max_interval)
+        return self._delay
+
+    def _check(self, raise_on_failure: bool) -> Job:
+        if raise_on_failure and self.status == 'failed':
+            raise ShoplineJobError(self.job)
+        return self.job
+
+    async def wait(self, timeout: Optional[float] = None, raise_on_failure: bool = True) -> Job:
+        """
+        等待任务结束
+
+        Args:
+            timeout: 最长等待时间（秒），超时抛出 ``asyncio.TimeoutError``
+            raise_on_failure: 任务失败时是否抛出 ``ShoplineJobError``
+
+        Returns:
+            Job: 结束时的任务
+        """
+        if self._future is not None:
+            await asyncio.wait_for(asyncio.shield(self._future), timeout)
+            return self._check(raise_on_failure)
+
+        async def _poll():
+            while True:
+                await self.refresh()
+                if self.done:
+                    return
+                await asyncio.sleep(self.next_delay())
+
+        await asyncio.wait_for(_poll(), timeout)
+        return self._check(raise_on_failure)
+
+    def __await__(self):
+        return self.wait().__await__()
+
+    async def iter_result_lines(
+            self,
+            download_session: Optional[aiohttp.ClientSession] = None,
+            chunk_size: int = 64 * 1024
+    ) -> AsyncIterator[str]:
+        """
+        流式下载结果文件并逐行产出，不会将整个文件读入内存
+
+        结果文件是独立的下载地址，默认使用不带授权头的新会话下载。
+
+        Args:
+            download_session: 下载使用的会话
+            chunk_size: 每次读取的字节数
+        """
+        if not self.done:
+            await self.wait(raise_on_failure=False)
+        url = self.result_file
+        if not url:
+            return
+
+        owns_session = download_session is None
+        if owns_session:
+            download_session = aiohttp.ClientSession()
+        try:
+            async with download_session.get(url) as response:
+                response.raise_for_status()
+                buffer = b''
+                async for chunk in response.content.iter_chunked(chunk_size):
+                    buffer += chunk
+                    *lines, buffer = buffer.split(b'\n')
+                    for line in lines:
+                        yield line.rstrip(b'\r').decode('utf-8-sig')
+                if buffer:
+                    yield buffer.rstrip(b'\r').decode('utf-8-sig')
+        finally:
+            if owns_session:
+                await download_session.close()
+
+    async def iter_result_records(
+            self,
+            download_session: Optional[aiohttp.ClientSession] = None,
+            format: Optional[str] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式解析结果文件，逐条产出记录
+
+        Args:
+            download_session: 下载使用的会话
+            format: ``csv`` 或 ``ndjson``，默认按文件扩展名判断
+        """
+        if format is None:
+            path = (self.result_file or '').split('?', 1)[0].lower()
+            format = 'csv' if path.endswith('.csv') else 'ndjson'
+
+        lines = self.iter_result_lines(download_session)
+        if format == 'csv':
+            header: Optional[List[str]] = None
+            feed = _LineFeed()
+            reader = csv.reader(feed)
+            quotes = 0
+            async for line in lines:
+                feed.append(line + '\n')
+                quotes += line.count('"')
+                if quotes % 2:
+                    # 引号内的换行，记录尚未结束
+                    continue
+                quotes = 0
+                for row in reader:
+                    if not row:
+                        continue
+                    if header is None:
+                        header = row
+                    else:
+                        yield dict(zip(header, row))
+            if quotes % 2:
+                raise csv.Error('Unterminated quoted field in result file')
+        else:
+            async for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class JobWatcher:
+    """
+    通过单个轮询循环同时跟踪多个任务
+
+    每个任务按各自的自适应间隔轮询，循环只在最近一个到期的任务时醒来。
+
+    用法::
+
+        async with JobWatcher(session) as watcher:
+            handles = [watcher.watch(job_id) for job_id in job_ids]
+            jobs = await asyncio.gather(*handles)
+    """
+
+    def __init__(self, session: aiohttp.ClientSession, concurrency: int = 8, **handle_options):
+        """
+        Args:
+            session: 客户端会话
+            concurrency: 同一轮中最多并发查询的任务数
+            **handle_options: 创建 ``JobHandle`` 时的参数
+        """
+        self.session = session
+        self.concurrency = concurrency
+        self.handle_options = handle_options
+        self._due: Dict[str, float] = {}
+        self._handles: Dict[str, JobHandle] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> 'JobWatcher':
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def watch(self, job: Any) -> JobHandle:
+        """
+        开始跟踪任务
+
+        Args:
+            job: 任务 ID、``JobHandle`` 或带 ``job_id`` 的接口响应
+
+        Returns:
+            JobHandle: 可 await 的任务句柄
+        """
+        if isinstance(job, JobHandle):
+            handle = job
+        elif isinstance(job, str):
+            handle = JobHandle(self.session, job, **self.handle_options)
+        else:
+            handle = JobHandle.from_response(self.session, job, **self.handle_options)
+
+        if handle.job_id in self._handles:
+            return self._handles[handle.job_id]
+        handle._future = asyncio.get_running_loop().create_future()
+        self._handles[handle.job_id] = handle
+        self._due[handle.job_id] = time.monotonic()
+        self._wakeup.set()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return handle
+
+    async def _poll(self, handle: JobHandle):
+        try:
+            await handle.refresh()
+        except Exception as e:
+            self._finish(handle, e)
+            return
+        if handle.done:
+            self._finish(handle)
+        else:
+            self._due[handle.job_id] = time.monotonic() + handle.next_delay()
+
+    def _finish(self, handle: JobHandle, error: Optional[BaseException] = None):
+        self._due.pop(handle.job_id, None)
+        self._handles.pop(handle.job_id, None)
+        if not handle._future.done():
+            if error is not None:
+                handle._future.set_exception(error)
+            else:
+                handle._future.set_result(handle.job)
+
+    async def _run(self):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def _limited(handle: JobHandle):
+            async with semaphore:
+                await self._poll(handle)
+
+        while self._due:
+            now = time.monotonic()
+            due = [self._handles[job_id] for job_id, at in self._due.items() if at <= now]
+            if due:
+                await asyncio.gather(*(_limited(handle) for handle in due))
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), min(self._due.values()) - now)
+            except asyncio.TimeoutError:
+                pass
+
+    async def close(self):
+        """停止轮询，未结束的任务句柄会收到 ``asyncio.CancelledError``"""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        for handle in list(self._handles.values()):
+            if not handle._future.done():
+                handle._future.cancel()
+        self._handles.clear()
+        self._due.clear()
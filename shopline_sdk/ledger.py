@@ -0,0 +1,317 @@
+"""
+购物金与会员点数批量发放
+
+``bulk_update_store_credits`` 与 ``bulk_update_member_points`` 每次只能为一批顾客发放相同的数值。
+``LedgerSubmitter`` 将不同顾客的调整按 (类型, 数值, 备注, 过期时间) 分组，以最少的批量请求并发提交，
+跟踪返回的任务直至完成，并通过 ``LedgerJournal`` 记录幂等日志，重试时不会重复发放。
+"""
+
+import asyncio
+import json
+import os
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+from typing_extensions import Literal
+
+from shopline_sdk.apis.member_points import bulk_update_member_points
+from shopline_sdk.apis.store_credits import bulk_update_store_credits
+from shopline_sdk.exceptions import ShoplineAPIError, ShoplineJobError
+from shopline_sdk.helper import chunked, gather_with_concurrency
+from shopline_sdk.jobs import JobWatcher
+
+LedgerKind = Literal['store_credit', 'member_point']
+
+# 日志中的状态
+SUBMITTING = 'submitting'
+SUBMITTED = 'submitted'
+DONE = 'done'
+FAILED = 'failed'
+
+# 服务端明确拒绝、确定未发放的状态码；其他错误（5xx、连接中断、超时）无法确认是否已发放
+_REJECTED_STATUS_CODES = (400, 422)
+
+
+@dataclass(frozen=True)
+class Adjustment:
+    """单个顾客的购物金 / 点数调整"""
+    kind: LedgerKind
+    user_id: str
+    value: float
+    remarks: str
+    expired_at: Optional[str] = None
+    """购物金过期时间，仅购物金有效"""
+    key: Optional[str] = None
+    """幂等键，与 ``nonce`` 至少提供一个"""
+    nonce: Optional[str] = None
+    """调用方提供的唯一标识（如活动发放批次 + 记录 ID），与其他字段一起生成幂等键"""
+
+    @property
+    def idempotency_key(self) -> str:
+        if self.key:
+            return self.key
+        if not self.nonce:
+            # 仅凭调整内容无法区分两笔相同的合法调整，必须由调用方提供唯一标识
+            raise ValueError('Adjustment requires an explicit key or nonce')
+        return f'{self.kind}:{self.user_id}:{self.value}:{self.remarks}:{self.expired_at or ""}:{self.nonce}'
+
+    @property
+    def group_key(self) -> Tuple[str, float, str, Optional[str]]:
+        return self.kind, self.value, self.remarks, self.expired_at
+
+
+class LedgerJournal:
+    """
+    追加写入的 JSON Lines 幂等日志
+
+    每个幂等键的最后一条记录即为其当前状态。提交前先写入 ``submitting``，
+    因此进程在请求过程中中断时，该调整不会被自动重试，而是作为不确定状态交给人工核对。
+    崩溃时写了一半的最后一行在下次打开时被丢弃。
+    """
+
+    def __init__(self, path: str, fsync: bool = True):
+        """
+        Args:
+            path: 日志文件路径
+            fsync: 每次写入后是否同步到磁盘
+        """
+        self.path = path
+        self.fsync = fsync
+        self._entries: Dict[str, dict] = {}
+        if os.path.exists(path):
+            self._load()
+
+    def _load(self):
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            # 进程在写入过程中崩溃会留下不完整的最后一行：丢弃它，避免之后追加的记录与其拼接
+            with open(self.path, 'r+b') as f:
+                f.truncate(complete)
+        for line in data[:complete].decode('utf-8').splitlines():
+            if line.strip():
+                entry = json.loads(line)
+                self._entries[entry['key']] = entry
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def state(self, key: str) -> Optional[str]:
+        entry = self._entries.get(key)
+        return entry['state'] if entry else None
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._entries.get(key)
+
+    def record(self, keys: Iterable[str], state: str, job_id: Optional[str] = None):
+        """写入一批幂等键的状态"""
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for key in keys:
+                entry = {'key': key, 'state': state, 'job_id': job_id}
+                self._entries[key] = entry
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+
+@dataclass
+class LedgerResult:
+    """一次提交的结果"""
+    done: List[Adjustment] = field(default_factory=list)
+    failed: List[Tuple[Adjustment, Exception]] = field(default_factory=list)
+    skipped: List[Adjustment] = field(default_factory=list)
+    """日志中已完成而跳过的调整"""
+    uncertain: List[Adjustment] = field(default_factory=list)
+    """提交中断、遇到 5xx / 连接错误或跟踪任务时连接中断，无法确认是否已发放的调整"""
+    request_count: int = 0
+
+
+class LedgerSubmitter:
+    """
+    购物金 / 会员点数批量提交器
+
+    用法::
+
+        submitter = LedgerSubmitter(session, LedgerJournal('credits.journal'))
+        submitter.add_store_credit(user_id, 100, 'Campaign A', expired_at='2025-12-31', nonce='campaign-a')
+        submitter.add_member_point(user_id, 50, 'Campaign A', key=f'campaign-a:points:{user_id}')
+        result = await submitter.submit()
+    """
+
+    def __init__(
+            self,
+            session: aiohttp.ClientSession,
+            journal: LedgerJournal,
+            chunk_size: int = 1000,
+            concurrency: int = 4,
+            email_target: Optional[float] = None,
+            sms_notification_target: Optional[float] = None,
+            performer_id: Optional[str] = None,
+            **watcher_options
+    ):
+        """
+        Args:
+            session: 客户端会话
+            journal: 幂等日志
+            chunk_size: 单次批量请求的最大顾客数
+            concurrency: 最大并发请求数
+            email_target: 电子邮件通知设置，1 为不发送，3 为发送
+            sms_notification_target: 简讯通知设置，1 为不发送，2 为发送至验证手机，3 为全部发送
+            performer_id: 执行者 ID
+            **watcher_options: 传给 ``JobWatcher`` 的参数
+        """
+        self.session = session
+        self.journal = journal
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.email_target = email_target
+        self.sms_notification_target = sms_notification_target
+        self.performer_id = performer_id
+        self.watcher_options = watcher_options
+        self._pending: List[Adjustment] = []
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, adjustment: Adjustment):
+        """加入一个调整，调整必须带有 ``key`` 或 ``nonce``"""
+        if not adjustment.key and not adjustment.nonce:
+            raise ValueError('Adjustment requires an explicit key or nonce')
+        self._pending.append(adjustment)
+
+    def add_store_credit(self, user_id: str, value: float, remarks: str, expired_at: Optional[str] = None,
+                         key: Optional[str] = None, nonce: Optional[str] = None):
+        """加入购物金调整"""
+        self.add(Adjustment('store_credit', user_id, value, remarks, expired_at, key, nonce))
+
+    def add_member_point(self, user_id: str, value: float, remarks: str, key: Optional[str] = None,
+                         nonce: Optional[str] = None):
+        """加入会员点数调整"""
+        self.add(Adjustment('member_point', user_id, value, remarks, None, key, nonce))
+
+    def plan(self, adjustments: Iterable[Adjustment]) -> List[List[Adjustment]]:
+        """
+        将调整分组为最少的批量请求
+
+        同组内同一顾客在一次请求中只能出现一次，重复出现的调整会放到后续请求中。
+
+        Returns:
+            每个元素对应一次批量请求
+        """
+        groups: Dict[tuple, List[List[Adjustment]]] = {}
+        occurrences: Dict[tuple, int] = {}
+        for adjustment in adjustments:
+            # 同一顾客在同组中第 n 次出现的调整放入第 n 轮
+            occurrence_key = (adjustment.group_key, adjustment.user_id)
+            index = occurrences.get(occurrence_key, 0)
+            occurrences[occurrence_key] = index + 1
+            rounds = groups.setdefault(adjustment.group_key, [])
+            if index == len(rounds):
+                rounds.append([])
+            rounds[index].append(adjustment)
+        return [
+            batch
+            for rounds in groups.values()
+            for adjustments_round in rounds
+            for batch in chunked(adjustments_round, self.chunk_size)
+        ]
+
+    def _body(self, batch: List[Adjustment]):
+        first = batch[0]
+        options = {
+            'user_ids': [a.user_id for a in batch],
+            'value': first.value,
+            'remarks': first.remarks,
+            'performer_id': self.performer_id,
+            'email_target': self.email_target,
+            'sms_notification_target': self.sms_notification_target,
+        }
+        if first.kind == 'store_credit':
+            return bulk_update_store_credits, bulk_update_store_credits.Body(expired_at=first.expired_at, **options)
+        return bulk_update_member_points, bulk_update_member_points.Body(**options)
+
+    async def submit(self) -> LedgerResult:
+        """
+        提交所有待处理的调整并等待任务完成
+
+        日志中已是 ``done``、``submitted`` 的调整不会重新提交，``submitted`` 的任务会继续跟踪；
+        ``submitting`` 以及任务执行失败的调整归入 ``uncertain``；请求被拒绝（400 / 422）的调整会重新提交。
+        请求遇到 5xx、连接中断或超时时无法确认是否已发放，保留 ``submitting`` 状态并归入 ``uncertain``。
+
+        Returns:
+            LedgerResult: 提交结果
+        """
+        pending, self._pending = self._pending, []
+        result = LedgerResult()
+        to_submit: List[Adjustment] = []
+        resumed: Dict[str, List[Adjustment]] = {}
+        seen = set()
+        for adjustment in pending:
+            key = adjustment.idempotency_key
+            if key in seen:
+                continue
+            seen.add(key)
+            state = self.journal.state(key)
+            if state == DONE:
+                result.skipped.append(adjustment)
+            elif state == SUBMITTING or (state == FAILED and self.journal.get(key).get('job_id')):
+                # 请求中断或任务失败时无法确认每个顾客是否已发放
+                result.uncertain.append(adjustment)
+            elif state == SUBMITTED and self.journal.get(key).get('job_id'):
+                resumed.setdefault(self.journal.get(key)['job_id'], []).append(adjustment)
+            else:
+                to_submit.append(adjustment)
+
+        async with JobWatcher(self.session, **self.watcher_options) as watcher:
+            async def _track(job_id: str, batch: List[Adjustment]):
+                keys = [a.idempotency_key for a in batch]
+                try:
+                    await watcher.watch(job_id).wait()
+                except ShoplineJobError as e:
+                    self.journal.record(keys, FAILED, job_id)
+                    result.failed.extend((a, e) for a in batch)
+                except ShoplineAPIError as e:
+                    # 查询任务失败时保留 submitted 状态，下次运行继续跟踪
+                    result.failed.extend((a, e) for a in batch)
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    # 轮询中断时任务仍可能在执行，保留 submitted 状态，下次运行继续跟踪
+                    result.uncertain.extend(batch)
+                else:
+                    self.journal.record(keys, DONE, job_id)
+                    result.done.extend(batch)
+
+            async def _submit(batch: List[Adjustment]):
+                keys = [a.idempotency_key for a in batch]
+                api, body = self._body(batch)
+                self.journal.record(keys, SUBMITTING)
+                result.request_count += 1
+                try:
+                    response = await api.call(self.session, body=body)
+                except ShoplineAPIError as e:
+                    if e.status_code not in _REJECTED_STATUS_CODES:
+                        # 服务端可能已经处理，保留 submitting 状态交给人工核对
+                        result.uncertain.extend(batch)
+                        return
+                    # 请求被服务端明确拒绝，可以安全重试
+                    self.journal.record(keys, FAILED)
+                    result.failed.extend((a, e) for a in batch)
+                    return
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    result.uncertain.extend(batch)
+                    return
+                if not response.job_id:
+                    self.journal.record(keys, DONE)
+                    result.done.extend(batch)
+                    return
+                self.journal.record(keys, SUBMITTED, response.job_id)
+                await _track(response.job_id, batch)
+
+            await gather_with_concurrency(
+                self.concurrency,
+                *(_track(job_id, batch) for job_id, batch in resumed.items()),
+                *(_submit(batch) for batch in self.plan(to_submit))
+            )
+        return result
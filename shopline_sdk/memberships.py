@@ -0,0 +1,339 @@
+"""
+顾客分群成员
+
+``CustomerGroupMemberships`` 并发拉取多个分群（含子分群）的顾客 ID，以有序的整数编号数组保存：
+每个顾客 ID 在引擎内只保存一次，分群成员为排序后的 uint32 编号，交集、并集、差集按有序数组计算
+（安装了 NumPy 时向量化）。快照可以保存到文件，下次运行时与新快照比较，只处理成员变化。
+
+用法::
+
+    memberships = CustomerGroupMemberships()
+    async with client.new_session() as session:
+        await memberships.load(session, ['group_a', 'group_b', child_key('group_a', 'child_1')])
+    audience = memberships.intersection('group_a', 'group_b') - memberships.group('group_c')
+
+    previous = memberships.load_snapshot('groups.snapshot.gz')
+    for key, change in memberships.diff(previous).items():
+        print(key, len(change.added), len(change.removed))
+    memberships.save('groups.snapshot.gz')
+"""
+
+import gzip
+import json
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+from shopline_sdk.apis.customer_group_children import get_children_group_of_the_customer_group
+from shopline_sdk.apis.customer_group_children import \
+    get_customer_ids_of_the_specific_customer_group as get_child_customer_ids
+from shopline_sdk.apis.customer_groups import get_customer_ids_of_the_specific_customer_group as get_customer_ids
+from shopline_sdk.helper import gather_with_concurrency
+
+SNAPSHOT_VERSION = 1
+
+GroupKey = str
+"""分群键：顶层分群为分群 ID，子分群为 ``<父分群 ID>/<子分群 ID>``"""
+
+
+def child_key(parent_id: str, child_id: str) -> GroupKey:
+    """子分群的分群键"""
+    return f'{parent_id}/{child_id}'
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+class MemberSet:
+    """不可变的分群成员集合，元素为顾客 ID"""
+
+    __slots__ = ('_index', '_codes')
+
+    def __init__(self, index: 'CustomerGroupMemberships', codes: Any):
+        """
+        Args:
+            index: 顾客 ID 编号所属的引擎
+            codes: 排序且去重的顾客编号（NumPy uint32 数组或 ``array('I')``）
+        """
+        self._index = index
+        self._codes = codes
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __bool__(self) -> bool:
+        return len(self._codes) > 0
+
+    def __iter__(self) -> Iterator[str]:
+        ids = self._index._ids
+        return (ids[code] for code in self._codes.tolist())
+
+    def __contains__(self, customer_id: str) -> bool:
+        code = self._index._codes.get(customer_id)
+        if code is None:
+            return False
+        np = _numpy()
+        if np is not None and not isinstance(self._codes, array):
+            position = int(np.searchsorted(self._codes, code))
+        else:
+            position = bisect_left(self._codes, code)
+        return position < len(self._codes) and self._codes[position] == code
+
+    def _other(self, other: Any) -> 'MemberSet':
+        if not isinstance(other, MemberSet):
+            return NotImplemented
+        if other._index is not self._index:
+            raise ValueError('MemberSets from different CustomerGroupMemberships cannot be combined')
+        return other
+
+    def _combine(self, other: Any, operation: str) -> 'MemberSet':
+        if self._other(other) is NotImplemented:
+            return NotImplemented
+        return MemberSet(self._index, _set_operation(self._codes, other._codes, operation))
+
+    def __and__(self, other: 'MemberSet') -> 'MemberSet':
+        return self._combine(other, 'intersection')
+
+    def __or__(self, other: 'MemberSet') -> 'MemberSet':
+        return self._combine(other, 'union')
+
+    def __sub__(self, other: 'MemberSet') -> 'MemberSet':
+        return self._combine(other, 'difference')
+
+    def __xor__(self, other: 'MemberSet') -> 'MemberSet':
+        return self._combine(other, 'symmetric_difference')
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, MemberSet) or other._index is not self._index:
+            return NotImplemented
+        return len(self) == len(other) and self._codes.tolist() == other._codes.tolist()
+
+    def __repr__(self) -> str:
+        return f'MemberSet({len(self)} customers)'
+
+    def ids(self) -> List[str]:
+        """顾客 ID 列表"""
+        return list(self)
+
+
+def _set_operation(left: Any, right: Any, operation: str) -> Any:
+    np = _numpy()
+    if np is not None:
+        if operation == 'union':
+            # 两段有序数组拼接后，稳定排序（timsort）可以识别已排序的区段，接近线性时间
+            merged = np.concatenate((left, _set_operation(right, left, 'difference')))
+            merged.sort(kind='stable')
+            return merged
+        if operation == 'symmetric_difference':
+            return np.setxor1d(left, right, assume_unique=True)
+        # 两侧均已排序：在 right 中二分查找 left 的每个元素，无需合并后重新排序
+        if len(right):
+            positions = np.minimum(np.searchsorted(right, left), len(right) - 1)
+            found = right[positions] == left
+        else:
+            found = np.zeros(len(left), dtype=bool)
+        return left[found] if operation == 'intersection' else left[~found]
+    result = getattr(set(left), operation)(right)
+    return array('I', sorted(result))
+
+
+@dataclass(frozen=True)
+class MembershipDiff:
+    """分群在两个快照间的成员变化"""
+    added: MemberSet
+    removed: MemberSet
+
+
+class CustomerGroupMemberships:
+    """分群成员引擎"""
+
+    def __init__(self, concurrency: int = 8):
+        """
+        Args:
+            concurrency: 同时拉取的分群数
+        """
+        self.concurrency = concurrency
+        self.groups: Dict[GroupKey, MemberSet] = {}
+        """分群键 -> 当前成员"""
+        self._codes: Dict[str, int] = {}
+        self._ids: List[str] = []
+
+    def _encode(self, customer_ids: Iterable[str]) -> Any:
+        codes, ids = self._codes, self._ids
+        encoded = []
+        for customer_id in customer_ids:
+            code = codes.get(customer_id)
+            if code is None:
+                code = codes[customer_id] = len(ids)
+                ids.append(customer_id)
+            encoded.append(code)
+        np = _numpy()
+        if np is not None:
+            return np.unique(np.asarray(encoded, dtype=np.uint32))
+        return array('I', sorted(set(encoded)))
+
+    def member_set(self, customer_ids: Iterable[str]) -> MemberSet:
+        """由顾客 ID 创建可与分群运算的集合"""
+        return MemberSet(self, self._encode(customer_ids))
+
+    async def fetch(self, session: Any, group_id: str, parent_id: Optional[str] = None) -> MemberSet:
+        """
+        按 ``last_id`` 游标拉取一个分群的全部顾客 ID
+
+        Args:
+            session: 客户端会话
+            group_id: 分群 ID
+            parent_id: 子分群所属的父分群 ID，None 表示顶层分群
+
+        Returns:
+            分群成员
+        """
+        customer_ids: List[str] = []
+        previous_id = None
+        while True:
+            if parent_id is None:
+                response = await get_customer_ids.call(
+                    session, id=group_id, params=get_customer_ids.Params(previous_id=previous_id)
+                )
+            else:
+                response = await get_child_customer_ids.call(
+                    session, id=group_id, parentCustomerGroupId=parent_id,
+                    params=get_child_customer_ids.Params(previous_id=previous_id)
+                )
+            if not response.customer_ids:
+                break
+            customer_ids.extend(response.customer_ids)
+            if not response.last_id or response.last_id == previous_id:
+                break
+            previous_id = response.last_id
+        return self.member_set(customer_ids)
+
+    async def load(self, session: Any, keys: Sequence[GroupKey]) -> Dict[GroupKey, MemberSet]:
+        """
+        并发拉取多个分群并更新 ``groups``
+
+        Args:
+            session: 客户端会话
+            keys: 分群键，子分群使用 ``child_key(parent_id, child_id)``
+
+        Returns:
+            本次拉取的分群成员
+        """
+
+        async def _fetch(key: GroupKey) -> MemberSet:
+            parent_id, _, child_id = key.rpartition('/')
+            if parent_id:
+                return await self.fetch(session, child_id, parent_id)
+            return await self.fetch(session, key)
+
+        results = await gather_with_concurrency(self.concurrency, *(_fetch(key) for key in keys))
+        loaded = dict(zip(keys, results))
+        self.groups.update(loaded)
+        return loaded
+
+    async def load_children(self, session: Any, parent_id: str) -> Dict[GroupKey, MemberSet]:
+        """拉取父分群下全部子分群的成员"""
+        keys = []
+        page = 1
+        while True:
+            response = await get_children_group_of_the_customer_group.call(
+                session, parentCustomerGroupId=parent_id,
+                params=get_children_group_of_the_customer_group.Params(page=page)
+            )
+            keys.extend(child_key(parent_id, child.id) for child in response.children or () if child.id)
+            pagination = response.pagination
+            if not response.children or pagination is None or pagination.total_pages is None \
+                    or page >= pagination.total_pages:
+                break
+            page += 1
+        return await self.load(session, keys)
+
+    def group(self, key: GroupKey) -> MemberSet:
+        """分群的当前成员，未加载的分群抛出 ``KeyError``"""
+        return self.groups[key]
+
+    def union(self, *keys: GroupKey) -> MemberSet:
+        """属于任一分群的顾客"""
+        result = MemberSet(self, self._encode(()))
+        for key in keys:
+            result = result | self.groups[key]
+        return result
+
+    def intersection(self, *keys: GroupKey) -> MemberSet:
+        """同时属于全部分群的顾客"""
+        if not keys:
+            raise ValueError('At least one group is required')
+        # 从最小的分群开始，中间结果尽快缩小
+        sets = sorted((self.groups[key] for key in keys), key=len)
+        result = sets[0]
+        for member_set in sets[1:]:
+            result = result & member_set
+        return result
+
+    def difference(self, key: GroupKey, *others: GroupKey) -> MemberSet:
+        """属于 ``key`` 但不属于其他分群的顾客"""
+        return self.groups[key] - self.union(*others) if others else self.groups[key]
+
+    def snapshot(self) -> Dict[GroupKey, MemberSet]:
+        """当前各分群成员的快照（成员集合不可变，快照不受之后加载的影响）"""
+        return dict(self.groups)
+
+    def diff(self, previous: Dict[GroupKey, MemberSet],
+             current: Optional[Dict[GroupKey, MemberSet]] = None) -> Dict[GroupKey, MembershipDiff]:
+        """
+        比较两个快照，只返回成员有变化的分群
+
+        Args:
+            previous: 旧快照，例如 ``load_snapshot`` 读取的上次运行结果
+            current: 新快照，默认为当前 ``groups``
+
+        Returns:
+            分群键 -> 新增与移除的成员；只出现在一侧的分群视为全部新增或全部移除
+        """
+        current = self.groups if current is None else current
+        empty = MemberSet(self, self._encode(()))
+        changes = {}
+        for key in dict.fromkeys([*previous, *current]):
+            before, after = previous.get(key, empty), current.get(key, empty)
+            added, removed = after - before, before - after
+            if added or removed:
+                changes[key] = MembershipDiff(added, removed)
+        return changes
+
+    def save(self, path: str, snapshot: Optional[Dict[GroupKey, MemberSet]] = None):
+        """
+        将快照保存为 gzip 压缩的 JSON Lines 文件，每行一个分群
+
+        Args:
+            path: 文件路径
+            snapshot: 要保存的快照，默认为当前 ``groups``
+        """
+        snapshot = self.groups if snapshot is None else snapshot
+        with gzip.open(path, 'wt', encoding='utf-8') as f:
+            f.write(json.dumps({'version': SNAPSHOT_VERSION}) + '\n')
+            for key, member_set in snapshot.items():
+                f.write(json.dumps({'key': key, 'customer_ids': sorted(member_set)}, separators=(',', ':')) + '\n')
+
+    def load_snapshot(self, path: str) -> Dict[GroupKey, MemberSet]:
+        """
+        读取 ``save`` 保存的快照，成员编号与本引擎共享，可直接与当前分群运算或比较
+
+        Args:
+            path: 文件路径
+        """
+        snapshot = {}
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+            if header.get('version') != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported membership snapshot version: {header.get('version')}")
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    snapshot[record['key']] = self.member_set(record['customer_ids'])
+        return snapshot
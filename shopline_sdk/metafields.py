@@ -0,0 +1,289 @@
+"""
+批量写入 Metafield
+
+商品、顾客、订单、订单商品、购物车商品和商户各自有 ``bulk_create/update/delete`` 的
+metafield 与 app_metafield 接口。``MetafieldWriter`` 接收任意顺序的写入操作，将同一 metafield 的多次写入
+按调用顺序合并为一个最终操作，再按所属资源与操作分组、分块后并发提交。
+"""
+
+import asyncio
+import importlib
+import json
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+from pydantic import ValidationError
+from typing_extensions import Literal
+
+from shopline_sdk.exceptions import ShoplineAPIError
+from shopline_sdk.helper import chunked
+
+OwnerType = Literal['product', 'customer', 'order', 'order_item', 'cart_item', 'merchant']
+Operation = Literal['create', 'update', 'delete']
+
+# 资源类型 -> 接口所在包（metafield 与 app_metafield）
+_OWNER_PACKAGES: Dict[str, Tuple[str, str]] = {
+    'product': ('product_metafields', 'product_app_metafields'),
+    'customer': ('customer_metafields', 'customer_app_metafields'),
+    'order': ('order_metafields', 'order_app_metafields'),
+    'order_item': ('order_item_metafields', 'order_item_app_metafields'),
+    'cart_item': ('cart_item_metafields', 'cart_item_app_metafields'),
+    'merchant': ('merchant_metafields', 'merchant_app_metafields'),
+}
+
+
+def _collapse(previous: 'MetafieldMutation', mutation: 'MetafieldMutation') -> Optional['MetafieldMutation']:
+    """合并同一 metafield 的先后两个写入操作，返回最终操作；None 表示两者抵消"""
+    if previous.operation == 'create':
+        if mutation.operation == 'delete':
+            # 尚未创建的 metafield 无需删除
+            return None
+        return replace(mutation, operation='create')
+    if previous.operation == 'delete' and mutation.operation == 'create':
+        # 先删后建等同于覆盖已有的值
+        return replace(mutation, operation='update', id=mutation.id or previous.id)
+    return replace(mutation, id=mutation.id or previous.id)
+
+
+def infer_field_type(value: Any) -> str:
+    """根据值推断 metafield 的 ``field_type``"""
+    if isinstance(value, bool):
+        return 'boolean'
+    if isinstance(value, int):
+        return 'number_integer'
+    if isinstance(value, float):
+        return 'number_decimal'
+    if isinstance(value, (dict, list)):
+        return 'json'
+    if isinstance(value, str) and ('\n' in value or len(value) > 50):
+        return 'multi_line_text_field'
+    return 'single_line_text_field'
+
+
+def get_bulk_api(owner_type: OwnerType, operation: Operation, app: bool = False):
+    """
+    返回资源类型与操作对应的批量接口模块
+
+    Args:
+        owner_type: 资源类型
+        operation: 操作类型
+        app: 是否为 app_metafield
+
+    Returns:
+        接口模块，例如 ``shopline_sdk.apis.product_metafields.bulk_create_metafield``
+    """
+    if owner_type not in _OWNER_PACKAGES:
+        raise ValueError(f'Unsupported owner type: {owner_type}')
+    package = _OWNER_PACKAGES[owner_type][1 if app else 0]
+    name = f"bulk_{operation}_{'app_' if app else ''}metafield"
+    return importlib.import_module(f'shopline_sdk.apis.{package}.{name}')
+
+
+def _item_schema(mutation: 'MetafieldMutation'):
+    return get_bulk_api(mutation.owner_type, mutation.operation, mutation.app).ItemsItemSchema
+
+
+@dataclass(frozen=True)
+class MetafieldMutation:
+    """单个 metafield 写入操作"""
+    owner_type: OwnerType
+    owner_id: Optional[str]
+    """资源 ID；订单商品与购物车商品为订单 / 购物车 ID，商户为 None"""
+    operation: Operation
+    key: str
+    namespace: Optional[str] = None
+    value: Any = None
+    field_type: Optional[str] = None
+    id: Optional[str] = None
+    """Metafield Value ID"""
+    resource_id: Optional[str] = None
+    """订单商品 / 购物车商品 ID"""
+    app: bool = False
+
+    @property
+    def group_key(self) -> Tuple[str, Optional[str], bool]:
+        return self.owner_type, self.owner_id, self.app
+
+    @property
+    def identity(self) -> Tuple[Optional[str], Optional[str], str]:
+        return self.resource_id, self.namespace, self.key
+
+    def to_item(self) -> Dict[str, Any]:
+        item = {
+            'id': self.id,
+            'namespace': self.namespace,
+            'key': self.key,
+            'resource_id': self.resource_id,
+        }
+        if self.operation != 'delete':
+            field_type = self.field_type or infer_field_type(self.value)
+            value = self.value
+            if field_type == 'json' and isinstance(value, (dict, list)):
+                # json 类型的值是 JSON 字符串，列表无法直接通过请求体校验
+                value = json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+            item['field_type'] = field_type
+            item['field_value'] = value
+        return {k: v for k, v in item.items() if v is not None}
+
+
+@dataclass
+class MetafieldWriteResult:
+    """一次 flush 的结果"""
+    succeeded: List[MetafieldMutation] = field(default_factory=list)
+    failed: List[Tuple[MetafieldMutation, Exception]] = field(default_factory=list)
+    """写入失败的操作及对应异常（API 错误、连接错误或请求体校验错误）"""
+    request_count: int = 0
+
+
+class MetafieldWriter:
+    """
+    Metafield 批量写入器
+
+    用法::
+
+        writer = MetafieldWriter()
+        writer.update('product', product_id, 'erp', 'supplier', 'ACME')
+        writer.create('order_item', order_id, 'erp', 'bin', 'A-01', resource_id=item_id)
+        result = await writer.flush(session)
+    """
+
+    def __init__(self, chunk_size: int = 50, concurrency: int = 8):
+        """
+        Args:
+            chunk_size: 单次批量请求的最大条目数
+            concurrency: 最大并发请求数
+        """
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        # (资源类型, 资源 ID, app) -> 标识 -> 合并后的最终写入操作，提交完成后才移除
+        self._pending: Dict[Tuple[str, Optional[str], bool], Dict[tuple, MetafieldMutation]] = {}
+        # 正在提交的操作，之后的写入不能与其合并
+        self._in_flight: Dict[int, MetafieldMutation] = {}
+
+    def __len__(self) -> int:
+        return sum(len(mutations) for mutations in self._pending.values())
+
+    def add(self, mutation: MetafieldMutation):
+        """
+        加入一个写入操作
+
+        同一 metafield 的多次写入按调用顺序合并为一个最终操作：先创建后删除时两者抵消，先删除后创建合并为更新，
+        先创建后更新合并为使用新值的创建，其余情况后写覆盖先写。合并后的操作不符合接口请求体时抛出
+        ``pydantic.ValidationError``，已缓冲的操作保持不变。
+        """
+        if mutation.owner_type == 'merchant':
+            mutation = replace(mutation, owner_id=None)
+        elif not mutation.owner_id:
+            raise ValueError(f'owner_id is required for {mutation.owner_type} metafields')
+        previous = self._pending.get(mutation.group_key, {}).get(mutation.identity)
+        if previous is not None and id(previous) not in self._in_flight:
+            mutation = _collapse(previous, mutation)
+            if mutation is None:
+                del self._pending[previous.group_key][previous.identity]
+                return
+        _item_schema(mutation)(**mutation.to_item())
+        self._pending.setdefault(mutation.group_key, {})[mutation.identity] = mutation
+
+    def discard(self, owner_type: OwnerType, owner_id: Optional[str], resource_id: Optional[str] = None):
+        """
+        丢弃资源上未提交的写入操作（metafield 与 app_metafield）
+
+        Args:
+            owner_type: 资源类型
+            owner_id: 资源 ID
+            resource_id: 订单商品 / 购物车商品 ID，None 表示丢弃整个资源的操作
+        """
+        for app in (False, True):
+            mutations = self._pending.get((owner_type, owner_id, app))
+            if not mutations:
+                continue
+            for identity in [identity for identity in mutations if resource_id in (None, identity[0])]:
+                del mutations[identity]
+
+    def create(self, owner_type: OwnerType, owner_id: Optional[str], namespace: Optional[str], key: str, value: Any,
+               **kwargs):
+        """加入创建操作，``kwargs`` 可包含 ``field_type``、``resource_id``、``app``"""
+        self.add(MetafieldMutation(owner_type, owner_id, 'create', key, namespace, value, **kwargs))
+
+    def update(self, owner_type: OwnerType, owner_id: Optional[str], namespace: Optional[str], key: str, value: Any,
+               **kwargs):
+        """加入更新操作，``kwargs`` 可包含 ``id``、``field_type``、``resource_id``、``app``"""
+        self.add(MetafieldMutation(owner_type, owner_id, 'update', key, namespace, value, **kwargs))
+
+    def delete(self, owner_type: OwnerType, owner_id: Optional[str], namespace: Optional[str], key: str, **kwargs):
+        """加入删除操作，``kwargs`` 可包含 ``id``、``resource_id``、``app``"""
+        self.add(MetafieldMutation(owner_type, owner_id, 'delete', key, namespace, **kwargs))
+
+    async def _submit(self, session: aiohttp.ClientSession, mutations: List[MetafieldMutation], items: List[Any]):
+        first = mutations[0]
+        api = get_bulk_api(first.owner_type, first.operation, first.app)
+        body = api.Body(items=items)
+        if first.owner_type == 'merchant':
+            return await api.call(session, body=body)
+        return await api.call(session, first.owner_id, body=body)
+
+    def _settle(self, mutations: List[MetafieldMutation]):
+        """提交结束后移除操作；提交期间同一 metafield 又有新的写入时保留新写入"""
+        for mutation in mutations:
+            self._in_flight.pop(id(mutation), None)
+            group = self._pending.get(mutation.group_key)
+            if group is not None and group.get(mutation.identity) is mutation:
+                del group[mutation.identity]
+                if not group:
+                    del self._pending[mutation.group_key]
+
+    async def flush(self, session: aiohttp.ClientSession) -> MetafieldWriteResult:
+        """
+        提交所有待写入的操作
+
+        每个 metafield 只剩一个最终操作，各资源、各操作的请求互不依赖，全部并发执行。
+        操作在所属请求结束（成功或失败）后才从缓冲区移除，请求前被中断的操作仍可再次提交。
+
+        Args:
+            session: 客户端会话
+
+        Returns:
+            MetafieldWriteResult: 写入结果
+        """
+        result = MetafieldWriteResult()
+        semaphore = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def _submit_chunk(chunk: List[MetafieldMutation]):
+            async with semaphore:
+                valid, items = [], []
+                for mutation in chunk:
+                    try:
+                        items.append(_item_schema(mutation)(**mutation.to_item()))
+                    except ValidationError as e:
+                        result.failed.append((mutation, e))
+                    else:
+                        valid.append(mutation)
+                try:
+                    if valid:
+                        result.request_count += 1
+                        await self._submit(session, valid, items)
+                except (ShoplineAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    result.failed.extend((mutation, e) for mutation in valid)
+                else:
+                    result.succeeded.extend(valid)
+                self._settle(chunk)
+
+        chunks = []
+        for mutations in self._pending.values():
+            by_operation: Dict[str, List[MetafieldMutation]] = {}
+            for mutation in mutations.values():
+                if id(mutation) in self._in_flight:
+                    continue
+                self._in_flight[id(mutation)] = mutation
+                by_operation.setdefault(mutation.operation, []).append(mutation)
+            for operation_mutations in by_operation.values():
+                chunks.extend(chunked(operation_mutations, self.chunk_size))
+        try:
+            await asyncio.gather(*(_submit_chunk(chunk) for chunk in chunks))
+        finally:
+            # 未完成的请求（例如被取消）不再视为提交中，之后的写入可以继续与其合并
+            for chunk in chunks:
+                for mutation in chunk:
+                    self._in_flight.pop(id(mutation), None)
+        return result
@@ -0,0 +1,190 @@
+"""
+请求指标
+
+``MetricsHook`` 是指标钩子接口；``InMemoryMetrics`` 在进程内按操作汇总请求数、状态码分类、
+各阶段耗时直方图与响应字节数，并可导出为 Prometheus 文本格式。
+
+用法::
+
+    metrics = InMemoryMetrics()
+    client = ShoplineAPIClient(token, hooks=[metrics])
+    ...
+    print(metrics.render_prometheus())
+"""
+
+import abc
+import bisect
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from shopline_sdk.instrumentation import PHASES, RequestHook, RequestRecord
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+DEFAULT_SIZE_BUCKETS = (
+    256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216
+)
+
+
+class Histogram:
+    """固定分桶的直方图"""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.sum / self.count if self.count else None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """按分桶线性插值估算分位数"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def cumulative_counts(self) -> List[Tuple[str, int]]:
+        """Prometheus 风格的累计分桶计数"""
+        result = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            result.append((repr(float(bound)), cumulative))
+        result.append(('+Inf', self.count))
+        return result
+
+
+class MetricsHook(RequestHook, abc.ABC):
+    """指标钩子接口，子类实现 ``observe``"""
+
+    def on_request_end(self, record: RequestRecord):
+        self.observe(record)
+
+    @abc.abstractmethod
+    def observe(self, record: RequestRecord):
+        """处理一次结束的请求"""
+
+
+class OperationStats:
+    """单个操作的汇总指标"""
+
+    def __init__(self, latency_buckets: Sequence[float], size_buckets: Sequence[float]):
+        self.requests: Dict[str, int] = {}
+        """状态码分类 -> 请求数"""
+        self.duration = Histogram(latency_buckets)
+        self.phases: Dict[str, Histogram] = {phase: Histogram(latency_buckets) for phase in PHASES}
+        self.response_bytes = Histogram(size_buckets)
+
+    @property
+    def count(self) -> int:
+        return sum(self.requests.values())
+
+    def to_dict(self) -> dict:
+        return {
+            'requests': dict(self.requests),
+            'duration': {'count': self.duration.count, 'mean': self.duration.mean,
+                         'p50': self.duration.quantile(0.5), 'p99': self.duration.quantile(0.99)},
+            'phases': {phase: {'count': histogram.count, 'sum': histogram.sum, 'mean': histogram.mean}
+                       for phase, histogram in self.phases.items() if histogram.count},
+            'response_bytes': {'count': self.response_bytes.count, 'sum': self.response_bytes.sum},
+        }
+
+
+class InMemoryMetrics(MetricsHook):
+    """进程内指标汇总"""
+
+    def __init__(
+            self,
+            latency_buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS,
+            size_buckets: Sequence[float] = DEFAULT_SIZE_BUCKETS
+    ):
+        self.latency_buckets = latency_buckets
+        self.size_buckets = size_buckets
+        self.operations: Dict[str, OperationStats] = {}
+        """路由（如 ``GET /orders/{id}``）-> 汇总指标"""
+
+    def observe(self, record: RequestRecord):
+        stats = self.operations.get(record.route)
+        if stats is None:
+            stats = self.operations[record.route] = OperationStats(self.latency_buckets, self.size_buckets)
+        stats.requests[record.status_class] = stats.requests.get(record.status_class, 0) + 1
+        if record.duration is not None:
+            stats.duration.observe(record.duration)
+        for phase, seconds in record.phases.items():
+            stats.phases[phase].observe(seconds)
+        if record.response_bytes:
+            stats.response_bytes.observe(record.response_bytes)
+
+    def reset(self):
+        self.operations.clear()
+
+    def snapshot(self) -> Dict[str, dict]:
+        """返回各操作指标的字典快照"""
+        return {route: stats.to_dict() for route, stats in self.operations.items()}
+
+    def render_prometheus(self, prefix: str = 'shopline_sdk') -> str:
+        """
+        导出为 Prometheus 文本格式
+
+        Args:
+            prefix: 指标名前缀
+
+        Returns:
+            Prometheus exposition 格式的文本
+        """
+        lines = [
+            f'# HELP {prefix}_requests_total Number of Shopline API requests.',
+            f'# TYPE {prefix}_requests_total counter',
+        ]
+        for route, stats in sorted(self.operations.items()):
+            for status_class, count in sorted(stats.requests.items()):
+                lines.append(
+                    f'{prefix}_requests_total{{operation="{_escape(route)}",status="{status_class}"}} {count}'
+                )
+
+        def _histogram(name: str, help_text: str, series: List[Tuple[Dict[str, str], Histogram]]):
+            lines.append(f'# HELP {prefix}_{name} {help_text}')
+            lines.append(f'# TYPE {prefix}_{name} histogram')
+            for labels, histogram in series:
+                if not histogram.count:
+                    continue
+                label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+                for bound, count in histogram.cumulative_counts():
+                    lines.append(f'{prefix}_{name}_bucket{{{label_text},le="{bound}"}} {count}')
+                lines.append(f'{prefix}_{name}_sum{{{label_text}}} {histogram.sum}')
+                lines.append(f'{prefix}_{name}_count{{{label_text}}} {histogram.count}')
+
+        operations = sorted(self.operations.items())
+        _histogram('request_duration_seconds', 'Wall time of Shopline API requests.',
+                   [({'operation': route}, stats.duration) for route, stats in operations])
+        _histogram('request_phase_seconds', 'Time spent in each phase of Shopline API requests.',
+                   [({'operation': route, 'phase': phase}, histogram)
+                    for route, stats in operations for phase, histogram in stats.phases.items()])
+        _histogram('response_size_bytes', 'Response body size of Shopline API requests.',
+                   [({'operation': route}, stats.response_bytes) for route, stats in operations])
+        return '\n'.join(lines) + '\n'
+
+    async def prometheus_handler(self, request):
+        """可挂载到 ``aiohttp.web`` 应用的 ``/metrics`` 处理函数"""
+        return web.Response(text=self.render_prometheus(), content_type='text/plain', charset='utf-8')
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,319 @@
+"""
+本地模拟 Shopline API 服务器
+
+路由来自 ``shopline_sdk/apis`` 下的接口定义（见 ``shopline_sdk.operations``），响应数据由
+``FixtureFactory`` 按各接口的返回模型生成，可通过模型校验。支持页码分页与游标分页，
+并可注入延迟、429（带 ``Retry-After``）、5xx 错误与连接中断，用于离线、可复现的性能测试。
+
+用法::
+
+    async with MockShoplineServer(total_count=10000, faults=FaultConfig(latency=0.05)) as server:
+        client = ShoplineAPIClient('token', base_url=server.base_url)
+        ...
+
+命令行::
+
+    python -m shopline_sdk.mock_server --port 8080 --total-count 10000 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import importlib
+import inspect
+import math
+import random
+import typing
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Type
+
+from aiohttp import web
+from pydantic import BaseModel
+
+from shopline_sdk.fixtures import FixtureFactory, object_id, object_id_index
+from shopline_sdk.operations import Operation, get_operations
+
+
+@dataclass
+class FaultConfig:
+    """故障注入配置，各比例取值 0 ~ 1"""
+    latency: float = 0.0
+    """每个请求的固定延迟（秒）"""
+    jitter: float = 0.0
+    """在固定延迟上附加的 0 ~ jitter 秒随机延迟"""
+    rate_limit_rate: float = 0.0
+    """返回 429 的比例"""
+    retry_after: float = 1.0
+    """429 响应的 ``Retry-After``（秒），响应头中向上取整为整数"""
+    error_rate: float = 0.0
+    """返回 5xx 的比例"""
+    error_status: int = 500
+    drop_rate: float = 0.0
+    """直接断开连接的比例"""
+    operations: Optional[typing.Set[str]] = field(default=None)
+    """只对这些操作注入故障，None 表示全部"""
+
+    def applies_to(self, operation: Operation) -> bool:
+        return self.operations is None or operation.name in self.operations
+
+
+def _unwrap(annotation: Any) -> Any:
+    """去掉 Optional 包装"""
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _list_item_model(model: Type[BaseModel], name: str) -> Optional[Type[BaseModel]]:
+    field_info = model.model_fields.get(name)
+    if field_info is None:
+        return None
+    annotation = _unwrap(field_info.annotation)
+    if typing.get_origin(annotation) in (list, typing.List):
+        item = typing.get_args(annotation)[0]
+        if isinstance(item, type) and issubclass(item, BaseModel):
+            return item
+    return None
+
+
+class MockShoplineServer:
+    """本地模拟 Shopline API 服务器"""
+
+    def __init__(
+            self,
+            total_count: int = 100,
+            seed: int = 0,
+            faults: Optional[FaultConfig] = None,
+            base_path: str = '/v1',
+            default_per_page: int = 24,
+            compress: bool = True
+    ):
+        """
+        Args:
+            total_count: 各列表接口的数据总量
+            seed: 数据生成与故障注入的随机种子
+            faults: 故障注入配置
+            base_path: API 基础路径
+            default_per_page: 未指定 ``per_page`` / ``limit`` 时的每页数量
+            compress: 客户端声明 ``Accept-Encoding`` 时是否压缩响应
+        """
+        self.total_count = total_count
+        self.faults = faults or FaultConfig()
+        self.base_path = '/' + base_path.strip('/') if base_path.strip('/') else ''
+        self.default_per_page = default_per_page
+        self.compress = compress
+        self.factory = FixtureFactory(seed=seed)
+        self.request_counts: Counter = Counter()
+        """操作名 -> 请求次数"""
+        self._random = random.Random(seed)
+        self._overrides: Dict[str, Callable[[web.Request], Any]] = {}
+        self._return_types: Dict[str, Any] = {}
+        self._runner: Optional[web.AppRunner] = None
+        self.base_url: Optional[str] = None
+        self.app = web.Application(middlewares=[self._fault_middleware])
+        self._add_routes()
+
+    async def __aenter__(self) -> 'MockShoplineServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _add_routes(self):
+        # 字面量段越多越优先注册，使 /orders/search 先于 /orders/{id} 匹配
+        operations = sorted(
+            get_operations(),
+            key=lambda op: (len(op.param_names), -len(op.path.strip('/').split('/')))
+        )
+        for operation in operations:
+            self.app.router.add_route(
+                operation.method, self.base_path + operation.path, self._make_handler(operation)
+            )
+
+    def set_response(self, name: str, response: Any):
+        """
+        覆盖某个操作的响应
+
+        Args:
+            name: 操作名，例如 ``orders.get_order``
+            response: 固定的 JSON 数据，或接收 ``web.Request`` 返回 JSON 数据 / ``web.Response`` 的函数
+        """
+        self._overrides[name] = response if callable(response) else (lambda request: response)
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0) -> str:
+        """
+        启动服务器
+
+        Returns:
+            str: 可直接传给 ``ShoplineAPIClient`` 的 ``base_url``
+        """
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound_host, bound_port = self._runner.addresses[0][:2]
+        self.base_url = f'http://{bound_host}:{bound_port}{self.base_path}'
+        return self.base_url
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _return_type(self, operation: Operation) -> Any:
+        if operation.name not in self._return_types:
+            module = importlib.import_module(operation.module)
+            self._return_types[operation.name] = inspect.signature(module.call).return_annotation
+        return self._return_types[operation.name]
+
+    @web.middleware
+    async def _fault_middleware(self, request: web.Request, handler):
+        operation: Optional[Operation] = getattr(handler, 'operation', None)
+        faults = self.faults
+        if operation is None or not faults.applies_to(operation):
+            return await handler(request)
+
+        delay = faults.latency + (self._random.random() * faults.jitter if faults.jitter else 0.0)
+        if delay:
+            await asyncio.sleep(delay)
+        roll = self._random.random()
+        if roll < faults.drop_rate:
+            # 直接关闭连接，客户端收到 ServerDisconnectedError；返回的响应不会被发送
+            if request.transport is not None:
+                request.transport.close()
+            return web.Response(status=503)
+        roll -= faults.drop_rate
+        if roll < faults.rate_limit_rate:
+            return web.json_response(
+                {'code': 'too_many_requests', 'message': 'Too Many Requests'},
+                status=429, headers={'Retry-After': str(math.ceil(faults.retry_after))}
+            )
+        roll -= faults.rate_limit_rate
+        if roll < faults.error_rate:
+            return web.json_response(
+                {'code': 'server_error', 'message': 'Injected server error'}, status=faults.error_status
+            )
+        return await handler(request)
+
+    def _make_handler(self, operation: Operation):
+        async def handler(request: web.Request) -> web.StreamResponse:
+            response = await respond(request)
+            if self.compress and isinstance(response, web.Response) and response.body is not None:
+                response.enable_compression()
+            return response
+
+        async def respond(request: web.Request) -> web.StreamResponse:
+            self.request_counts[operation.name] += 1
+            if operation.name in self._overrides:
+                result = self._overrides[operation.name](request)
+                if inspect.isawaitable(result):
+                    result = await result
+                return result if isinstance(result, web.StreamResponse) else web.json_response(result)
+
+            query: Dict[str, Any] = dict(request.query)
+            if 'fields[]' in request.query:
+                query['fields[]'] = request.query.getall('fields[]')
+            if request.method in ('POST', 'PUT') and request.can_read_body:
+                try:
+                    body = await request.json()
+                except ValueError:
+                    body = None
+                if isinstance(body, dict):
+                    query = {**body, **query}
+            return self._respond(operation, request.match_info, query)
+
+        handler.operation = operation
+        return handler
+
+    def _respond(self, operation: Operation, path_params: Dict[str, str], query: Dict[str, Any]) -> web.Response:
+        return_type = self._return_type(operation)
+        if return_type is None or return_type is inspect.Signature.empty:
+            return web.Response(status=204)
+        if return_type is str:
+            return web.Response(text='ok')
+
+        return_type = _unwrap(return_type)
+        if typing.get_origin(return_type) in (list, typing.List):
+            item = typing.get_args(return_type)[0]
+            if isinstance(item, type) and issubclass(item, BaseModel):
+                return web.json_response(self.factory.build_many(item, 0, min(self.total_count, 3)))
+            return web.json_response([])
+        if not (isinstance(return_type, type) and issubclass(return_type, BaseModel)):
+            return web.json_response({})
+        return web.json_response(self._build(return_type, path_params, query))
+
+    def _build(self, model: Type[BaseModel], path_params: Dict[str, str], query: Dict[str, Any]) -> Dict[str, Any]:
+        item_model = _list_item_model(model, 'items')
+        fields = model.model_fields
+
+        if item_model is not None and 'pagination' in fields:
+            per_page = int(query.get('per_page') or self.default_per_page)
+            page = int(query.get('page') or 1)
+            previous_index = object_id_index(query.get('previous_id'))
+            start = previous_index + 1 if previous_index is not None else (page - 1) * per_page
+            count = max(0, min(per_page, self.total_count - start))
+            return {
+                'items': self._project(self.factory.build_many(item_model, start, count), query),
+                'pagination': {
+                    'current_page': page,
+                    'per_page': per_page,
+                    'total_count': self.total_count,
+                    'total_pages': (self.total_count + per_page - 1) // per_page,
+                },
+            }
+
+        if item_model is not None and 'last_id' in fields:
+            limit = int(query.get('limit') or query.get('per_page') or self.default_per_page)
+            last_index = object_id_index(query.get('last_id') or query.get('previous_id'))
+            start = last_index + 1 if last_index is not None else 0
+            count = max(0, min(limit, self.total_count - start))
+            has_more = start + count < self.total_count
+            data = {'items': self._project(self.factory.build_many(item_model, start, count), query), 'limit': limit,
+                    'last_id': object_id(start + count - 1) if count and has_more else None}
+            if 'total' in fields:
+                data['total'] = self.total_count
+            return data
+
+        data = dict(self.factory.template(model))
+        if 'id' in data and 'id' in path_params:
+            data['id'] = path_params['id']
+        return self._project([data], query)[0]
+
+    @staticmethod
+    def _project(items: typing.List[Dict[str, Any]], query: Dict[str, Any]) -> typing.List[Dict[str, Any]]:
+        """按 ``fields[]`` 只返回指定字段"""
+        fields = query.get('fields[]')
+        if not fields:
+            return items
+        fields = set(fields if isinstance(fields, list) else [fields])
+        return [{key: value for key, value in item.items() if key in fields} for item in items]
+
+
+def main(argv: Optional[typing.List[str]] = None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='Local Shopline API stand-in server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--total-count', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=float, default=1.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--drop-rate', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    faults = FaultConfig(
+        latency=args.latency, jitter=args.jitter, rate_limit_rate=args.rate_limit_rate,
+        retry_after=args.retry_after, error_rate=args.error_rate, drop_rate=args.drop_rate,
+    )
+    server = MockShoplineServer(total_count=args.total_count, seed=args.seed, faults=faults)
+    web.run_app(server.app, host=args.host, port=args.port)
+
+
+if __name__ == '__main__':
+    main()
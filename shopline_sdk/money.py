@@ -0,0 +1,295 @@
+"""
+金额运算
+
+``models.money.Money`` 同时带有 ``cents`` 与浮点数 ``dollars``，直接对 ``dollars`` 求和会累积浮点误差。
+本模块以整数分进行精确运算并检查币种：
+
+- ``Amount``: 不可变的 (分, 币种) 值，支持加减、整数倍与比较，币种不同时抛出 ``CurrencyMismatchError``
+- ``CentsAccumulator``: 按币种累加大量金额，只读取 ``cents`` / ``currency_iso``，不为每个金额创建对象
+- ``sum_cents``: 对分数组按币种分组求和，安装了 NumPy 时使用向量化路径
+
+Arrow 表的按币种汇总见 ``shopline_sdk.columnar.money_sum``。
+
+用法::
+
+    total = Amount.from_money(order.subtotal) + Amount.from_money(order.total_tax_fee)
+    accumulator = CentsAccumulator()
+    accumulator.add_many(item.total for order in orders for item in order.subtotal_items)
+    accumulator.totals  # {'TWD': 123400}
+"""
+
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from shopline_sdk.models.money import Money
+
+
+class CurrencyMismatchError(ValueError):
+    """不同币种的金额不能直接运算"""
+
+    def __init__(self, left: Optional[str], right: Optional[str]):
+        super().__init__(f'Currency mismatch: {left} != {right}')
+        self.left = left
+        self.right = right
+
+
+def _field(money: Any, key: str) -> Any:
+    return money.get(key) if isinstance(money, dict) else getattr(money, key, None)
+
+
+class Amount:
+    """以整数分表示的金额"""
+
+    __slots__ = ('cents', 'currency')
+
+    cents: int
+    currency: Optional[str]
+
+    def __init__(self, cents: int, currency: Optional[str] = None):
+        """
+        Args:
+            cents: 金额（分）
+            currency: 币种 ISO 代码，None 表示未知币种，只能与同为 None 的金额运算
+        """
+        if not isinstance(cents, int) or isinstance(cents, bool):
+            raise TypeError(f'cents must be int, got {type(cents).__name__}')
+        object.__setattr__(self, 'cents', cents)
+        object.__setattr__(self, 'currency', currency)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError('Amount is immutable')
+
+    @classmethod
+    def from_money(cls, money: Any) -> 'Amount':
+        """
+        从 ``Money`` 模型或其原始 JSON 创建
+
+        ``cents`` 缺失时由 ``dollars`` 换算（四舍五入到分）。
+        """
+        cents = _field(money, 'cents')
+        if cents is None:
+            dollars = _field(money, 'dollars')
+            if dollars is None:
+                raise ValueError('Money has neither cents nor dollars')
+            cents = int((Decimal(str(dollars)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_EVEN))
+        return cls(int(cents), _field(money, 'currency_iso'))
+
+    @classmethod
+    def zero(cls, currency: Optional[str] = None) -> 'Amount':
+        return cls(0, currency)
+
+    @property
+    def dollars(self) -> Decimal:
+        """以元为单位的精确值"""
+        return Decimal(self.cents) / 100
+
+    def to_money(self, currency_symbol: Optional[str] = None) -> Money:
+        """转换为 ``Money`` 模型"""
+        return Money(cents=self.cents, currency_iso=self.currency, currency_symbol=currency_symbol,
+                     dollars=self.cents / 100,
+                     label=f'{currency_symbol or ""}{self.dollars:,.2f}' if currency_symbol else None)
+
+    def _check(self, other: 'Amount') -> 'Amount':
+        if not isinstance(other, Amount):
+            return NotImplemented
+        if other.currency != self.currency:
+            raise CurrencyMismatchError(self.currency, other.currency)
+        return other
+
+    def __add__(self, other: 'Amount') -> 'Amount':
+        if self._check(other) is NotImplemented:
+            return NotImplemented
+        return Amount(self.cents + other.cents, self.currency)
+
+    def __radd__(self, other: Any) -> 'Amount':
+        # 使 sum(amounts) 可用
+        if other == 0:
+            return self
+        return self.__add__(other)
+
+    def __sub__(self, other: 'Amount') -> 'Amount':
+        if self._check(other) is NotImplemented:
+            return NotImplemented
+        return Amount(self.cents - other.cents, self.currency)
+
+    def __neg__(self) -> 'Amount':
+        return Amount(-self.cents, self.currency)
+
+    def __mul__(self, factor: int) -> 'Amount':
+        if not isinstance(factor, int) or isinstance(factor, bool):
+            return NotImplemented
+        return Amount(self.cents * factor, self.currency)
+
+    __rmul__ = __mul__
+
+    def multiply(self, factor: Union[int, str, Decimal], rounding: str = ROUND_HALF_EVEN) -> 'Amount':
+        """
+        乘以任意倍数（如税率、折扣）并舍入到分
+
+        Args:
+            factor: 倍数，浮点数请以字符串传入以避免误差
+            rounding: ``decimal`` 舍入方式，默认银行家舍入
+        """
+        cents = (Decimal(self.cents) * Decimal(factor)).quantize(Decimal(1), rounding=rounding)
+        return Amount(int(cents), self.currency)
+
+    def allocate(self, ratios: Sequence[int]) -> List['Amount']:
+        """
+        按比例拆分金额，余下的分依次分给前面的份额，各份之和恒等于原金额
+
+        Args:
+            ratios: 非负整数比例，例如 ``[1, 1, 1]``
+        """
+        total = sum(ratios)
+        if total <= 0 or any(ratio < 0 for ratio in ratios):
+            raise ValueError('ratios must be non-negative and not all zero')
+        parts = [self.cents * ratio // total for ratio in ratios]
+        remainder = self.cents - sum(parts)
+        for i in range(remainder):
+            parts[i % len(parts)] += 1
+        return [Amount(part, self.currency) for part in parts]
+
+    def _compare(self, other: Any) -> int:
+        if self._check(other) is NotImplemented:
+            return NotImplemented
+        return (self.cents > other.cents) - (self.cents < other.cents)
+
+    def __lt__(self, other: 'Amount') -> bool:
+        result = self._compare(other)
+        return result if result is NotImplemented else result < 0
+
+    def __le__(self, other: 'Amount') -> bool:
+        result = self._compare(other)
+        return result if result is NotImplemented else result <= 0
+
+    def __gt__(self, other: 'Amount') -> bool:
+        result = self._compare(other)
+        return result if result is NotImplemented else result > 0
+
+    def __ge__(self, other: 'Amount') -> bool:
+        result = self._compare(other)
+        return result if result is NotImplemented else result >= 0
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Amount):
+            return NotImplemented
+        return self.cents == other.cents and self.currency == other.currency
+
+    def __hash__(self) -> int:
+        return hash((self.cents, self.currency))
+
+    def __bool__(self) -> bool:
+        return self.cents != 0
+
+    def __repr__(self) -> str:
+        return f'Amount({self.cents}, {self.currency!r})'
+
+    def __str__(self) -> str:
+        return f'{self.currency or ""} {self.dollars:.2f}'.strip()
+
+
+class CentsAccumulator:
+    """按币种累加金额（分）"""
+
+    __slots__ = ('totals', 'counts')
+
+    def __init__(self):
+        self.totals: Dict[Optional[str], int] = {}
+        """币种 -> 合计（分）"""
+        self.counts: Dict[Optional[str], int] = {}
+        """币种 -> 累加的金额个数"""
+
+    def add(self, cents: int, currency: Optional[str] = None, quantity: int = 1):
+        """累加 ``cents * quantity``"""
+        self.totals[currency] = self.totals.get(currency, 0) + cents * quantity
+        self.counts[currency] = self.counts.get(currency, 0) + 1
+
+    def add_money(self, money: Any, quantity: int = 1):
+        """累加一个 ``Money`` 模型或其原始 JSON，值为 None 或没有 ``cents`` 时忽略"""
+        if money is None:
+            return
+        cents = _field(money, 'cents')
+        if cents is not None:
+            self.add(int(cents), _field(money, 'currency_iso'), quantity)
+
+    def add_many(self, moneys: Iterable[Any]):
+        """累加多个 ``Money`` 模型或原始 JSON"""
+        totals, counts = self.totals, self.counts
+        for money in moneys:
+            if money is None:
+                continue
+            if isinstance(money, dict):
+                cents, currency = money.get('cents'), money.get('currency_iso')
+            else:
+                cents, currency = money.cents, money.currency_iso
+            if cents is None:
+                continue
+            totals[currency] = totals.get(currency, 0) + int(cents)
+            counts[currency] = counts.get(currency, 0) + 1
+
+    def merge(self, other: 'CentsAccumulator'):
+        for currency, cents in other.totals.items():
+            self.totals[currency] = self.totals.get(currency, 0) + cents
+            self.counts[currency] = self.counts.get(currency, 0) + other.counts.get(currency, 0)
+
+    def total(self, currency: Optional[str] = None) -> Amount:
+        """
+        单一币种的合计
+
+        Args:
+            currency: 币种，None 时要求只累加过一种币种
+        """
+        if currency is None:
+            if len(self.totals) > 1:
+                currencies = sorted(self.totals, key=str)
+                raise CurrencyMismatchError(currencies[0], currencies[1])
+            currency = next(iter(self.totals), None)
+        return Amount(self.totals.get(currency, 0), currency)
+
+    def amounts(self) -> List[Amount]:
+        return [Amount(cents, currency) for currency, cents in self.totals.items()]
+
+    def __iter__(self) -> Iterator[Tuple[Optional[str], int]]:
+        return iter(self.totals.items())
+
+    def __repr__(self) -> str:
+        return f'CentsAccumulator({self.totals!r})'
+
+
+def sum_cents(cents: Sequence[int], currencies: Sequence[Optional[str]],
+              quantities: Optional[Sequence[int]] = None) -> Dict[Optional[str], int]:
+    """
+    按币种对分数组求和，结果为精确整数
+
+    安装了 NumPy 时以 int64 向量化累加（单组合计需小于 2**63 分），否则逐项累加。
+
+    Args:
+        cents: 金额（分）
+        currencies: 与 ``cents`` 等长的币种
+        quantities: 与 ``cents`` 相乘的数量，例如订单项的 ``quantity``
+
+    Returns:
+        币种 -> 合计（分）
+    """
+    if len(cents) != len(currencies) or (quantities is not None and len(quantities) != len(cents)):
+        raise ValueError('cents, currencies and quantities must have the same length')
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    if np is None or not len(cents):
+        totals: Dict[Optional[str], int] = {}
+        values = cents if quantities is None else (c * q for c, q in zip(cents, quantities))
+        for value, currency in zip(values, currencies):
+            totals[currency] = totals.get(currency, 0) + int(value)
+        return totals
+
+    values = np.asarray(cents, dtype=np.int64)
+    if quantities is not None:
+        values = values * np.asarray(quantities, dtype=np.int64)
+    # 币种通常只有几种：先用字典编号，再对每个币种做一次掩码求和
+    index: Dict[Optional[str], int] = {}
+    codes = np.fromiter((index.setdefault(currency, len(index)) for currency in currencies),
+                        dtype=np.int64, count=len(currencies))
+    return {currency: int(values[codes == code].sum()) for currency, code in index.items()}
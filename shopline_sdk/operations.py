@@ -0,0 +1,102 @@
+"""
+接口操作注册表
+
+从 ``shopline_sdk/apis`` 下各接口模块的文档字符串（``Path: GET /orders/{id}``）建立操作表，
+用于将请求的方法与 URL 解析为操作名（如 ``orders.get_order``）与路径模板。
+只读取源码文本而不导入模块，避免加载全部接口与模型。
+"""
+
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+_PATH_PATTERN = re.compile(r'^\s*Path:\s*(GET|POST|PUT|PATCH|DELETE)\s+(\S+)\s*$', re.MULTILINE)
+_PARAM_PATTERN = re.compile(r'\{([^}/]+)\}')
+
+APIS_DIR = os.path.join(os.path.dirname(__file__), 'apis')
+
+
+@dataclass(frozen=True)
+class Operation:
+    """一个接口操作"""
+    name: str
+    """操作名，即 ``shopline_sdk.apis`` 下的模块路径，例如 ``orders.search_orders``"""
+    method: str
+    path: str
+    """路径模板，例如 ``/orders/{id}``"""
+
+    @property
+    def module(self) -> str:
+        return f'shopline_sdk.apis.{self.name}'
+
+    @property
+    def route(self) -> str:
+        """``METHOD /path`` 形式的路由名"""
+        return f'{self.method} {self.path}'
+
+    @property
+    def param_names(self) -> List[str]:
+        return _PARAM_PATTERN.findall(self.path)
+
+
+@lru_cache(maxsize=1)
+def get_operations() -> Tuple[Operation, ...]:
+    """返回全部接口操作"""
+    operations = []
+    for root, dirs, files in os.walk(APIS_DIR):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('_'))
+        package = os.path.relpath(root, APIS_DIR).replace(os.sep, '.')
+        if package == '.':
+            continue
+        for filename in sorted(files):
+            if not filename.endswith('.py') or filename.startswith('_'):
+                continue
+            with open(os.path.join(root, filename), 'r', encoding='utf-8') as f:
+                match = _PATH_PATTERN.search(f.read())
+            if match:
+                operations.append(Operation(f'{package}.{filename[:-3]}', match.group(1), match.group(2)))
+    return tuple(operations)
+
+
+@lru_cache(maxsize=1)
+def _routes() -> Dict[str, List[Tuple[re.Pattern, Operation]]]:
+    routes: Dict[str, List[Tuple[re.Pattern, Operation]]] = {}
+    # 字面量段越多越优先，使 /orders/search 先于 /orders/{id} 匹配
+    ordered = sorted(
+        get_operations(),
+        key=lambda op: (len(op.param_names), -len(op.path.strip('/').split('/')))
+    )
+    for operation in ordered:
+        literals = _PARAM_PATTERN.split(operation.path)[::2]
+        pattern = re.compile('^' + '[^/]+'.join(re.escape(literal) for literal in literals) + '$')
+        routes.setdefault(operation.method, []).append((pattern, operation))
+    return routes
+
+
+@lru_cache(maxsize=4096)
+def resolve(method: str, path: str) -> Optional[Operation]:
+    """
+    将请求方法与路径解析为接口操作
+
+    Args:
+        method: HTTP 方法
+        path: 相对于 API 基础路径的请求路径，例如 ``/orders/5a55b3c9``
+
+    Returns:
+        匹配的操作，未匹配时返回 None
+    """
+    path = '/' + path.split('?', 1)[0].strip('/')
+    for pattern, operation in _routes().get(method.upper(), ()):
+        if pattern.match(path):
+            return operation
+    return None
+
+
+def get_operation(name: str) -> Optional[Operation]:
+    """按操作名查找操作，例如 ``get_operation('orders.search_orders')``"""
+    for operation in get_operations():
+        if operation.name == name:
+            return operation
+    return None
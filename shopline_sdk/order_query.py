@@ -0,0 +1,351 @@
+"""
+订单查询规划
+
+``OrderQuery`` 以声明式条件描述要查找的订单，``plan`` 将服务端支持的条件下推到 ``search_orders`` /
+``get_orders`` 的查询参数，其余条件在本地对原始 JSON 过滤，只有命中的订单才校验为 ``Order`` 模型。
+执行前可用 ``QueryPlan.estimate`` 以一次 ``per_page=1`` 的请求估算需要拉取的页数。
+
+条件字段为 ``Order`` 的字段路径，列表中的字段（如 ``subtotal_items.sku``）任一元素满足即视为满足；
+时间字段的条件值可以是 ``datetime`` 或时间字符串，均按解析后的时间比较。
+
+用法::
+
+    query = (OrderQuery()
+             .where('status', 'in', ['confirmed', 'completed'])
+             .where('created_at', 'gte', datetime(2024, 1, 1))
+             .where('total.cents', 'gte', 100000)
+             .where('subtotal_items.sku', 'eq', 'SKU-001'))
+    plan = query.plan()
+    print(plan.api.__name__, plan.params, plan.local)
+    print(await plan.estimate(session))
+    async for order in plan.execute(session):
+        ...
+"""
+
+import datetime
+import math
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from typing_extensions import Literal
+
+from shopline_sdk.apis.orders import get_orders, search_orders
+from shopline_sdk.helper import fetch_json, iterate_raw_pages
+from shopline_sdk.models.order import Order
+from shopline_sdk.timestamps import cached_parse_datetime, format_datetime, is_datetime_field
+
+Op = Literal['eq', 'ne', 'in', 'not_in', 'gt', 'gte', 'lt', 'lte', 'contains', 'exists']
+
+_NEGATIVE_OPS = ('ne', 'not_in')
+
+
+@dataclass(frozen=True)
+class Predicate:
+    """一个查询条件"""
+    field: str
+    """``Order`` 的字段路径，例如 ``status``、``order_delivery.status``、``total.cents``"""
+    op: Op
+    value: Any = None
+
+    def compile(self) -> Callable[[Dict[str, Any]], bool]:
+        """编译为作用于原始 JSON 订单的判断函数"""
+        path = tuple(self.field.split('.'))
+        op, value = self.op, self.value
+        if op != 'exists' and (is_datetime_field(Order, self.field)
+                               or isinstance(value, (datetime.datetime, datetime.date))):
+            # 时间条件按解析后的 datetime 比较，字符串值同样解析，避免不同精度或时区的字符串按字典序比较
+            convert = _to_datetime
+            value = [convert(v) for v in value] if op in ('in', 'not_in') else convert(value)
+        else:
+            convert = None
+        if op in ('in', 'not_in'):
+            try:
+                value = frozenset(value)
+            except TypeError:
+                value = tuple(value)
+        if op == 'exists':
+            # 空列表与缺失字段一样视为不存在
+            expected = value is not False
+            return lambda record: any(item is not None for item in _values(record, path)) == expected
+
+        test = _TESTS['in' if op == 'not_in' else 'eq' if op == 'ne' else op]
+
+        def matches(record: Dict[str, Any]) -> bool:
+            for item in _values(record, path):
+                if convert is not None:
+                    item = convert(item)
+                if test(item, value):
+                    return op not in _NEGATIVE_OPS
+            return op in _NEGATIVE_OPS
+
+        return matches
+
+
+def _to_datetime(value: Any) -> Optional[datetime.datetime]:
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return cached_parse_datetime(format_datetime(value))
+    if isinstance(value, str):
+        return cached_parse_datetime(value)
+    return None
+
+
+def _values(value: Any, path: Tuple[str, ...]) -> Iterator[Any]:
+    if not path:
+        if isinstance(value, list):
+            yield from value
+        else:
+            yield value
+        return
+    if isinstance(value, list):
+        for item in value:
+            yield from _values(item, path)
+    elif isinstance(value, dict):
+        yield from _values(value.get(path[0]), path[1:])
+    else:
+        yield None
+
+
+def _compare(compare: Callable[[Any, Any], bool]) -> Callable[[Any, Any], bool]:
+    def test(item: Any, value: Any) -> bool:
+        if item is None:
+            return False
+        try:
+            return compare(item, value)
+        except TypeError:
+            return False
+
+    return test
+
+
+def _contains(item: Any, value: Any) -> bool:
+    try:
+        return item in value
+    except TypeError:
+        # 不可哈希的值（如 dict）不会出现在集合中
+        return False
+
+
+_TESTS: Dict[str, Callable[[Any, Any], bool]] = {
+    'eq': lambda item, value: item == value,
+    'in': _contains,
+    'gt': _compare(lambda item, value: item > value),
+    'gte': _compare(lambda item, value: item >= value),
+    'lt': _compare(lambda item, value: item < value),
+    'lte': _compare(lambda item, value: item <= value),
+    'contains': lambda item, value: isinstance(item, str) and value in item,
+    'exists': lambda item, value: (item is not None) == (value is not False),
+}
+
+
+@dataclass(frozen=True)
+class _Pushdown:
+    param: str
+    rank: int
+    """选择性排名，越小越能缩小结果"""
+    exact: bool = True
+    """服务端语义与条件完全一致，下推后不再本地过滤"""
+    convert: Callable[[Any], Any] = lambda value: value
+
+
+def _time(param: str) -> _Pushdown:
+    # 服务端时间范围的边界语义未定义，下推后仍在本地精确过滤
+    return _Pushdown(param, 6, exact=False, convert=format_datetime)
+
+
+def _time_rules(field_name: str, prefix: str) -> Dict[Tuple[str, str], _Pushdown]:
+    return {
+        (field_name, 'gt'): _time(f'{prefix}_after'),
+        (field_name, 'gte'): _time(f'{prefix}_after'),
+        (field_name, 'lt'): _time(f'{prefix}_before'),
+        (field_name, 'lte'): _time(f'{prefix}_before'),
+    }
+
+
+PUSHDOWN_RULES: Dict[Any, Dict[Tuple[str, str], _Pushdown]] = {
+    get_orders: {
+        ('id', 'eq'): _Pushdown('order_ids', 0, convert=lambda value: [value]),
+        ('id', 'in'): _Pushdown('order_ids', 0, convert=list),
+        ('customer_id', 'eq'): _Pushdown('customer_id', 3),
+        **_time_rules('created_at', 'created'),
+        **_time_rules('updated_at', 'updated'),
+    },
+    search_orders: {
+        # order_number 参数同时匹配 merchant_order_number，下推后仍需本地精确过滤
+        ('order_number', 'eq'): _Pushdown('order_number', 1, exact=False),
+        ('delivery_data.tracking_number', 'eq'): _Pushdown('delivery_data_tracking_number', 2),
+        ('customer_email', 'eq'): _Pushdown('customer_email', 3),
+        ('customer_id', 'eq'): _Pushdown('customer_id', 3),
+        ('subtotal_items.item_id', 'eq'): _Pushdown('item_id', 4),
+        ('order_payment.payment_method_id', 'eq'): _Pushdown('payment_id', 5),
+        ('order_delivery.delivery_option_id', 'eq'): _Pushdown('delivery_option_id', 5),
+        ('status', 'eq'): _Pushdown('status', 7),
+        ('status', 'in'): _Pushdown('statuses', 7, convert=list),
+        ('order_payment.status', 'eq'): _Pushdown('payment_status', 7),
+        ('order_delivery.status', 'eq'): _Pushdown('delivery_status', 7),
+        ('order_delivery.status', 'in'): _Pushdown('delivery_statuses', 7, convert=list),
+        **_time_rules('created_at', 'created'),
+        **_time_rules('updated_at', 'updated'),
+        **_time_rules('order_delivery.shipped_at', 'shipped'),
+        **_time_rules('order_delivery.arrived_at', 'arrived'),
+        **_time_rules('order_delivery.collected_at', 'collected'),
+        **_time_rules('order_delivery.returned_at', 'returned'),
+        **_time_rules('order_payment.paid_at', 'paid'),
+    },
+}
+"""各接口可下推的 (字段, 操作) 及对应的查询参数"""
+
+
+@dataclass
+class QueryCost:
+    """查询代价估算"""
+    total_count: Optional[int]
+    """服务端筛选后的订单数"""
+    per_page: int
+    pages: Optional[int]
+    """需要请求的页数"""
+
+
+@dataclass
+class QueryPlan:
+    """查询计划"""
+    api: Any
+    """``get_orders`` 或 ``search_orders``"""
+    params: Any
+    """下推后的查询参数"""
+    pushed: List[Predicate] = field(default_factory=list)
+    """下推到服务端的条件"""
+    local: List[Predicate] = field(default_factory=list)
+    """本地过滤的条件（包含下推后仍需精确过滤的时间范围）"""
+    limit: Optional[int] = None
+    cursor: bool = False
+
+    async def estimate(self, session: Any) -> QueryCost:
+        """请求一条记录，按服务端返回的总数估算页数"""
+        data = await fetch_json(session, self.api, params=self.params.model_copy(update={'page': 1, 'per_page': 1}))
+        total_count = (data.get('pagination') or {}).get('total_count')
+        per_page = self.params.per_page or 24
+        pages = None if total_count is None else math.ceil(total_count / per_page)
+        if pages is not None and self.limit is not None and not self.local:
+            pages = min(pages, math.ceil(self.limit / per_page))
+        return QueryCost(total_count, per_page, pages)
+
+    async def execute(self, session: Any) -> AsyncIterator[Order]:
+        """
+        执行查询，逐条产出满足全部条件的订单
+
+        Args:
+            session: 客户端会话
+        """
+        checks = [predicate.compile() for predicate in self.local]
+        matched = 0
+        if self.limit is not None and self.limit <= 0:
+            return
+        async for page in iterate_raw_pages(session, self.api, self.params, self.cursor):
+            for record in page.get('items') or ():
+                if all(check(record) for check in checks):
+                    yield Order.model_validate(record)
+                    matched += 1
+                    if self.limit is not None and matched >= self.limit:
+                        return
+
+
+class OrderQuery:
+    """声明式订单查询"""
+
+    def __init__(self, per_page: int = 50, limit: Optional[int] = None, cursor: bool = False,
+                 params: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            per_page: 每页数量
+            limit: 最多返回的订单数，达到后停止翻页
+            cursor: 使用 ``previous_id`` 游标翻页
+            params: 直接设置的 ``search_orders`` 参数（如 ``promotion_id``、``query``），设置后总是使用 ``search_orders``
+        """
+        self.per_page = per_page
+        self.limit = limit
+        self.cursor = cursor
+        self.params = dict(params or {})
+        self.predicates: List[Predicate] = []
+
+    def where(self, field_name: str, op: Op, value: Any = None) -> 'OrderQuery':
+        """
+        增加条件，多个条件之间为“且”
+
+        Args:
+            field_name: ``Order`` 的字段路径
+            op: ``eq``、``ne``、``in``、``not_in``、``gt``、``gte``、``lt``、``lte``、``contains``、``exists``
+            value: 条件值，``in`` / ``not_in`` 为序列
+        """
+        if op not in _TESTS and op not in _NEGATIVE_OPS:
+            raise ValueError(f'Unsupported op: {op}')
+        self.predicates.append(Predicate(field_name, op, value))
+        return self
+
+    def _pushdown(self, api: Any) -> Tuple[Dict[str, Any], List[Predicate], List[Predicate]]:
+        rules = PUSHDOWN_RULES[api]
+        candidates = sorted(
+            ((rules[(predicate.field, predicate.op)], predicate) for predicate in self.predicates
+             if (predicate.field, predicate.op) in rules),
+            key=lambda candidate: candidate[0].rank
+        )
+        params: Dict[str, Any] = {}
+        pushed: List[Predicate] = []
+        inexact: List[Predicate] = []
+        for rule, predicate in candidates:
+            if api is search_orders and rule.param in self.params:
+                # 调用方直接设置的参数优先，该条件不下推，在本地过滤
+                continue
+            value = rule.convert(predicate.value)
+            if rule.param in params:
+                # 同一参数只能下推一个条件；时间下界取最晚、上界取最早，其余条件留在本地
+                if rule.convert is format_datetime and predicate.op in ('gt', 'gte', 'lt', 'lte'):
+                    later = cached_parse_datetime(value) > cached_parse_datetime(params[rule.param])
+                    if later == (predicate.op in ('gt', 'gte')):
+                        params[rule.param] = value
+                    inexact.append(predicate)
+                continue
+            params[rule.param] = value
+            pushed.append(predicate)
+            if not rule.exact:
+                inexact.append(predicate)
+        local = [predicate for predicate in self.predicates if predicate not in pushed or predicate in inexact]
+        return params, pushed, local
+
+    def plan(self) -> QueryPlan:
+        """
+        生成查询计划：分别计算两个接口可下推的条件，选择能下推最具选择性条件的接口，
+        选择性相同时选择下推条件更多的接口
+        """
+        options = []
+        for api in (get_orders, search_orders):
+            if api is get_orders and self.params:
+                continue
+            params, pushed, local = self._pushdown(api)
+            best_rank = min((PUSHDOWN_RULES[api][(p.field, p.op)].rank for p in pushed), default=math.inf)
+            options.append((best_rank, -len(pushed), api, params, pushed, local))
+        _, _, api, params, pushed, local = min(options, key=lambda option: option[:2])
+        if api is search_orders:
+            params.update(self.params)
+        # 按字段名设置（部分字段的别名为 ``statuses[]`` 等形式）
+        params = api.Params(per_page=self.per_page).model_copy(update=params)
+        return QueryPlan(api, params, pushed, local, self.limit, self.cursor)
+
+    def __repr__(self) -> str:
+        return f'OrderQuery({self.predicates!r})'
+
+
+def filter_orders(orders: Sequence[Any], predicates: Sequence[Predicate]) -> List[Any]:
+    """
+    在本地按条件过滤订单
+
+    Args:
+        orders: ``Order`` 模型或原始 JSON
+        predicates: 条件
+    """
+    checks = [predicate.compile() for predicate in predicates]
+    result = []
+    for order in orders:
+        record = order.model_dump(by_alias=True) if isinstance(order, Order) else order
+        if all(check(record) for check in checks):
+            result.append(order)
+    return result
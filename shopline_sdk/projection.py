@@ -0,0 +1,196 @@
+"""
+字段投影
+
+声明一次所需字段，请求时自动设置 ``fields[]`` / ``excludes[]``，响应直接校验为只包含这些字段的
+稀疏模型，传输字节数、解码耗时与内存占用一同减少。接口参数不支持 ``fields[]`` 时仍会使用稀疏模型校验。
+
+用法::
+
+    projection = Projection(Customer, ['id', 'email', 'membership_tier.id'])
+    async with client.new_session() as session:
+        response = await projection.call(get_customers, session, get_customers.Params(per_page=200))
+        for customer in response.items:
+            print(customer.id, customer.email, customer.membership_tier.id)
+"""
+
+import copy
+import inspect
+import typing
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel, create_model
+
+from shopline_sdk.helper import fetch_json, iterate_raw_pages
+
+
+def _unwrap(annotation: Any) -> Any:
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _field_name(model: Type[BaseModel], name: str) -> str:
+    """字段名或别名 -> 字段名"""
+    for field_name, field_info in model.model_fields.items():
+        if name in (field_name, field_info.alias):
+            return field_name
+    raise KeyError(f'{model.__name__} has no field {name}')
+
+
+def _build_tree(model: Type[BaseModel], fields: Sequence[str]) -> Dict[str, Any]:
+    """``['id', 'tier.id', 'tier.name']`` -> ``{'id': None, 'tier': {'id': None, 'name': None}}``"""
+    tree: Dict[str, Any] = {}
+    for path in fields:
+        node, current = tree, model
+        parts = path.split('.')
+        for i, part in enumerate(parts):
+            name = _field_name(current, part)
+            if i == len(parts) - 1:
+                node.setdefault(name, None)
+                break
+            current = _unwrap(current.model_fields[name].annotation)
+            if typing.get_origin(current) in (list, typing.List):
+                current = _unwrap(typing.get_args(current)[0])
+            if not _is_model(current):
+                raise KeyError(f'{path}: {part} is not a nested model')
+            if not isinstance(node.get(name), dict):
+                node[name] = {}
+            node = node[name]
+    return tree
+
+
+def _freeze(tree: Dict[str, Any]) -> Tuple:
+    return tuple(sorted((name, _freeze(child) if child else None) for name, child in tree.items()))
+
+
+@lru_cache(maxsize=None)
+def _sparse_model(model: Type[BaseModel], tree: Tuple) -> Type[BaseModel]:
+    definitions = {}
+    for name, child in tree:
+        field_info = copy.copy(model.model_fields[name])
+        annotation = field_info.annotation
+        if child:
+            inner = _unwrap(annotation)
+            if typing.get_origin(inner) in (list, typing.List):
+                item = _sparse_model(_unwrap(typing.get_args(inner)[0]), child)
+                annotation = Optional[List[item]]
+            else:
+                annotation = Optional[_sparse_model(inner, child)]
+            field_info.annotation = annotation
+        definitions[name] = (annotation, field_info)
+    return create_model(f'Sparse{model.__name__}', __module__=model.__module__, **definitions)
+
+
+def sparse_model(model: Type[BaseModel], fields: Sequence[str]) -> Type[BaseModel]:
+    """
+    生成只包含指定字段的稀疏模型，相同参数返回同一个类
+
+    Args:
+        model: 完整模型，例如 ``Customer``
+        fields: 字段路径，支持嵌套，例如 ``['id', 'email', 'membership_tier.id']``
+
+    Returns:
+        pydantic 模型类，字段定义（类型、别名）与完整模型一致
+    """
+    return _sparse_model(model, _freeze(_build_tree(model, fields)))
+
+
+class Projection:
+    """字段投影"""
+
+    def __init__(self, model: Type[BaseModel], fields: Optional[Sequence[str]] = None,
+                 excludes: Optional[Sequence[str]] = None):
+        """
+        Args:
+            model: 列表项或单个资源的完整模型，例如 ``Customer``、``Product``
+            fields: 需要的字段路径
+            excludes: 不需要的顶层字段，未指定 ``fields`` 时使用模型的其余字段
+        """
+        if not fields and not excludes:
+            raise ValueError('fields or excludes is required')
+        self.model = model
+        self.excludes = [_field_name(model, name) for name in excludes or ()]
+        if fields:
+            self.fields = list(fields)
+        else:
+            self.fields = [name for name in model.model_fields if name not in self.excludes]
+        self.sparse = sparse_model(model, self.fields)
+        # 请求中的 fields[] 只支持顶层字段
+        self.wire_fields = list(dict.fromkeys(
+            model.model_fields[name].alias or name for name in self.sparse.model_fields
+        ))
+        self._responses: Dict[Any, Type[BaseModel]] = {}
+
+    def apply(self, params: Optional[BaseModel], params_class: Optional[Type[BaseModel]] = None) -> Optional[BaseModel]:
+        """
+        在查询参数副本上设置 ``fields`` / ``excludes``，参数不支持这些字段时原样返回
+
+        Args:
+            params: 查询参数模型实例，None 时使用 ``params_class()``
+            params_class: 接口的 ``Params`` 类
+        """
+        if params is None:
+            if params_class is None:
+                return None
+            params = params_class()
+        supported = type(params).model_fields
+        update: Dict[str, Any] = {}
+        if 'fields' in supported and self.fields and not self.excludes:
+            update['fields'] = self.wire_fields
+        if 'excludes' in supported and self.excludes:
+            annotation = _unwrap(supported['excludes'].annotation)
+            # 部分接口把 excludes[] 声明为字符串
+            update['excludes'] = self.excludes if typing.get_origin(annotation) in (list, typing.List) else ','.join(
+                self.excludes)
+        return params.model_copy(update=update) if update else params
+
+    def response_model(self, api: Any) -> Type[BaseModel]:
+        """返回接口响应模型的稀疏版本：``items`` 或响应本身替换为稀疏模型"""
+        if api not in self._responses:
+            response = _unwrap(inspect.signature(api.call).return_annotation)
+            if response is self.model:
+                self._responses[api] = self.sparse
+            elif _is_model(response):
+                definitions = {}
+                for name, field_info in response.model_fields.items():
+                    annotation = _unwrap(field_info.annotation)
+                    if typing.get_origin(annotation) in (list, typing.List) and _unwrap(
+                            typing.get_args(annotation)[0]) is self.model:
+                        field_info = copy.copy(field_info)
+                        field_info.annotation = Optional[List[self.sparse]]
+                    definitions[name] = (field_info.annotation, field_info)
+                self._responses[api] = create_model(
+                    f'Sparse{response.__name__}', __module__=response.__module__, **definitions
+                )
+            else:
+                raise TypeError(f'{api.__name__} does not return {self.model.__name__}')
+        return self._responses[api]
+
+    async def call(self, api: Any, session: Any, params: Optional[BaseModel] = None, **kwargs) -> BaseModel:
+        """
+        调用接口并校验为稀疏模型
+
+        Args:
+            api: 接口模块，例如 ``get_customers``、``get_customer``
+            session: 客户端会话
+            params: 查询参数模型实例
+            **kwargs: 路径参数，例如 ``id``
+        """
+        params = self.apply(params, getattr(api, 'Params', None))
+        data = await fetch_json(session, api, params=params, **kwargs)
+        return self.response_model(api).model_validate(data)
+
+    async def pages(self, api: Any, session: Any, params: Optional[BaseModel] = None, cursor: bool = False,
+                    **kwargs) -> AsyncIterator[BaseModel]:
+        """按页遍历分页接口，依次产出稀疏响应"""
+        params = self.apply(params, api.Params)
+        response_model = self.response_model(api)
+        async for page in iterate_raw_pages(session, api, params, cursor, **kwargs):
+            yield response_model.model_validate(page)
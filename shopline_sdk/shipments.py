@@ -0,0 +1,348 @@
+"""
+批量出货
+
+``ShipmentPipeline`` 将订单 ID 流切分为 ``orders.bulk_execute_shipment`` 请求并发执行：
+
+- 每批不超过 ``chunk_size`` 个订单，最多 ``concurrency`` 个批次同时进行
+- 按响应中的分类记录每个订单的结果；``processingFailedOrderIds``、响应中缺失的订单与整批失败（5xx / 429 /
+  无法建立连接）的订单重新组批重试，其余订单不重复发送
+- 请求发出后连接中断或超时的订单可能已经出货，记为 ``uncertain``，不重复发送
+- 收到 429 时整条流水线暂停 ``rate_limit_delay`` 秒，连续限流时暂停时间加倍
+- 批量接口不支持的物流（``platformNotSupportOrderIds``）改为逐个调用 ``orders.execute_shipment``
+- 订单附带配送单更新时，先通过 ``order_deliveries.update_order_delivery`` 更新配送单，成功后再出货
+
+用法::
+
+    pipeline = ShipmentPipeline(chunk_size=100, concurrency=4)
+    async with client.new_session() as session:
+        report = await pipeline.run(session, order_ids)
+    report.write_csv('shipments.csv')
+"""
+
+import asyncio
+import csv
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Tuple, Union
+
+import aiohttp
+from typing_extensions import Literal
+
+from shopline_sdk.apis.order_deliveries import update_order_delivery
+from shopline_sdk.apis.orders import bulk_execute_shipment, execute_shipment
+from shopline_sdk.exceptions import ShoplineAPIError
+from shopline_sdk.helper import async_iterate
+
+Status = Literal[
+    'processing', 'status_error', 'not_found', 'platform_not_supported', 'delivery_failed', 'failed', 'uncertain'
+]
+
+_RESPONSE_STATUSES: Tuple[Tuple[str, Status], ...] = (
+    ('processingOrderIds', 'processing'),
+    ('statusErrorOrderIds', 'status_error'),
+    ('notFoundOrderIds', 'not_found'),
+    ('platformNotSupportOrderIds', 'platform_not_supported'),
+    ('processingFailedOrderIds', 'failed'),
+)
+
+_RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+@dataclass
+class ShipmentItem:
+    """待出货的订单"""
+    order_id: str
+    delivery_id: Optional[str] = None
+    """配送单 ID，``delivery`` 不为空时必填"""
+    delivery: Optional[update_order_delivery.Body] = None
+    """出货前写入的配送单信息，例如物流单号备注"""
+
+
+ShipmentInput = Union[str, ShipmentItem]
+
+
+@dataclass
+class ShipmentOutcome:
+    """单个订单的出货结果"""
+    order_id: str
+    status: Status = 'failed'
+    attempts: int = 0
+    """发送出货请求的次数（含逐个调用）"""
+    method: Optional[Literal['bulk', 'single']] = None
+    """最后一次使用的接口"""
+    delivery_status: Optional[str] = None
+    """逐个调用返回的配送状态"""
+    tracking_number: Optional[str] = None
+    """逐个调用返回的物流单号"""
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 'processing'
+
+
+@dataclass
+class ShipmentReport:
+    """一次出货的逐单结果"""
+    outcomes: Dict[str, ShipmentOutcome] = field(default_factory=dict)
+    """订单 ID -> 结果，按输入顺序"""
+    request_count: int = 0
+    """发送的出货与配送单请求数"""
+
+    @property
+    def succeeded(self) -> List[ShipmentOutcome]:
+        return [outcome for outcome in self.outcomes.values() if outcome.ok]
+
+    @property
+    def failed(self) -> List[ShipmentOutcome]:
+        return [outcome for outcome in self.outcomes.values() if not outcome.ok]
+
+    def counts(self) -> Dict[str, int]:
+        """各状态的订单数"""
+        counts: Dict[str, int] = {}
+        for outcome in self.outcomes.values():
+            counts[outcome.status] = counts.get(outcome.status, 0) + 1
+        return counts
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """逐单结果表，每行一个订单"""
+        return [
+            {
+                'order_id': outcome.order_id,
+                'status': outcome.status,
+                'attempts': outcome.attempts,
+                'method': outcome.method,
+                'delivery_status': outcome.delivery_status,
+                'tracking_number': outcome.tracking_number,
+                'error': _describe_error(outcome.error),
+            }
+            for outcome in self.outcomes.values()
+        ]
+
+    def write_csv(self, path: str):
+        """将逐单结果写入 CSV 文件"""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(ShipmentOutcome.__dataclass_fields__))
+            writer.writeheader()
+            writer.writerows(self.rows())
+
+
+def _describe_error(error: Optional[BaseException]) -> Optional[str]:
+    if error is None:
+        return None
+    if isinstance(error, ShoplineAPIError):
+        return f'{error.status_code}: {error.error}'
+    return f'{type(error).__name__}: {error}'
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, ShoplineAPIError):
+        return error.status_code in _RETRYABLE_STATUS_CODES
+    # 只有连接未建立时请求确定没有发出
+    return isinstance(error, aiohttp.ClientConnectorError)
+
+
+def _is_uncertain(error: BaseException) -> bool:
+    """请求可能已送达服务端，无法确认是否已执行"""
+    return not _is_retryable(error) and isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+class ShipmentPipeline:
+    """批量出货流水线"""
+
+    def __init__(
+            self,
+            chunk_size: int = 100,
+            concurrency: int = 4,
+            max_retries: int = 3,
+            retry_delay: float = 1.0,
+            single_fallback: bool = True,
+            rate_limit_delay: float = 10.0
+    ):
+        """
+        Args:
+            chunk_size: 每个 ``bulk_execute_shipment`` 请求的订单数上限
+            concurrency: 同时进行的请求数上限（批量、逐个与配送单请求共享）
+            max_retries: 失败订单重新发送的最大轮数
+            retry_delay: 首次重试前的等待时间（秒），之后每轮加倍
+            single_fallback: 批量接口不支持的物流是否改为逐个调用 ``execute_shipment``
+            rate_limit_delay: 收到 429 时所有请求暂停的时间（秒），暂停结束后仍被限流时加倍
+        """
+        if chunk_size < 1:
+            raise ValueError('chunk_size must be positive')
+        self.chunk_size = chunk_size
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.single_fallback = single_fallback
+        self.rate_limit_delay = rate_limit_delay
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._resume_at = 0.0
+        self._rate_limit_streak = 0
+
+    async def _throttle(self):
+        """等待限流暂停结束"""
+        loop = asyncio.get_running_loop()
+        while loop.time() < self._resume_at:
+            await asyncio.sleep(self._resume_at - loop.time())
+
+    def _track_rate_limit(self, error: Optional[BaseException] = None):
+        # ShoplineAPIError 不携带响应头，无法读取 Retry-After：429 时暂停全部请求，而不是像 5xx 一样只延后本批
+        if not isinstance(error, ShoplineAPIError) or error.status_code != 429:
+            if error is None:
+                self._rate_limit_streak = 0
+            return
+        now = asyncio.get_running_loop().time()
+        if now < self._resume_at:
+            # 暂停期间发出的并发请求同样被限流，不重复加倍
+            return
+        self._resume_at = now + self.rate_limit_delay * 2 ** self._rate_limit_streak
+        self._rate_limit_streak += 1
+
+    async def _update_delivery(self, session: aiohttp.ClientSession, item: ShipmentItem,
+                               outcome: ShipmentOutcome, report: ShipmentReport) -> bool:
+        if item.delivery is None:
+            return True
+        try:
+            if not item.delivery_id:
+                raise ValueError('delivery_id is required when delivery is provided')
+            report.request_count += 1
+            async with self._semaphore:
+                await self._throttle()
+                await update_order_delivery.call(session, item.delivery_id, body=item.delivery)
+            self._track_rate_limit()
+            return True
+        except (ShoplineAPIError, aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            self._track_rate_limit(e)
+            outcome.status, outcome.error = 'delivery_failed', e
+            return False
+
+    async def _ship_chunk(self, session: aiohttp.ClientSession, order_ids: List[str],
+                          report: ShipmentReport) -> List[str]:
+        """发送一批订单，返回需要重试的订单"""
+        outcomes = report.outcomes
+        for order_id in order_ids:
+            outcomes[order_id].attempts += 1
+            outcomes[order_id].method = 'bulk'
+        report.request_count += 1
+        try:
+            async with self._semaphore:
+                await self._throttle()
+                response = await bulk_execute_shipment.call(
+                    session, body=bulk_execute_shipment.Body(orderIds=order_ids)
+                )
+        except (ShoplineAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            self._track_rate_limit(e)
+            # 请求可能已执行：重发时已出货的订单会返回 status_error，因此不重发，交由调用方核对
+            status = 'uncertain' if _is_uncertain(e) else 'failed'
+            for order_id in order_ids:
+                outcomes[order_id].status, outcomes[order_id].error = status, e
+            return order_ids if _is_retryable(e) else []
+        self._track_rate_limit()
+
+        pending = dict.fromkeys(order_ids)
+        for key, status in _RESPONSE_STATUSES:
+            for order_id in getattr(response, key) or ():
+                order_id = str(order_id)
+                if order_id in pending:
+                    del pending[order_id]
+                    outcomes[order_id].status, outcomes[order_id].error = status, None
+        # 响应未提及的订单结果未知，与 processingFailedOrderIds 一同重试
+        for order_id in pending:
+            outcomes[order_id].status, outcomes[order_id].error = 'failed', None
+        return [order_id for order_id in order_ids if outcomes[order_id].status == 'failed']
+
+    async def _ship_single(self, session: aiohttp.ClientSession, outcome: ShipmentOutcome,
+                           report: ShipmentReport):
+        for attempt in range(self.max_retries + 1):
+            outcome.attempts += 1
+            outcome.method = 'single'
+            report.request_count += 1
+            try:
+                async with self._semaphore:
+                    await self._throttle()
+                    response = await execute_shipment.call(session, outcome.order_id)
+            except (ShoplineAPIError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._track_rate_limit(e)
+                outcome.status, outcome.error = 'uncertain' if _is_uncertain(e) else 'failed', e
+                if not _is_retryable(e) or attempt == self.max_retries:
+                    return
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+                continue
+            self._track_rate_limit()
+            outcome.status, outcome.error = 'processing', None
+            outcome.delivery_status, outcome.tracking_number = response.delivery_status, response.tracking_number
+            return
+
+    async def _ship(self, session: aiohttp.ClientSession, order_ids: List[str], report: ShipmentReport):
+        retry = await self._ship_chunk(session, order_ids, report)
+        for attempt in range(self.max_retries):
+            if not retry:
+                break
+            await asyncio.sleep(self.retry_delay * 2 ** attempt)
+            # 失败的子集重新按 chunk_size 组批
+            results = await asyncio.gather(*(
+                self._ship_chunk(session, retry[i:i + self.chunk_size], report)
+                for i in range(0, len(retry), self.chunk_size)
+            ))
+            retry = [order_id for chunk in results for order_id in chunk]
+        if self.single_fallback:
+            unsupported = [report.outcomes[order_id] for order_id in order_ids
+                           if report.outcomes[order_id].status == 'platform_not_supported']
+            await asyncio.gather(*(self._ship_single(session, outcome, report) for outcome in unsupported))
+
+    async def run(
+            self,
+            session: aiohttp.ClientSession,
+            orders: Union[Iterable[ShipmentInput], AsyncIterable[ShipmentInput]]
+    ) -> ShipmentReport:
+        """
+        为订单出货
+
+        Args:
+            session: 客户端会话
+            orders: 订单 ID 或 ``ShipmentItem``，可以是异步迭代器；重复的订单只出货一次
+
+        Returns:
+            ShipmentReport: 逐单结果
+        """
+        report = ShipmentReport()
+        tasks: List[asyncio.Task] = []
+        chunk: List[str] = []
+        delivery_updates: List[asyncio.Task] = []
+
+        async def _prepare(item: ShipmentItem) -> Optional[str]:
+            ok = await self._update_delivery(session, item, report.outcomes[item.order_id], report)
+            return item.order_id if ok else None
+
+        async def _flush(updates: List[asyncio.Task], order_ids: List[str]):
+            prepared = [order_id for order_id in await asyncio.gather(*updates) if order_id] if updates else []
+            batch = order_ids + prepared
+            for i in range(0, len(batch), self.chunk_size):
+                await self._ship(session, batch[i:i + self.chunk_size], report)
+
+        try:
+            async for item in async_iterate(orders):
+                if not isinstance(item, ShipmentItem):
+                    item = ShipmentItem(str(item))
+                if item.order_id in report.outcomes:
+                    continue
+                report.outcomes[item.order_id] = ShipmentOutcome(item.order_id)
+                if item.delivery is not None:
+                    delivery_updates.append(asyncio.ensure_future(_prepare(item)))
+                else:
+                    chunk.append(item.order_id)
+                if len(chunk) + len(delivery_updates) >= self.chunk_size:
+                    tasks.append(asyncio.ensure_future(_flush(delivery_updates, chunk)))
+                    chunk, delivery_updates = [], []
+                # 输入远快于出货时限制在途批次数，避免一次性读入整个订单流
+                in_flight = [task for task in tasks if not task.done()]
+                if len(in_flight) >= self.concurrency * 2:
+                    await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            if chunk or delivery_updates:
+                tasks.append(asyncio.ensure_future(_flush(delivery_updates, chunk)))
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks + delivery_updates:
+                task.cancel()
+        return report
+
@@ -0,0 +1,285 @@
+"""
+列表响应的流式解码
+
+``stream_items`` 边接收响应体边解析 ``items`` 数组，每解析出一条记录立即产出，
+per_page=999 的大页无需等待完整响应即可开始处理，内存峰值约为单条记录加一个读取块。
+每条记录由标准库 ``json`` 的 C 解码器解析，不依赖 ijson。
+
+用法::
+
+    async with client.new_session() as session:
+        stream = stream_items(session, get_orders, get_orders.Params(per_page=999), model=Order)
+        async for order in stream:
+            ...
+        print(stream.meta['pagination'])
+"""
+
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Dict, List, Optional, Type
+
+from pydantic import BaseModel
+
+from shopline_sdk.helper import _get_api_operation
+
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = ',]}' + _WHITESPACE
+
+# 记录内部需要关注的字符：字符串外的括号与引号，字符串内的引号与转义符
+_STRUCTURE = re.compile(r'[\[\]{}"]')
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+# 解析状态
+_START, _KEY, _COLON, _VALUE, _NEXT_KEY, _ITEM, _ITEM_BODY, _NEXT_ITEM, _END = range(9)
+_INCOMPLETE = object()
+
+
+class IncrementalItemsParser:
+    """
+    增量解析 ``{"items": [...], ...}`` 形式的 JSON 文本
+
+    ``items`` 中的每条记录在完整到达后由 ``feed`` 返回，其他顶层字段收集到 ``meta``。
+    """
+
+    def __init__(self, key: str = 'items'):
+        self.key = key
+        self.meta: Dict[str, Any] = {}
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+        self._state = _START
+        self._current_key: Optional[str] = None
+        # 跨读取块的记录扫描状态：已扫描的文本、括号深度、是否在字符串内、是否紧跟转义符
+        self._parts: List[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def _skip_whitespace(self):
+        buffer, pos = self._buffer, self._pos
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        self._pos = pos
+
+    def _decode(self) -> Any:
+        """解析 ``_pos`` 处的一个完整 JSON 值，数据不完整时返回 ``_INCOMPLETE``"""
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, self._pos)
+        except json.JSONDecodeError:
+            return _INCOMPLETE
+        # 数字可能被读取块截断（如 ``-12.5e3`` 只收到 ``-12.``），后面出现分隔符才算完整
+        if not isinstance(value, (dict, list, str)) and (
+                end == len(self._buffer) or self._buffer[end] not in _DELIMITERS):
+            return _INCOMPLETE
+        self._pos = end
+        return value
+
+    def _scan_item(self) -> Any:
+        """
+        扫描 ``_pos`` 处的对象或数组，闭合后整体解码一次；未闭合时返回 ``_INCOMPLETE``
+
+        扫描状态跨读取块保留，已扫描的文本移入 ``_parts``，每个字符只扫描一次。
+        """
+        buffer, pos = self._buffer, self._pos
+        depth, in_string, escape = self._depth, self._in_string, self._escape
+        while True:
+            if escape:
+                if pos >= len(buffer):
+                    break
+                pos += 1
+                escape = False
+            match = (_STRING_SPECIAL if in_string else _STRUCTURE).search(buffer, pos)
+            if match is None:
+                pos = len(buffer)
+                break
+            char, pos = match.group(), match.end()
+            if char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = not in_string
+            elif char in '{[':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    text = ''.join(self._parts) + buffer[self._pos:pos]
+                    self._parts = []
+                    self._depth, self._in_string, self._escape = 0, False, False
+                    self._pos = pos
+                    return json.loads(text)
+        self._parts.append(buffer[self._pos:pos])
+        self._depth, self._in_string, self._escape = depth, in_string, escape
+        self._pos = pos
+        return _INCOMPLETE
+
+    def _expect(self, char: str) -> bool:
+        self._skip_whitespace()
+        if self._pos >= len(self._buffer):
+            return False
+        if self._buffer[self._pos] != char:
+            raise ValueError(f'Expected {char!r} at {self._pos}, got {self._buffer[self._pos]!r}')
+        self._pos += 1
+        return True
+
+    def feed(self, text: str) -> List[Any]:
+        """
+        追加文本并返回新解析出的记录
+
+        Args:
+            text: 响应体的下一段文本
+
+        Returns:
+            本次完整解析出的 ``items`` 记录
+        """
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        items = []
+        while True:
+            if self._state == _ITEM_BODY:
+                # 记录内部的空白可能属于字符串，不能跳过
+                item = self._scan_item()
+                if item is _INCOMPLETE:
+                    break
+                items.append(item)
+                self._state = _NEXT_ITEM
+                continue
+            self._skip_whitespace()
+            if self._pos >= len(self._buffer):
+                break
+            char = self._buffer[self._pos]
+            if self._state == _START:
+                if not self._expect('{'):
+                    break
+                self._state = _KEY
+            elif self._state == _KEY:
+                if char == '}':
+                    self._pos += 1
+                    self._state = _END
+                    continue
+                key = self._decode()
+                if key is _INCOMPLETE:
+                    break
+                self._current_key = key
+                self._state = _COLON
+            elif self._state == _COLON:
+                self._expect(':')
+                self._state = _VALUE
+            elif self._state == _VALUE:
+                if self._current_key == self.key and char == '[':
+                    self._pos += 1
+                    self._state = _ITEM
+                    continue
+                value = self._decode()
+                if value is _INCOMPLETE:
+                    break
+                self.meta[self._current_key] = value
+                self._state = _NEXT_KEY
+            elif self._state == _NEXT_KEY:
+                self._pos += 1
+                if char == '}':
+                    self._state = _END
+                elif char == ',':
+                    self._state = _KEY
+                else:
+                    raise ValueError(f'Unexpected {char!r} at {self._pos - 1}')
+            elif self._state == _ITEM:
+                if char == ']':
+                    self._pos += 1
+                    self._state = _NEXT_KEY
+                    continue
+                if char in '{[':
+                    self._state = _ITEM_BODY
+                    continue
+                item = self._decode()
+                if item is _INCOMPLETE:
+                    break
+                items.append(item)
+                self._state = _NEXT_ITEM
+            elif self._state == _NEXT_ITEM:
+                self._pos += 1
+                if char == ']':
+                    self._state = _NEXT_KEY
+                elif char == ',':
+                    self._state = _ITEM
+                else:
+                    raise ValueError(f'Unexpected {char!r} at {self._pos - 1}')
+            else:
+                raise ValueError(f'Unexpected data after end of JSON at {self._pos}')
+        return items
+
+    def close(self):
+        """确认 JSON 已完整结束"""
+        if self._state != _END:
+            raise ValueError('Incomplete JSON response')
+
+
+class ItemStream:
+    """``stream_items`` 返回的异步迭代器，迭代结束后 ``meta`` 中包含 ``pagination`` 等其他顶层字段"""
+
+    def __init__(self, session: Any, api: Any, params: Optional[BaseModel], model: Optional[Type[BaseModel]],
+                 chunk_size: int, path_params: Dict[str, Any]):
+        self.session = session
+        self.api = api
+        self.params = params
+        self.model = model
+        self.chunk_size = chunk_size
+        self.path_params = path_params
+        self.meta: Dict[str, Any] = {}
+
+    @property
+    def pagination(self) -> Optional[Dict[str, Any]]:
+        return self.meta.get('pagination')
+
+    def __aiter__(self) -> AsyncIterator[Any]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[Any]:
+        from shopline_sdk.exceptions import ShoplineAPIError
+
+        operation = _get_api_operation(self.api)
+        url = operation.path.format(**self.path_params).lstrip('/')
+        query_params = self.params.model_dump(exclude_none=True, by_alias=True) if self.params else {}
+        validate = self.model.model_validate if self.model else None
+
+        async with self.session.request(
+                operation.method, url, params=query_params, headers={"Content-Type": "application/json"}
+        ) as response:
+            if response.status >= 400:
+                raise ShoplineAPIError(status_code=response.status, error=await response.json())
+
+            parser = IncrementalItemsParser()
+            self.meta = parser.meta
+            text_decoder = codecs.getincrementaldecoder(getattr(response, 'charset', None) or 'utf-8')()
+            # 响应压缩（gzip / br）由 aiohttp 在读取时透明解压
+            async for chunk in response.content.iter_chunked(self.chunk_size):
+                for item in parser.feed(text_decoder.decode(chunk)):
+                    yield validate(item) if validate else item
+            for item in parser.feed(text_decoder.decode(b'', final=True)):
+                yield validate(item) if validate else item
+            parser.close()
+
+
+def stream_items(
+        session: Any,
+        api: Any,
+        params: Optional[BaseModel] = None,
+        model: Optional[Type[BaseModel]] = None,
+        chunk_size: int = 64 * 1024,
+        **path_params
+) -> ItemStream:
+    """
+    流式读取列表接口的 ``items``
+
+    Args:
+        session: 客户端会话
+        api: 列表接口模块，例如 ``get_orders``、``search_orders``
+        params: 查询参数模型实例
+        model: 逐条校验为该模型（例如 ``Order``），None 时产出原始字典
+        chunk_size: 每次读取的字节数
+        **path_params: 路径参数
+
+    Returns:
+        ItemStream: 异步迭代器
+    """
+    return ItemStream(session, api, params, model, chunk_size, path_params)
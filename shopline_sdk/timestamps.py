@@ -0,0 +1,179 @@
+"""
+时间字段
+
+生成的模型与查询参数中的时间字段（``created_at``、``updated_at``、``start_time``、``shipped_before`` 等）
+均声明为字符串。本模块提供：
+
+- ``enable_datetime_accessors``: 为模型增加 ``<字段>_dt`` 只读属性，首次访问时解析并缓存在实例上，
+  字段被重新赋值或 ``model_copy`` 更新后自动重新解析
+- ``format_datetime`` / ``with_datetimes``: 将 ``datetime`` 格式化为接口接受的 UTC 字符串并写入查询参数
+- ``cached_parse_datetime``: 带缓存的 ``parse_datetime``，适合直接处理原始 JSON
+
+用法::
+
+    enable_datetime_accessors(Order)
+    orders.sort(key=lambda order: order.updated_at_dt)
+
+    params = with_datetimes(get_orders.Params(per_page=50), updated_after=checkpoint)
+"""
+
+import datetime
+import typing
+from functools import lru_cache
+from typing import Any, Dict, Iterator, Optional, Tuple, Type, TypeVar, Union
+
+from pydantic import BaseModel
+
+from shopline_sdk.helper import parse_datetime
+
+M = TypeVar('M', bound=BaseModel)
+
+DATETIME_SUFFIXES = ('_at', '_time', '_date', '_before', '_after')
+"""按字段名后缀识别时间字段"""
+
+DATETIME_ACCESSOR_SUFFIX = '_dt'
+
+cached_parse_datetime = lru_cache(maxsize=65536)(parse_datetime)
+"""带缓存的 ``parse_datetime``，同一字符串只解析一次"""
+
+
+def _unwrap(annotation: Any) -> Any:
+    if typing.get_origin(annotation) is typing.Union:
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) == 1:
+            return args[0]
+    return annotation
+
+
+def _nested_models(annotation: Any) -> Iterator[Type[BaseModel]]:
+    annotation = _unwrap(annotation)
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        yield annotation
+    for arg in typing.get_args(annotation):
+        yield from _nested_models(arg)
+
+
+def datetime_fields(model: Type[BaseModel]) -> Tuple[str, ...]:
+    """
+    返回模型中按名称识别的时间字段
+
+    Args:
+        model: 模型或查询参数类，例如 ``Order``、``get_orders.Params``
+
+    Returns:
+        字段名，只包含字符串类型且名称以 ``DATETIME_SUFFIXES`` 结尾的字段
+    """
+    return tuple(
+        name for name, field_info in model.model_fields.items()
+        if _unwrap(field_info.annotation) is str and name.endswith(DATETIME_SUFFIXES)
+    )
+
+
+def is_datetime_field(model: Type[BaseModel], path: str) -> bool:
+    """
+    判断字段路径是否为时间字段，路径可以穿过嵌套模型与列表
+
+    Args:
+        model: 根模型，例如 ``Order``
+        path: 字段路径，例如 ``created_at``、``order_delivery.shipped_at``
+    """
+    *parents, name = path.split('.')
+    models = [model]
+    for parent in parents:
+        models = [
+            nested
+            for current in models if parent in current.model_fields
+            for nested in _nested_models(current.model_fields[parent].annotation)
+        ]
+    return any(name in datetime_fields(current) for current in models)
+
+
+class DatetimeAccessor:
+    """时间字段的只读解析属性，按原始字符串缓存解析结果"""
+
+    def __init__(self, field: str):
+        self.field = field
+        self.cache_key = f'__{field}_parsed'
+
+    def __get__(self, instance: Optional[BaseModel], owner: type) -> Any:
+        if instance is None:
+            return self
+        values = instance.__dict__
+        raw = values.get(self.field)
+        cached = values.get(self.cache_key)
+        # 字段值未变化时直接返回缓存；赋值、model_copy 后原始字符串对象不同，重新解析
+        if cached is not None and cached[0] is raw:
+            return cached[1]
+        parsed = parse_datetime(raw)
+        values[self.cache_key] = (raw, parsed)
+        return parsed
+
+
+def enable_datetime_accessors(*models: Type[BaseModel], recursive: bool = True) -> None:
+    """
+    为模型的时间字段增加 ``<字段>_dt`` 属性，返回带时区的 ``datetime``（无法解析时为 None）
+
+    属性不参与校验、序列化与比较，多次调用不会重复安装。
+
+    Args:
+        *models: 模型类，例如 ``Order``、``Customer``
+        recursive: 同时处理嵌套的模型（如 ``Order.order_delivery``）
+    """
+    pending = list(models)
+    seen = set()
+    while pending:
+        model = pending.pop()
+        if model in seen:
+            continue
+        seen.add(model)
+        for name in datetime_fields(model):
+            accessor = f'{name}{DATETIME_ACCESSOR_SUFFIX}'
+            if accessor in model.model_fields:
+                continue
+            if not isinstance(model.__dict__.get(accessor), DatetimeAccessor):
+                setattr(model, accessor, DatetimeAccessor(name))
+        if recursive:
+            for field_info in model.model_fields.values():
+                pending.extend(_nested_models(field_info.annotation))
+
+
+def format_datetime(value: Union[datetime.datetime, datetime.date, str]) -> str:
+    """
+    格式化为接口接受的 UTC 时间字符串，例如 ``2024-01-01T00:00:00.000Z``
+
+    Args:
+        value: ``datetime``（没有时区的按 UTC 处理）、``date``（当天 0 点 UTC）或已格式化的字符串
+
+    Returns:
+        精确到毫秒的 ISO 8601 字符串
+    """
+    if isinstance(value, str):
+        return value
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime(value.year, value.month, value.day)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    value = value.astimezone(datetime.timezone.utc)
+    return value.strftime('%Y-%m-%dT%H:%M:%S.') + f'{value.microsecond // 1000:03d}Z'
+
+
+def with_datetimes(params: Union[M, Type[M]], **values: Union[datetime.datetime, datetime.date, str, None]) -> M:
+    """
+    设置查询参数中的时间字段
+
+    Args:
+        params: 查询参数实例或类，例如 ``get_orders.Params(per_page=50)``
+        **values: 字段名与时间，例如 ``updated_after=checkpoint``，None 表示清除
+
+    Returns:
+        设置后的参数副本
+    """
+    if isinstance(params, type):
+        params = params()
+    fields = type(params).model_fields
+    update: Dict[str, Optional[str]] = {}
+    for name, value in values.items():
+        if name not in fields:
+            raise KeyError(f'{type(params).__qualname__} has no field {name}')
+        update[name] = None if value is None else format_datetime(value)
+    return params.model_copy(update=update)
@@ -0,0 +1,94 @@
+"""
+OpenTelemetry 链路追踪
+
+``TracingHook`` 为每次接口调用创建一个 CLIENT span，名称为操作名（如 ``orders.search_orders``），
+并以子 span 记录 JSON 解码与模型校验阶段。需要安装 ``opentelemetry-api``::
+
+    pip install shopline-sdk-python[tracing]
+
+未注册该钩子时客户端不会安装任何插桩，没有额外开销。
+
+用法::
+
+    client = ShoplineAPIClient(token, hooks=[TracingHook(merchant_id='5a55b3c9')])
+"""
+
+from typing import Any, Optional
+
+from shopline_sdk.instrumentation import RequestHook, RequestRecord
+
+_SPAN_KEY = 'otel_span'
+
+
+class TracingHook(RequestHook):
+    """为接口调用创建 OpenTelemetry span 的请求钩子"""
+
+    def __init__(self, tracer: Any = None, merchant_id: Optional[str] = None, phase_spans: bool = True):
+        """
+        Args:
+            tracer: OpenTelemetry ``Tracer``，默认使用全局 ``TracerProvider`` 的 ``shopline_sdk`` tracer
+            merchant_id: 写入 ``shopline.merchant_id`` 属性的商户 ID
+            phase_spans: 是否为解码与校验阶段创建子 span
+        """
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError(
+                'TracingHook requires opentelemetry-api, install it with: pip install shopline-sdk-python[tracing]'
+            ) from e
+        self._trace = trace
+        self.tracer = tracer or trace.get_tracer('shopline_sdk')
+        self.merchant_id = merchant_id
+        self.phase_spans = phase_spans
+
+    def on_request_start(self, record: RequestRecord):
+        attributes = {
+            'http.request.method': record.method,
+            'http.route': record.operation.path if record.operation else record.path,
+            'url.full': str(record.url),
+            'shopline.operation': record.name,
+        }
+        if self.merchant_id:
+            attributes['shopline.merchant_id'] = self.merchant_id
+        span = self.tracer.start_span(
+            record.name,
+            kind=self._trace.SpanKind.CLIENT,
+            attributes=attributes,
+            start_time=record.started_at_ns,
+        )
+        record.attributes[_SPAN_KEY] = span
+
+    def on_request_end(self, record: RequestRecord):
+        span = record.attributes.pop(_SPAN_KEY, None)
+        if span is None:
+            return
+        if not span.is_recording():
+            span.end()
+            return
+
+        if record.status is not None:
+            span.set_attribute('http.response.status_code', record.status)
+        span.set_attribute('http.response.body.size', record.response_bytes)
+        for key, attribute in (('page', 'shopline.page'), ('item_count', 'shopline.item_count')):
+            if key in record.attributes:
+                span.set_attribute(attribute, record.attributes[key])
+        for phase, seconds in record.phases.items():
+            span.set_attribute(f'shopline.phase.{phase}_ms', seconds * 1000)
+
+        if record.error is not None:
+            span.record_exception(record.error)
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, str(record.error)))
+        elif record.status is not None and record.status >= 400:
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+
+        if self.phase_spans:
+            context = self._trace.set_span_in_context(span)
+            for phase in ('decode', 'validate'):
+                start, end = record.marks.get(f'{phase}_start'), record.marks.get(f'{phase}_end')
+                if start is None or end is None:
+                    continue
+                child = self.tracer.start_span(f'{record.name} {phase}', context=context,
+                                               start_time=record.to_ns(start))
+                child.end(end_time=record.to_ns(end))
+
+        span.end(end_time=record.to_ns(record.ended_at))